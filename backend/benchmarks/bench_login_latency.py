@@ -0,0 +1,91 @@
+"""
+Benchmark: public request latency during a login burst
+
+A FastAPI app with a public endpoint and a login endpoint is called
+in-process (ASGI, no network). While a burst of logins runs, a probe
+requests the public endpoint back to back. The login checks bcrypt either
+on the event loop (verify_password, the previous behaviour) or on the
+bcrypt pool (verify_password_async).
+
+Run from backend/:
+    python -m benchmarks.bench_login_latency
+"""
+from fastapi import FastAPI
+from services.auth import BCRYPT_WORKERS, hash_password, verify_password, verify_password_async
+import argparse
+import asyncio
+import statistics
+import time
+
+PASSWORD = "benchmark-password"
+HASHED = hash_password(PASSWORD)
+
+app = FastAPI()
+
+@app.get("/public")
+async def public():
+    return {"status": "ok"}
+
+@app.post("/login-blocking")
+async def login_blocking():
+    return {"valid": verify_password(PASSWORD, HASHED)}
+
+@app.post("/login")
+async def login():
+    return {"valid": await verify_password_async(PASSWORD, HASHED)}
+
+async def request(method: str, path: str) -> float:
+    """Run one request through the app; returns its latency in seconds."""
+    scope = {
+        "type": "http", "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "server": ("bench", 80), "client": ("127.0.0.1", 1),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"{method} {path}: {message['status']}")
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - start
+
+async def scenario(login_path: str, logins: int):
+    """Probe latencies (ms) while `logins` concurrent logins run, plus the burst duration."""
+    probes = []
+    burst = asyncio.ensure_future(asyncio.gather(*[request("POST", login_path) for _ in range(logins)]))
+    start = time.perf_counter()
+    while not burst.done():
+        # Latency as a client sees it: time from sending until the response.
+        sent = time.perf_counter()
+        await asyncio.sleep(0.002)
+        await request("GET", "/public")
+        probes.append((time.perf_counter() - sent - 0.002) * 1000)
+    await burst
+    return probes, time.perf_counter() - start
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+async def run(args):
+    print(f"bcrypt cost {HASHED.split('$')[2]}, {BCRYPT_WORKERS} bcrypt workers, {args.logins} concurrent logins")
+    print(f"{'login path':<16} {'probes':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'burst s':>8}")
+    for label, path in [("event loop", "/login-blocking"), ("bcrypt pool", "/login")]:
+        probes, duration = await scenario(path, args.logins)
+        print(
+            f"{label:<16} {len(probes):>6} {statistics.median(probes):>8.2f} "
+            f"{percentile(probes, 0.95):>8.2f} {max(probes):>8.2f} {duration:>8.2f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark: scalar haversine loop + full sort vs utils.geo.nearest
+
+Run from backend/:
+    python -m benchmarks.bench_nearby_distance
+"""
+from utils.geo import nearest
+from utils.nearby_places import calculate_distance
+import argparse
+import random
+import timeit
+
+CENTER = (17.4401, 78.3489)
+
+def scalar_top_k(lat, lon, lats, lons, k):
+    """The previous approach: one distance per element, then sort everything."""
+    places = [(calculate_distance(lat, lon, a, b), i) for i, (a, b) in enumerate(zip(lats, lons))]
+    places.sort()
+    return places[:k]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,10000,100000')
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(42)
+    print(f"{'points':>8} {'scalar ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        lats = [CENTER[0] + random.uniform(-0.2, 0.2) for _ in range(size)]
+        lons = [CENTER[1] + random.uniform(-0.2, 0.2) for _ in range(size)]
+
+        expected = [i for _, i in scalar_top_k(*CENTER, lats, lons, args.k)]
+        indices, _ = nearest(*CENTER, lats, lons, args.k)
+        assert list(indices) == expected, "nearest() disagrees with the scalar loop"
+
+        number = max(1, 20000 // size)
+        scalar = min(timeit.repeat(lambda: scalar_top_k(*CENTER, lats, lons, args.k), number=number, repeat=args.repeat)) / number
+        vector = min(timeit.repeat(lambda: nearest(*CENTER, lats, lons, args.k), number=number, repeat=args.repeat)) / number
+        print(f"{size:>8} {scalar * 1000:>10.3f} {vector * 1000:>10.3f} {scalar / vector:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
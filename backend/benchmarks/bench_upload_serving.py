@@ -0,0 +1,87 @@
+"""
+Benchmark: StaticFiles mount vs services.upload_server.UploadServer
+
+Calls both ASGI apps directly (no network) on a temporary upload
+directory and reports time per request and bytes sent for a full image
+GET, a revalidation with If-None-Match and a 1 MB range of a video.
+
+Run from backend/:
+    python -m benchmarks.bench_upload_serving
+"""
+from services.upload_server import UploadServer
+from starlette.staticfiles import StaticFiles
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+IMAGE = "9c" * 32 + ".jpg"  # a content-addressed name
+VIDEO = "tour.mp4"
+
+async def call(app, path: str, headers: dict = None):
+    """Run one GET through an ASGI app; returns (status, response headers, body bytes)."""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()],
+    }
+    result = {"status": None, "headers": {}, "bytes": 0}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["headers"] = {key.decode(): value.decode() for key, value in message["headers"]}
+        elif message["type"] == "http.response.body":
+            result["bytes"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return result
+
+async def measure(app, path: str, headers: dict, number: int):
+    response = await call(app, path, headers)
+    start = time.perf_counter()
+    for _ in range(number):
+        await call(app, path, headers)
+    return (time.perf_counter() - start) / number, response
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, IMAGE), "wb") as f:
+            f.write(os.urandom(args.image_kb * 1024))
+        with open(os.path.join(directory, VIDEO), "wb") as f:
+            f.write(os.urandom(args.video_mb * 1024 * 1024))
+
+        apps = {"StaticFiles": StaticFiles(directory=directory), "UploadServer": UploadServer(directory)}
+        etags = {name: (await call(app, f"/{IMAGE}"))["headers"].get("etag", "") for name, app in apps.items()}
+        cases = [
+            ("image GET", f"/{IMAGE}", lambda name: {}),
+            ("image 304", f"/{IMAGE}", lambda name: {"If-None-Match": etags[name]}),
+            ("video range 1MB", f"/{VIDEO}", lambda name: {"Range": "bytes=1048576-2097151"}),
+        ]
+
+        print(f"{'case':<16} {'app':<13} {'status':>6} {'bytes':>10} {'ms/req':>8}  cache-control")
+        for label, path, headers in cases:
+            for name, app in apps.items():
+                seconds, response = await measure(app, path, headers(name), args.number)
+                print(
+                    f"{label:<16} {name:<13} {response['status']:>6} {response['bytes']:>10} "
+                    f"{seconds * 1000:>8.3f}  {response['headers'].get('cache-control', '-')}"
+                )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--image-kb', type=int, default=300)
+    parser.add_argument('--video-mb', type=int, default=50)
+    parser.add_argument('--number', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == '__main__':
+    main()
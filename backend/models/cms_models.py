@@ -378,4 +378,30 @@ class BlogCreate(BaseModel):
     meta_keywords: Optional[str] = None
     featured: bool = Field(default=False)
 
-    display_order: int = Field(default=0)
\ No newline at end of file
+    display_order: int = Field(default=0)
+
+
+# Resumable Upload Model
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1, description="Original file name")
+    size: int = Field(..., gt=0, description="Total size in bytes")
+    content_type: Optional[str] = Field(None, description="MIME type (guessed from the name if omitted)")
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$", description="Checksum verified on completion")
+
+# Bulk admin operations
+BULK_MAX_ITEMS = 500
+
+class BulkCreate(BaseModel):
+    # Validated per item against the collection's create model, so one bad
+    # item fails alone instead of rejecting the batch.
+    items: List[dict] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class BulkUpdateItem(BaseModel):
+    id: str
+    fields: dict = Field(..., min_length=1, description="Fields to set; others are left unchanged")
+
+class BulkUpdate(BaseModel):
+    items: List[BulkUpdateItem] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class BulkIds(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
@@ -1,21 +1,32 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, Request, Header
 from fastapi.security import HTTPBearer
-from typing import List
-from services.auth import get_current_admin_user, hash_password, verify_password, create_access_token
+from pydantic import BaseModel, ValidationError
+from typing import Callable, List, Optional, Type
+from services.auth import (
+    get_current_admin_user, hash_password_async, verify_password_async, create_access_token, revoke_tokens
+)
 from services.database import (
     properties_db, home_banners_db, about_sections_db, team_members_db,
     amenities_db, upcoming_projects_db, testimonials_db, news_events_db,
     nri_content_db, contact_info_db, site_settings_db, admin_users_db,
-    contact_submissions_db, budget_homes_db, plots_db, blogs_db
+    contact_submissions_db, budget_homes_db, plots_db, blogs_db, jobs_db,
+    DatabaseService, index_report
 )
 from models.cms_models import (
     AdminLogin, AdminCreate, PropertyCreate, HomeBannerCreate, AboutSectionCreate,
     TeamMemberCreate, AmenityCreate, UpcomingProjectCreate, TestimonialCreate,
-    NewsEventCreate, NRIContentCreate, ContactInfoUpdate, BudgetHomeCreate, PlotCreate, BlogCreate
+    NewsEventCreate, NRIContentCreate, ContactInfoUpdate, BudgetHomeCreate, PlotCreate, BlogCreate,
+    UploadSessionCreate, BulkCreate, BulkUpdate, BulkIds
 )
 from utils.nearby_places import fetch_nearby_places
-import os
-import uuid
+from services.jobs import job_queue, JOB_STATUSES
+from services.uploads import (
+    save_multipart_upload, create_session, get_session, append_to_session, abort_session,
+    create_direct_upload, complete_direct_upload
+)
+from services.upload_refs import collect_garbage, UPLOAD_GC_GRACE_HOURS
+from services.geo_listings import GEO_SOURCES, ENRICH_JOB, nearby_places_source
+from utils.pagination import paginate
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -27,14 +38,14 @@ async def admin_login(credentials: AdminLogin):
     """Admin login."""
     admin = await admin_users_db.get_one({"username": credentials.username})
     
-    if not admin or not verify_password(credentials.password, admin["password_hash"]):
+    if not admin or not await verify_password_async(credentials.password, admin["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     if not admin.get("active", True):
         raise HTTPException(status_code=401, detail="Account disabled")
     
     access_token = create_access_token(
-        data={"sub": admin["username"], "role": admin["role"]},
+        data={"sub": admin["username"], "role": admin["role"], "tv": admin.get("token_version", 0)},
         expires_delta=timedelta(hours=8)
     )
     
@@ -61,6 +72,12 @@ async def get_current_user(current_user: dict = Depends(get_current_admin_user))
         "role": admin["role"]
     }
 
+@router.post("/auth/logout")
+async def admin_logout(current_user: dict = Depends(get_current_admin_user)):
+    """Revoke every token issued to the current admin, signing out all their sessions."""
+    await revoke_tokens(current_user["username"])
+    return {"message": "Logged out"}
+
 @router.post("/auth/change-password")
 async def change_password(
     password_data: dict,
@@ -82,11 +99,11 @@ async def change_password(
         raise HTTPException(status_code=404, detail="User not found")
     
     # Verify current password
-    if not verify_password(current_password, admin["password_hash"]):
+    if not await verify_password_async(current_password, admin["password_hash"]):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Update password
-    new_password_hash = hash_password(new_password)
+    new_password_hash = await hash_password_async(new_password)
     success = await admin_users_db.update_by_id(admin["_id"], {
         "password_hash": new_password_hash,
         "updated_at": datetime.utcnow()
@@ -95,46 +112,112 @@ async def change_password(
     if not success:
         raise HTTPException(status_code=500, detail="Failed to update password")
     
+    # Sessions signed in with the old password end here.
+    await revoke_tokens(admin["username"])
     return {"message": "Password changed successfully"}
 
+# Index diagnostics
+@router.get("/index-report")
+async def admin_index_report(current_user: dict = Depends(get_current_admin_user)):
+    """List query shapes served since startup that no declared index covers."""
+    unindexed = index_report()
+    return {"unindexed_queries": unindexed, "count": len(unindexed)}
+
 # File upload
-@router.post("/upload")
+@router.post("/upload", openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "properties": {"file": {"type": "string", "format": "binary"}}, "required": ["file"]
+}}}}})
 async def upload_file(
-    file: UploadFile = File(...),
+    request: Request,
     current_user: dict = Depends(get_current_admin_user)
 ):
-    """Upload file."""
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file selected")
-    
-    # Create uploads directory if it doesn't exist
-    upload_dir = "/app/backend/uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generate unique filename
-    file_extension = file.filename.split('.')[-1] if '.' in file.filename else ''
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-    
-    # Return file URL - using the backend URL from environment
-    backend_url = os.environ.get('BACKEND_URL')
-    if backend_url:
-        file_url = f"{backend_url}/uploads/{unique_filename}"
-    else:
-        file_url = f"/uploads/{unique_filename}"
+    """Upload file (multipart form field "file")."""
+    # The form is parsed as it streams in, so the per-type size limit stops
+    # an oversized file early; images also get resized WebP/AVIF variants
+    # and a thumbnail.
+    return await save_multipart_upload(request)
+
+# Resumable uploads
+@router.post("/uploads")
+async def create_upload_session(
+    session_data: UploadSessionCreate,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Start a resumable upload; send the bytes with PATCH /admin/uploads/{upload_id}."""
+    return await create_session(
+        session_data.filename, session_data.size, session_data.content_type, session_data.sha256
+    )
+
+@router.post("/uploads/direct")
+async def create_direct_upload_session(
+    session_data: UploadSessionCreate,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Start an upload straight to the storage bucket (s3 backend; sha256 required).
+
+    POST the file to upload.url with upload.fields, then call
+    POST /admin/uploads/{upload_id}/complete.
+    """
+    return await create_direct_upload(
+        session_data.filename, session_data.size, session_data.content_type, session_data.sha256
+    )
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_direct_upload_session(
+    upload_id: str,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Verify a direct upload's checksum and store it."""
+    return await complete_direct_upload(upload_id)
+
+@router.get("/uploads/{upload_id}")
+async def get_upload_session(
+    upload_id: str,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Get a resumable upload's offset (where to resume) and, once complete, its result."""
+    return await get_session(upload_id)
+
+@router.patch("/uploads/{upload_id}")
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0, description="Byte offset of this chunk"),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Append the raw request body at Upload-Offset."""
+    return await append_to_session(upload_id, upload_offset, request.stream())
+
+@router.delete("/uploads/{upload_id}")
+async def delete_upload_session(
+    upload_id: str,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Abandon a resumable upload."""
+    if not await abort_session(upload_id):
+        raise HTTPException(status_code=404, detail="Upload session not found")
     
-    return {"file_url": file_url, "filename": unique_filename}
+    return {"message": "Upload cancelled"}
+
+@router.post("/storage/gc")
+async def admin_collect_upload_garbage(
+    dry_run: bool = Query(True, description="Only report what would be deleted"),
+    grace_hours: float = Query(UPLOAD_GC_GRACE_HOURS, ge=0, description="Keep files uploaded more recently than this"),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Delete uploaded files that no content references."""
+    return await collect_garbage(grace_hours=grace_hours, dry_run=dry_run)
 
 # Properties CRUD
 @router.get("/properties")
-async def admin_get_properties(current_user: dict = Depends(get_current_admin_user)):
+async def admin_get_properties(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
     """Get all properties for admin."""
-    properties = await properties_db.get_all(sort=[("created_at", -1)])
+    properties = await paginate(properties_db, response, sort=[("created_at", -1)], limit=limit, cursor=cursor)
     return properties
 
 @router.post("/properties")
@@ -146,6 +229,7 @@ async def admin_create_property(
     property_dict = property_data.dict()
     property_dict["created_at"] = datetime.utcnow()
     property_dict["active"] = True
+    property_dict["nearby_places_source"] = await nearby_places_source(properties_db, property_dict["nearby_places"])
     
     property_id = await properties_db.create(property_dict)
     return {"id": property_id, "message": "Property created successfully"}
@@ -157,7 +241,11 @@ async def admin_update_property(
     current_user: dict = Depends(get_current_admin_user)
 ):
     """Update property."""
-    success = await properties_db.update_by_id(property_id, property_data.dict())
+    property_dict = property_data.dict()
+    property_dict["nearby_places_source"] = await nearby_places_source(
+        properties_db, property_dict["nearby_places"], property_id
+    )
+    success = await properties_db.update_by_id(property_id, property_dict)
     if not success:
         raise HTTPException(status_code=404, detail="Property not found")
     return {"message": "Property updated successfully"}
@@ -175,9 +263,14 @@ async def admin_delete_property(
 
 # Home Banners CRUD
 @router.get("/home-banners")
-async def admin_get_banners(current_user: dict = Depends(get_current_admin_user)):
+async def admin_get_banners(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
     """Get all home banners."""
-    banners = await home_banners_db.get_all(sort=[("display_order", 1)])
+    banners = await paginate(home_banners_db, response, sort=[("display_order", 1)], limit=limit, cursor=cursor)
     return banners
 
 @router.post("/home-banners")
@@ -220,8 +313,13 @@ async def admin_delete_banner(
 # (I'll create simplified versions for the remaining collections)
 
 @router.get("/testimonials")
-async def admin_get_testimonials(current_user: dict = Depends(get_current_admin_user)):
-    return await testimonials_db.get_all(sort=[("created_at", -1)])
+async def admin_get_testimonials(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    return await paginate(testimonials_db, response, sort=[("created_at", -1)], limit=limit, cursor=cursor)
 
 @router.post("/testimonials")
 async def admin_create_testimonial(
@@ -286,16 +384,26 @@ async def admin_update_contact_info(
 
 # Contact Form Submissions
 @router.get("/contact-submissions")
-async def admin_get_contact_submissions(current_user: dict = Depends(get_current_admin_user)):
+async def admin_get_contact_submissions(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
     """Get contact form submissions."""
-    submissions = await contact_submissions_db.get_all(sort=[("created_at", -1)])
+    submissions = await paginate(contact_submissions_db, response, sort=[("created_at", -1)], limit=limit, cursor=cursor)
     return submissions
 
 # Happy Clients CRUD
 @router.get("/happy-clients")
-async def admin_get_happy_clients(current_user: dict = Depends(get_current_admin_user)):
+async def admin_get_happy_clients(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
     """Get all happy clients."""
-    clients = await testimonials_db.get_all(sort=[("created_at", -1)])
+    clients = await paginate(testimonials_db, response, sort=[("created_at", -1)], limit=limit, cursor=cursor)
     return clients
 
 @router.post("/happy-clients")
@@ -335,9 +443,14 @@ async def admin_delete_happy_client(
 
 # News & Events CRUD
 @router.get("/news-events")
-async def admin_get_news_events(current_user: dict = Depends(get_current_admin_user)):
+async def admin_get_news_events(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
     """Get all news and events."""
-    news = await news_events_db.get_all(sort=[("created_at", -1)])
+    news = await paginate(news_events_db, response, sort=[("created_at", -1)], limit=limit, cursor=cursor)
     return news
 
 @router.post("/news-events")
@@ -377,9 +490,14 @@ async def admin_delete_news_event(
 
 # NRI Content CRUD
 @router.get("/nri-content")
-async def admin_get_nri_content(current_user: dict = Depends(get_current_admin_user)):
+async def admin_get_nri_content(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
     """Get all NRI content."""
-    content = await nri_content_db.get_all(sort=[("created_at", -1)])
+    content = await paginate(nri_content_db, response, sort=[("created_at", -1)], limit=limit, cursor=cursor)
     return content
 
 @router.post("/nri-content")
@@ -419,9 +537,14 @@ async def admin_delete_nri_content(
 
 # Amenities CRUD
 @router.get("/amenities")
-async def admin_get_amenities(current_user: dict = Depends(get_current_admin_user)):
+async def admin_get_amenities(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
     """Get all amenities."""
-    amenities = await amenities_db.get_all(sort=[("display_order", 1), ("created_at", -1)])
+    amenities = await paginate(amenities_db, response, sort=[("display_order", 1), ("created_at", -1)], limit=limit, cursor=cursor)
     return amenities
 
 @router.post("/amenities")
@@ -461,9 +584,14 @@ async def admin_delete_amenity(
 
 # Budget Homes CRUD
 @router.get("/budget-homes")
-async def admin_get_budget_homes(current_user: dict = Depends(get_current_admin_user)):
+async def admin_get_budget_homes(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
     """Get all budget homes for admin."""
-    homes = await budget_homes_db.get_all(sort=[("display_order", 1), ("created_at", -1)])
+    homes = await paginate(budget_homes_db, response, sort=[("display_order", 1), ("created_at", -1)], limit=limit, cursor=cursor)
     return homes
 
 @router.post("/budget-homes")
@@ -475,6 +603,7 @@ async def admin_create_budget_home(
     home_dict = home_data.dict()
     home_dict["created_at"] = datetime.utcnow()
     home_dict["active"] = True
+    home_dict["nearby_places_source"] = await nearby_places_source(budget_homes_db, home_dict["nearby_places"])
     
     home_id = await budget_homes_db.create(home_dict)
     return {"id": home_id, "message": "Budget home created successfully"}
@@ -486,7 +615,9 @@ async def admin_update_budget_home(
     current_user: dict = Depends(get_current_admin_user)
 ):
     """Update budget home."""
-    success = await budget_homes_db.update_by_id(home_id, home_data.dict())
+    home_dict = home_data.dict()
+    home_dict["nearby_places_source"] = await nearby_places_source(budget_homes_db, home_dict["nearby_places"], home_id)
+    success = await budget_homes_db.update_by_id(home_id, home_dict)
     if not success:
         raise HTTPException(status_code=404, detail="Budget home not found")
     return {"message": "Budget home updated successfully"}
@@ -504,9 +635,14 @@ async def admin_delete_budget_home(
 
 # Plots CRUD
 @router.get("/plots")
-async def admin_get_plots(current_user: dict = Depends(get_current_admin_user)):
+async def admin_get_plots(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
     """Get all plots for admin."""
-    plots = await plots_db.get_all(sort=[("display_order", 1), ("created_at", -1)])
+    plots = await paginate(plots_db, response, sort=[("display_order", 1), ("created_at", -1)], limit=limit, cursor=cursor)
     return plots
 
 @router.post("/plots")
@@ -518,6 +654,7 @@ async def admin_create_plot(
     plot_dict = plot_data.dict()
     plot_dict["created_at"] = datetime.utcnow()
     plot_dict["active"] = True
+    plot_dict["nearby_places_source"] = await nearby_places_source(plots_db, plot_dict["nearby_places"])
     
     plot_id = await plots_db.create(plot_dict)
     return {"id": plot_id, "message": "Plot created successfully"}
@@ -529,7 +666,9 @@ async def admin_update_plot(
     current_user: dict = Depends(get_current_admin_user)
 ):
     """Update plot."""
-    success = await plots_db.update_by_id(plot_id, plot_data.dict())
+    plot_dict = plot_data.dict()
+    plot_dict["nearby_places_source"] = await nearby_places_source(plots_db, plot_dict["nearby_places"], plot_id)
+    success = await plots_db.update_by_id(plot_id, plot_dict)
     if not success:
         raise HTTPException(status_code=404, detail="Plot not found")
     return {"message": "Plot updated successfully"}
@@ -554,30 +693,86 @@ async def admin_fetch_nearby_places(
 ):
     """Fetch nearby places for a given location."""
     try:
-        nearby = fetch_nearby_places(location, radius_km=5.0)
+        nearby = await fetch_nearby_places(location, radius_km=5.0)
         return {"nearby_places": nearby}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching nearby places: {str(e)}")
 
+# Background Jobs
+@router.get("/jobs")
+async def admin_get_jobs(
+    response: Response,
+    status: Optional[str] = Query(None, description="pending, running, done or failed"),
+    collection: Optional[str] = Query(None, description="Filter by collection"),
+    doc_id: Optional[str] = Query(None, description="Filter by document ID (with collection)"),
+    limit: Optional[int] = Query(50, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Get background jobs, newest first."""
+    if status and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown job status: {status}")
+    
+    filters = {}
+    if status:
+        filters["status"] = status
+    if collection:
+        filters["collection"] = collection
+    if doc_id:
+        filters["doc_id"] = doc_id
+    
+    jobs = await paginate(jobs_db, response, filters=filters, sort=[("created_at", -1)], limit=limit, cursor=cursor)
+    return jobs
+
+@router.get("/jobs/summary")
+async def admin_get_jobs_summary(current_user: dict = Depends(get_current_admin_user)):
+    """Get job counts per status."""
+    return await job_queue.status_counts()
+
+@router.post("/jobs/enrich")
+async def admin_enqueue_enrichment(
+    collection: str,
+    doc_id: str,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Queue a geocode + nearby-places refresh for one listing."""
+    if collection not in [service.collection_name for service in GEO_SOURCES.values()]:
+        raise HTTPException(status_code=400, detail=f"Enrichment is not available for {collection}")
+    
+    if not await DatabaseService.registry[collection].get_by_id(doc_id, projection={"_id": 1}):
+        raise HTTPException(status_code=404, detail="Listing not found")
+    
+    await job_queue.enqueue(ENRICH_JOB, collection, doc_id)
+    return {"message": "Enrichment queued"}
+
+@router.post("/jobs/{job_id}/retry")
+async def admin_retry_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Retry a failed job."""
+    if not await job_queue.retry(job_id):
+        raise HTTPException(status_code=404, detail="Failed job not found")
+    
+    return {"message": "Job queued for retry"}
+
 
 # ========================
 # Blog/Insights Management
 # ========================
 
 @router.get("/blogs")
-async def get_all_blogs_admin(current_user: dict = Depends(get_current_admin_user)):
+async def get_all_blogs_admin(
+    response: Response,
+    limit: Optional[int] = Query(None, description="Page size (omit for the full list)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    current_user: dict = Depends(get_current_admin_user)
+):
     """Get all blog posts for admin (including inactive)."""
-    blogs = await blogs_db.get_all(sort=[("publish_date", -1)])
+    blogs = await paginate(blogs_db, response, sort=[("publish_date", -1)], limit=limit, cursor=cursor)
     return blogs
 
-@router.post("/blogs")
-async def create_blog(
-    blog_data: BlogCreate,
-    current_user: dict = Depends(get_current_admin_user)
-):
-    """Create a new blog post."""
-    blog_dict = blog_data.dict()
-    
+def _new_blog(blog_dict: dict) -> dict:
     # Auto-generate slug from title if not provided
     if not blog_dict.get('slug'):
         blog_dict['slug'] = blog_dict['title'].lower().replace(' ', '-').replace('/', '-')
@@ -588,8 +783,15 @@ async def create_blog(
     
     if not blog_dict.get('meta_description'):
         blog_dict['meta_description'] = blog_dict['excerpt'][:160]
-    
-    blog_id = await blogs_db.create(blog_dict)
+    return blog_dict
+
+@router.post("/blogs")
+async def create_blog(
+    blog_data: BlogCreate,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Create a new blog post."""
+    blog_id = await blogs_db.create(_new_blog(blog_data.dict()))
     return {"_id": blog_id, "message": "Blog created successfully"}
 
 @router.get("/blogs/{blog_id}")
@@ -635,3 +837,112 @@ async def delete_blog(
         raise HTTPException(status_code=404, detail="Blog not found")
     return {"message": "Blog deleted successfully"}
 
+
+# ========================
+# Bulk operations
+# ========================
+# One call per batch instead of one per document; each route answers with a
+# result per item, in request order, and a bad item does not stop the rest.
+
+def _new_document(document: dict) -> dict:
+    document["created_at"] = datetime.utcnow()
+    document["active"] = True
+    return document
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+def _validate_fields(model: Type[BaseModel], fields: dict) -> dict:
+    """Validate a partial update field by field against the create model."""
+    validated = {}
+    for name, value in fields.items():
+        if name == "active":
+            if not isinstance(value, bool):
+                raise ValueError("active: Input should be a valid boolean")
+            validated[name] = value
+        elif name in model.model_fields:
+            instance = model.model_construct()
+            model.__pydantic_validator__.validate_assignment(instance, name, value)
+            validated[name] = getattr(instance, name)
+        else:
+            raise ValueError(f"{name}: Unknown field")
+    return validated
+
+def _bulk_response(results: List[dict]) -> dict:
+    failed = sum(1 for result in results if not result["ok"])
+    return {"results": results, "succeeded": len(results) - failed, "failed": failed}
+
+def _merge_results(size: int, rejected: dict, positions: List[int], written: List[dict]) -> List[dict]:
+    """Combine items rejected before the write with the write's results."""
+    results = [None] * size
+    for index, result in rejected.items():
+        results[index] = result
+    for index, result in zip(positions, written):
+        results[index] = result
+    return [{"index": index, **result} for index, result in enumerate(results)]
+
+def add_bulk_routes(
+    path: str,
+    service: DatabaseService,
+    model: Type[BaseModel],
+    prepare: Callable[[dict], dict] = _new_document,
+    reorderable: bool = True
+):
+    """Register POST/PATCH /{path}/bulk, POST /{path}/bulk/delete and PUT /{path}/bulk/order."""
+
+    async def bulk_create(data: BulkCreate, current_user: dict = Depends(get_current_admin_user)):
+        rejected, positions, documents = {}, [], []
+        for index, item in enumerate(data.items):
+            try:
+                document = prepare(model.model_validate(item).dict())
+            except ValidationError as e:
+                rejected[index] = {"id": None, "ok": False, "error": _validation_message(e)}
+                continue
+            if "nearby_places" in document:
+                document["nearby_places_source"] = await nearby_places_source(service, document["nearby_places"])
+            documents.append(document)
+            positions.append(index)
+        written = await service.create_many(documents)
+        return _bulk_response(_merge_results(len(data.items), rejected, positions, written))
+
+    async def bulk_update(data: BulkUpdate, current_user: dict = Depends(get_current_admin_user)):
+        rejected, positions, updates = {}, [], []
+        for index, item in enumerate(data.items):
+            try:
+                fields = _validate_fields(model, item.fields)
+            except ValidationError as e:
+                rejected[index] = {"id": item.id, "ok": False, "error": _validation_message(e)}
+                continue
+            except ValueError as e:
+                rejected[index] = {"id": item.id, "ok": False, "error": str(e)}
+                continue
+            if "nearby_places" in fields:
+                fields["nearby_places_source"] = await nearby_places_source(service, fields["nearby_places"], item.id)
+            updates.append((item.id, fields))
+            positions.append(index)
+        written = await service.update_many_by_id(updates) if updates else []
+        return _bulk_response(_merge_results(len(data.items), rejected, positions, written))
+
+    async def bulk_delete(data: BulkIds, current_user: dict = Depends(get_current_admin_user)):
+        results = await service.delete_many_by_id(data.ids)
+        return _bulk_response([{"index": index, **result} for index, result in enumerate(results)])
+
+    async def bulk_order(data: BulkIds, current_user: dict = Depends(get_current_admin_user)):
+        """Set display_order to each id's position in the list (starting at 1)."""
+        results = await service.reorder(data.ids)
+        return _bulk_response([{"index": index, **result} for index, result in enumerate(results)])
+
+    name = path.replace("-", "_")
+    router.add_api_route(f"/{path}/bulk", bulk_create, methods=["POST"], name=f"admin_bulk_create_{name}")
+    router.add_api_route(f"/{path}/bulk", bulk_update, methods=["PATCH"], name=f"admin_bulk_update_{name}")
+    router.add_api_route(f"/{path}/bulk/delete", bulk_delete, methods=["POST"], name=f"admin_bulk_delete_{name}")
+    if reorderable:
+        router.add_api_route(f"/{path}/bulk/order", bulk_order, methods=["PUT"], name=f"admin_reorder_{name}")
+
+# Properties are listed newest first, so they have no order to set.
+add_bulk_routes("properties", properties_db, PropertyCreate, reorderable=False)
+add_bulk_routes("budget-homes", budget_homes_db, BudgetHomeCreate)
+add_bulk_routes("plots", plots_db, PlotCreate)
+add_bulk_routes("amenities", amenities_db, AmenityCreate)
+add_bulk_routes("home-banners", home_banners_db, HomeBannerCreate)
+add_bulk_routes("blogs", blogs_db, BlogCreate, prepare=_new_blog)
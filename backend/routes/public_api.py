@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from typing import List, Optional
 from services.database import (
     properties_db, home_banners_db, about_sections_db, team_members_db,
@@ -7,18 +9,128 @@ from services.database import (
     budget_homes_db, plots_db, blogs_db
 )
 from models.cms_models import Property, ContactSubmissionCreate, ContactSubmission
+from services.view_counter import blog_views
+from services.search import SEARCH_SOURCES, search_site
+from services.autocomplete import autocomplete_index
+from services.geo_listings import GEO_SOURCES, nearby_listings
+from utils.nearby_places import geocode
+from utils.pagination import paginate
 from datetime import datetime
+import asyncio
+import hashlib
+import json
 
 router = APIRouter()
 
+# Fields dropped by ?view=summary on listing endpoints: the bulky arrays and
+# bodies that only detail pages render.
+SUMMARY_PROJECTIONS = {
+    "properties": {"nearby_places": 0, "amenities": 0},
+    "budget_homes": {"gallery_images": 0, "nearby_places": 0},
+    "plots": {"gallery_images": 0, "nearby_places": 0},
+    "blogs": {"content": 0, "meta_title": 0, "meta_description": 0, "meta_keywords": 0},
+    "news_events": {"content": 0},
+}
+
+def apply_range_filters(
+    filters: dict,
+    min_price: Optional[int],
+    max_price: Optional[int],
+    min_area: Optional[int],
+    max_area: Optional[int]
+) -> dict:
+    """Add overlap conditions on the derived numeric price/area ranges.
+
+    A listing matches when its range overlaps the requested one, so
+    "under 80 lakh" (max_price) matches anything whose lowest price fits.
+    """
+    if min_price is not None:
+        filters["price_max"] = {"$gte": min_price}
+    if max_price is not None:
+        filters["price_min"] = {"$lte": max_price}
+    if min_area is not None:
+        filters["area_sqft_max"] = {"$gte": min_area}
+    if max_area is not None:
+        filters["area_sqft_min"] = {"$lte": max_area}
+    return filters
+
+def summary_projection(collection: str, view: Optional[str]) -> Optional[dict]:
+    """Get the projection for a listing view (None means whole documents)."""
+    return SUMMARY_PROJECTIONS[collection] if view == "summary" else None
+
+@router.get("/bootstrap")
+async def get_bootstrap(request: Request):
+    """Get everything the homepage renders on first paint in one response.
+
+    property_sizes holds the plot size and built-up area of every active
+    property, from which the search form builds its range options.
+    """
+    (
+        banners, featured_properties, property_sizes, testimonials, amenities, upcoming_projects, contact_info
+    ) = await asyncio.gather(
+        home_banners_db.get_all(
+            filters={"active": True},
+            sort=[("display_order", 1), ("created_at", -1)]
+        ),
+        properties_db.get_all(
+            filters={"active": True, "featured": True},
+            sort=[("featured", -1), ("created_at", -1)],
+            limit=6
+        ),
+        properties_db.get_all(
+            filters={"active": True},
+            projection={"plot_size": 1, "built_up_area": 1}
+        ),
+        testimonials_db.get_all(
+            filters={"active": True, "featured": True},
+            sort=[("featured", -1), ("display_order", 1)]
+        ),
+        amenities_db.get_all(
+            filters={"active": True},
+            sort=[("display_order", 1)]
+        ),
+        upcoming_projects_db.get_all(
+            filters={"active": True},
+            sort=[("launch_date", 1)]
+        ),
+        contact_info_db.get_one({}),
+    )
+
+    payload = jsonable_encoder({
+        "home_banners": banners,
+        "featured_properties": featured_properties,
+        "property_sizes": property_sizes,
+        "testimonials": testimonials,
+        "amenities": amenities,
+        "upcoming_projects": upcoming_projects,
+        "contact_info": contact_info,
+    })
+
+    # One ETag over the combined payload, so a revisit costs a 304.
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(content=payload, headers=headers)
+
 @router.get("/properties")
 async def get_properties(
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status"),
     facing: Optional[str] = Query(None, description="Filter by facing"),
     location: Optional[str] = Query(None, description="Filter by location"),
     featured: Optional[bool] = Query(None, description="Filter featured properties"),
+    min_price: Optional[int] = Query(None, ge=0, description="Minimum price in rupees"),
+    max_price: Optional[int] = Query(None, ge=0, description="Maximum price in rupees"),
+    min_area: Optional[int] = Query(None, ge=0, description="Minimum area in sq.ft"),
+    max_area: Optional[int] = Query(None, ge=0, description="Maximum area in sq.ft"),
     limit: Optional[int] = Query(None, description="Limit results"),
-    skip: int = Query(0, description="Skip results")
+    skip: int = Query(0, description="Skip results"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    view: Optional[str] = Query(None, pattern="^summary$", description="'summary' returns card fields only")
 ):
     """Get all properties with optional filtering."""
     filters = {"active": True}
@@ -32,14 +144,206 @@ async def get_properties(
     if featured is not None:
         filters["featured"] = featured
     
-    properties = await properties_db.get_all(
+    apply_range_filters(filters, min_price, max_price, min_area, max_area)
+    
+    properties = await paginate(
+        properties_db,
+        response,
         filters=filters,
         sort=[("featured", -1), ("created_at", -1)],
         limit=limit,
-        skip=skip
+        skip=skip,
+        cursor=cursor,
+        projection=summary_projection("properties", view)
     )
     return properties
 
+# ========================
+# Faceted Listing Search
+# ========================
+
+# Listing type -> (service, facet fields, sort) for /listings/search.
+LISTING_SEARCH = {
+    "properties": (
+        properties_db,
+        ["location", "status", "facing"],
+        [("featured", -1), ("created_at", -1)]
+    ),
+    "budget-homes": (
+        budget_homes_db,
+        ["location", "price_range", "property_type", "facing", "built_up_area", "status"],
+        [("display_order", 1), ("created_at", -1)]
+    ),
+    "plots": (
+        plots_db,
+        ["location", "plot_area", "price_range", "property_type", "status"],
+        [("display_order", 1), ("created_at", -1)]
+    ),
+}
+
+@router.get("/listings/search")
+async def search_listings(
+    listing_type: str = Query(..., alias="type", description="properties, budget-homes or plots"),
+    location: Optional[List[str]] = Query(None, description="Filter by location (repeatable)"),
+    status: Optional[List[str]] = Query(None, description="Filter by status (repeatable)"),
+    facing: Optional[List[str]] = Query(None, description="Filter by facing (repeatable)"),
+    property_type: Optional[List[str]] = Query(None, description="Filter by property type (repeatable)"),
+    price_range: Optional[List[str]] = Query(None, description="Filter by price range (repeatable)"),
+    built_up_area: Optional[List[str]] = Query(None, description="Filter by built-up area (repeatable)"),
+    plot_area: Optional[List[str]] = Query(None, description="Filter by plot area (repeatable)"),
+    limit: int = Query(20, ge=1, le=100, description="Limit results"),
+    skip: int = Query(0, ge=0, description="Skip results"),
+    view: Optional[str] = Query(None, pattern="^summary$", description="'summary' returns card fields only")
+):
+    """Get a page of listings plus per-facet value counts in one query."""
+    if listing_type not in LISTING_SEARCH:
+        raise HTTPException(status_code=400, detail=f"Unknown listing type: {listing_type}")
+    
+    service, facet_fields, sort = LISTING_SEARCH[listing_type]
+    projection = summary_projection(service.collection_name, view)
+    requested = {
+        "location": location,
+        "status": status,
+        "facing": facing,
+        "property_type": property_type,
+        "price_range": price_range,
+        "built_up_area": built_up_area,
+        "plot_area": plot_area,
+    }
+    unsupported = [field for field, values in requested.items() if values and field not in facet_fields]
+    if unsupported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported filters for {listing_type}: {', '.join(unsupported)}"
+        )
+    
+    return await service.faceted_search(
+        filters={"active": True},
+        selected={field: values for field, values in requested.items() if values},
+        facet_fields=facet_fields,
+        sort=sort,
+        limit=limit,
+        skip=skip,
+        projection=projection
+    )
+
+# ========================
+# Site-wide Search
+# ========================
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=2, description="Search text"),
+    result_type: Optional[List[str]] = Query(None, alias="type", description="property, budget_home, plot, blog or news (repeatable)"),
+    limit: int = Query(10, ge=1, le=50, description="Limit results")
+):
+    """Search listings, blogs and news by relevance, with highlighted snippets.
+
+    Matches whole words; /autocomplete handles partly typed ones.
+    """
+    unknown = [name for name in (result_type or []) if name not in SEARCH_SOURCES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(unknown)}")
+    
+    results = await search_site(q, types=result_type, limit=limit)
+    return {"query": q, "results": results}
+
+@router.get("/autocomplete")
+async def autocomplete(
+    q: str = Query(..., min_length=1, description="What the visitor has typed so far"),
+    kind: Optional[str] = Query(None, pattern="^(location|project)$", description="location or project"),
+    limit: int = Query(8, ge=1, le=20, description="Limit suggestions")
+):
+    """Suggest locations and project names starting with the typed prefix."""
+    return {"query": q, "suggestions": autocomplete_index.suggest(q, limit=limit, kind=kind)}
+
+@router.get("/nearby-listings")
+async def get_nearby_listings(
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitude of the centre"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Longitude of the centre"),
+    location: Optional[str] = Query(None, min_length=2, description="Place to search around, instead of lat/lon"),
+    radius_km: float = Query(5.0, gt=0, le=50, description="Search radius in km"),
+    listing_type: Optional[List[str]] = Query(None, alias="type", description="property, budget_home or plot (repeatable)"),
+    limit: int = Query(20, ge=1, le=100, description="Limit results"),
+    view: Optional[str] = Query(None, pattern="^summary$", description="Use 'summary' for listing cards")
+):
+    """Get active properties, budget homes and plots near a point, nearest first."""
+    unknown = [name for name in (listing_type or []) if name not in GEO_SOURCES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown listing types: {', '.join(unknown)}")
+    
+    if lat is None or lon is None:
+        if not location:
+            raise HTTPException(status_code=400, detail="Provide lat and lon, or a location")
+        try:
+            coordinates = await geocode(location)
+        except Exception:
+            raise HTTPException(status_code=503, detail="Geocoding is unavailable, try lat and lon")
+        if not coordinates:
+            raise HTTPException(status_code=404, detail="Location not found")
+        lat, lon = coordinates
+    
+    projections = {
+        name: summary_projection(service.collection_name, view)
+        for name, service in GEO_SOURCES.items()
+    }
+    results = await nearby_listings(
+        lat, lon, radius_km, types=listing_type, limit=limit, projections=projections
+    )
+    return {"center": {"lat": lat, "lon": lon}, "radius_km": radius_km, "results": results}
+
+# ========================
+# Dynamic Filter APIs
+# ========================
+# Registered before the /{id} routes so "filters" is not taken for an ID.
+
+@router.get("/properties/filters")
+async def get_properties_filters():
+    """Get unique filter values for properties."""
+    values = await properties_db.get_facet_values(
+        ["location", "status", "facing"],
+        filters={"active": True}
+    )
+    
+    return {
+        "locations": values["location"],
+        "statuses": values["status"],
+        "facings": values["facing"]
+    }
+
+@router.get("/budget-homes/filters")
+async def get_budget_homes_filters():
+    """Get unique filter values for budget homes."""
+    values = await budget_homes_db.get_facet_values(
+        ["location", "price_range", "property_type", "facing", "built_up_area", "status"],
+        filters={"active": True}
+    )
+    
+    return {
+        "locations": values["location"],
+        "price_ranges": values["price_range"],
+        "property_types": values["property_type"],
+        "facings": values["facing"],
+        "built_up_areas": values["built_up_area"],
+        "statuses": values["status"]
+    }
+
+@router.get("/plots/filters")
+async def get_plots_filters():
+    """Get unique filter values for plots."""
+    values = await plots_db.get_facet_values(
+        ["location", "plot_area", "price_range", "property_type", "status"],
+        filters={"active": True}
+    )
+    
+    return {
+        "locations": values["location"],
+        "plot_areas": values["plot_area"],
+        "price_ranges": values["price_range"],
+        "property_types": values["property_type"],
+        "statuses": values["status"]
+    }
+
 @router.get("/properties/{property_id}")
 async def get_property(property_id: str):
     """Get single property by ID."""
@@ -108,10 +412,13 @@ async def get_testimonials(featured: Optional[bool] = Query(None)):
 
 @router.get("/news-events")
 async def get_news_events(
+    response: Response,
     category: Optional[str] = Query(None),
     featured: Optional[bool] = Query(None),
     limit: Optional[int] = Query(10),
-    skip: int = Query(0)
+    skip: int = Query(0),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    view: Optional[str] = Query(None, pattern="^summary$", description="'summary' returns card fields only")
 ):
     """Get news and events."""
     filters = {"active": True}
@@ -120,11 +427,15 @@ async def get_news_events(
     if featured is not None:
         filters["featured"] = featured
     
-    news = await news_events_db.get_all(
+    news = await paginate(
+        news_events_db,
+        response,
         filters=filters,
         sort=[("featured", -1), ("publish_date", -1)],
         limit=limit,
-        skip=skip
+        skip=skip,
+        cursor=cursor,
+        projection=summary_projection("news_events", view)
     )
     return news
 
@@ -165,13 +476,20 @@ async def submit_contact_form(submission: ContactSubmissionCreate):
 
 @router.get("/budget-homes")
 async def get_budget_homes(
+    response: Response,
     location: Optional[str] = Query(None, description="Filter by location"),
     price_range: Optional[str] = Query(None, description="Filter by price range"),
     property_type: Optional[str] = Query(None, description="Filter by property type"),
     facing: Optional[str] = Query(None, description="Filter by facing"),
     status: Optional[str] = Query(None, description="Filter by status"),
+    min_price: Optional[int] = Query(None, ge=0, description="Minimum price in rupees"),
+    max_price: Optional[int] = Query(None, ge=0, description="Maximum price in rupees"),
+    min_area: Optional[int] = Query(None, ge=0, description="Minimum area in sq.ft"),
+    max_area: Optional[int] = Query(None, ge=0, description="Maximum area in sq.ft"),
     limit: Optional[int] = Query(None, description="Limit results"),
-    skip: int = Query(0, description="Skip results")
+    skip: int = Query(0, description="Skip results"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    view: Optional[str] = Query(None, pattern="^summary$", description="'summary' returns card fields only")
 ):
     """Get all budget homes with optional filtering."""
     filters = {"active": True}
@@ -187,11 +505,17 @@ async def get_budget_homes(
     if status:
         filters["status"] = status
     
-    homes = await budget_homes_db.get_all(
+    apply_range_filters(filters, min_price, max_price, min_area, max_area)
+    
+    homes = await paginate(
+        budget_homes_db,
+        response,
         filters=filters,
         sort=[("display_order", 1), ("created_at", -1)],
         limit=limit,
-        skip=skip
+        skip=skip,
+        cursor=cursor,
+        projection=summary_projection("budget_homes", view)
     )
     return homes
 
@@ -205,13 +529,20 @@ async def get_budget_home(home_id: str):
 
 @router.get("/plots")
 async def get_plots(
+    response: Response,
     location: Optional[str] = Query(None, description="Filter by location"),
     plot_area: Optional[str] = Query(None, description="Filter by plot area"),
     price_range: Optional[str] = Query(None, description="Filter by price range"),
     property_type: Optional[str] = Query(None, description="Filter by property type"),
     status: Optional[str] = Query(None, description="Filter by status"),
+    min_price: Optional[int] = Query(None, ge=0, description="Minimum price in rupees"),
+    max_price: Optional[int] = Query(None, ge=0, description="Maximum price in rupees"),
+    min_area: Optional[int] = Query(None, ge=0, description="Minimum area in sq.ft"),
+    max_area: Optional[int] = Query(None, ge=0, description="Maximum area in sq.ft"),
     limit: Optional[int] = Query(None, description="Limit results"),
-    skip: int = Query(0, description="Skip results")
+    skip: int = Query(0, description="Skip results"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    view: Optional[str] = Query(None, pattern="^summary$", description="'summary' returns card fields only")
 ):
     """Get all plots with optional filtering."""
     filters = {"active": True}
@@ -227,11 +558,17 @@ async def get_plots(
     if status:
         filters["status"] = status
     
-    plots = await plots_db.get_all(
+    apply_range_filters(filters, min_price, max_price, min_area, max_area)
+    
+    plots = await paginate(
+        plots_db,
+        response,
         filters=filters,
         sort=[("display_order", 1), ("created_at", -1)],
         limit=limit,
-        skip=skip
+        skip=skip,
+        cursor=cursor,
+        projection=summary_projection("plots", view)
     )
     return plots
 
@@ -250,10 +587,13 @@ async def get_plot(plot_id: str):
 
 @router.get("/blogs")
 async def get_blogs(
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by category"),
     featured: Optional[bool] = Query(None, description="Filter featured blogs"),
     limit: Optional[int] = Query(20, description="Limit results"),
-    skip: Optional[int] = Query(0, description="Skip results")
+    skip: Optional[int] = Query(0, description="Skip results"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    view: Optional[str] = Query(None, pattern="^summary$", description="'summary' returns card fields only")
 ):
     """Get all active blog posts with optional filters."""
     filters = {"active": True}
@@ -264,11 +604,15 @@ async def get_blogs(
     if featured is not None:
         filters["featured"] = featured
     
-    blogs = await blogs_db.get_all(
+    blogs = await paginate(
+        blogs_db,
+        response,
         filters=filters,
         sort=[("publish_date", -1)],
         limit=limit,
-        skip=skip
+        skip=skip,
+        cursor=cursor,
+        projection=summary_projection("blogs", view)
     )
     return blogs
 
@@ -279,8 +623,9 @@ async def get_blog_by_slug(slug: str):
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
     
-    # Increment view count
-    await blogs_db.update_by_id(blog["_id"], {"views": blog.get("views", 0) + 1})
+    # Count the view; buffered and flushed in bulk by the view counter
+    blog_views.record(blog["_id"])
+    blog["views"] = blog.get("views", 0) + blog_views.pending(blog["_id"])
     
     return blog
 
@@ -291,8 +636,9 @@ async def get_blog_by_id(blog_id: str):
     if not blog or not blog.get("active", True):
         raise HTTPException(status_code=404, detail="Blog not found")
     
-    # Increment view count
-    await blogs_db.update_by_id(blog_id, {"views": blog.get("views", 0) + 1})
+    # Count the view; buffered and flushed in bulk by the view counter
+    blog_views.record(blog["_id"])
+    blog["views"] = blog.get("views", 0) + blog_views.pending(blog["_id"])
     
     return blog
 
@@ -310,63 +656,3 @@ async def get_blog_categories():
     }
 
     return {"message": "Contact form submitted successfully", "id": submission_id}
-
-
-# ========================
-# Dynamic Filter APIs
-# ========================
-
-@router.get("/properties/filters")
-async def get_properties_filters():
-    """Get unique filter values for properties."""
-    all_properties = await properties_db.get_all(filters={"active": True})
-    
-    locations = sorted(list(set(prop.get("location", "") for prop in all_properties if prop.get("location"))))
-    statuses = sorted(list(set(prop.get("status", "") for prop in all_properties if prop.get("status"))))
-    facings = sorted(list(set(prop.get("facing", "") for prop in all_properties if prop.get("facing"))))
-    
-    return {
-        "locations": locations,
-        "statuses": statuses,
-        "facings": facings
-    }
-
-@router.get("/budget-homes/filters")
-async def get_budget_homes_filters():
-    """Get unique filter values for budget homes."""
-    all_homes = await budget_homes_db.get_all(filters={"active": True})
-    
-    locations = sorted(list(set(home.get("location", "") for home in all_homes if home.get("location"))))
-    price_ranges = sorted(list(set(home.get("price_range", "") for home in all_homes if home.get("price_range"))))
-    property_types = sorted(list(set(home.get("property_type", "") for home in all_homes if home.get("property_type"))))
-    facings = sorted(list(set(home.get("facing", "") for home in all_homes if home.get("facing"))))
-    built_up_areas = sorted(list(set(home.get("built_up_area", "") for home in all_homes if home.get("built_up_area"))))
-    statuses = sorted(list(set(home.get("status", "") for home in all_homes if home.get("status"))))
-    
-    return {
-        "locations": locations,
-        "price_ranges": price_ranges,
-        "property_types": property_types,
-        "facings": facings,
-        "built_up_areas": built_up_areas,
-        "statuses": statuses
-    }
-
-@router.get("/plots/filters")
-async def get_plots_filters():
-    """Get unique filter values for plots."""
-    all_plots = await plots_db.get_all(filters={"active": True})
-    
-    locations = sorted(list(set(plot.get("location", "") for plot in all_plots if plot.get("location"))))
-    plot_areas = sorted(list(set(plot.get("plot_area", "") for plot in all_plots if plot.get("plot_area"))))
-    price_ranges = sorted(list(set(plot.get("price_range", "") for plot in all_plots if plot.get("price_range"))))
-    property_types = sorted(list(set(plot.get("property_type", "") for plot in all_plots if plot.get("property_type"))))
-    statuses = sorted(list(set(plot.get("status", "") for plot in all_plots if plot.get("status"))))
-    
-    return {
-        "locations": locations,
-        "plot_areas": plot_areas,
-        "price_ranges": price_ranges,
-        "property_types": property_types,
-        "statuses": statuses
-    }
@@ -1,5 +1,4 @@
 from fastapi import FastAPI, APIRouter
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -8,9 +7,15 @@ import logging
 from pathlib import Path
 from routes.public_api import router as public_router
 from routes.admin_api import router as admin_router
-from services.database import admin_users_db
-from services.auth import hash_password
-from datetime import datetime
+from services.bootstrap import run_bootstrap
+from services.view_counter import blog_views
+from services.autocomplete import start_autocomplete, stop_autocomplete
+from utils.nearby_places import load_poi_dataset
+from services.geo_listings import start_listing_enrichment, stop_listing_enrichment
+from services.images import shutdown_image_pool
+from services.upload_server import UploadServer
+from services.storage import LocalStorage, storage
+from services.uploads import reject_oversized_uploads, remove_orphaned_partials
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -18,10 +23,12 @@ load_dotenv(ROOT_DIR / '.env')
 # Create the main app
 app = FastAPI(title="KMK Homes CMS API", version="1.0.0")
 
-# Create uploads directory and serve static files
-uploads_dir = Path("/app/backend/uploads")
-uploads_dir.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
+# Create uploads directory and serve static files; with object storage
+# the files are served from the bucket instead.
+if isinstance(storage, LocalStorage):
+    uploads_dir = Path(storage.directory)
+    uploads_dir.mkdir(exist_ok=True)
+    app.mount("/uploads", UploadServer(str(uploads_dir)), name="uploads")
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -38,12 +45,16 @@ api_router.include_router(admin_router, tags=["admin"])
 # Include the router in the main app
 app.include_router(api_router)
 
+# Oversized uploads are refused from their Content-Length, before the body is read
+app.middleware("http")(reject_oversized_uploads)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -55,37 +66,21 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_event():
-    """Create default admin user if not exists."""
+    """Run pending one-time tasks (indexes, backfills, first admin user) and start background tasks."""
     try:
-        # Check if admin user exists
-        existing_admin = await admin_users_db.get_one({"username": "admin"})
-        
-        if not existing_admin:
-            # Create default admin user
-            admin_data = {
-                "username": "admin",
-                "email": "admin@kmkhomes.com",
-                "password_hash": hash_password("Manojntr12@"),
-                "role": "admin",
-                "active": True,
-                "created_at": datetime.utcnow()
-            }
-            
-            await admin_users_db.create(admin_data)
-            logger.info("Default admin user created: username=admin, password=Manojntr12@")
-        else:
-            # Update existing admin password
-            updated_password = hash_password("Manojntr12@")
-            await admin_users_db.update_by_id(
-                existing_admin["_id"],
-                {"password_hash": updated_password}
-            )
-            logger.info("Admin user password updated")
-            
+        await run_bootstrap()
     except Exception as e:
-        logger.error(f"Error creating/updating default admin user: {e}")
+        logger.error(f"Error running startup bootstrap: {e}")
+    blog_views.start()
+    await start_autocomplete()
+    await load_poi_dataset()
+    start_listing_enrichment()
+    await remove_orphaned_partials()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Cleanup on shutdown."""
-    pass
+    await blog_views.stop()
+    await stop_autocomplete()
+    await stop_listing_enrichment()
+    shutdown_image_pool()
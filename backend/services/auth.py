@@ -1,17 +1,39 @@
 import jwt
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from services.cache import TTLCache
+from services.database import admin_users_db
+import asyncio
+import hashlib
 import os
+import time
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "kmk-homes-secret-key-2024")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 480  # 8 hours
 
+# How long a verified token is trusted without re-checking revocation; bounds
+# how long a revoked token keeps working on other worker processes.
+TOKEN_CACHE_SECONDS = float(os.environ.get('TOKEN_CACHE_SECONDS', '10'))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', '256'))
+
+# bcrypt releases the GIL, so hashes run in parallel on these threads while
+# the event loop keeps serving other requests.
+BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Hash operations allowed to wait for a worker; beyond that, logins get 503
+# instead of queueing without bound during a burst.
+BCRYPT_MAX_WAITING = int(os.environ.get('BCRYPT_MAX_WAITING', '64'))
+
 security = HTTPBearer()
 
+# token hash -> verified user, and verifications in flight
+_token_cache = TTLCache(ttl=TOKEN_CACHE_SECONDS, max_entries=TOKEN_CACHE_MAX_ENTRIES)
+_verifying: Dict[str, asyncio.Future] = {}
+
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
     salt = bcrypt.gensalt()
@@ -22,6 +44,36 @@ def verify_password(password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+_bcrypt_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_bcrypt_slots = asyncio.Semaphore(BCRYPT_WORKERS)
+_bcrypt_waiting = 0
+
+async def _run_bcrypt(function, *args):
+    global _bcrypt_waiting
+    if _bcrypt_waiting >= BCRYPT_MAX_WAITING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    _bcrypt_waiting += 1
+    try:
+        await _bcrypt_slots.acquire()
+    finally:
+        _bcrypt_waiting -= 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_bcrypt_pool, function, *args)
+    finally:
+        _bcrypt_slots.release()
+
+async def hash_password_async(password: str) -> str:
+    """hash_password() on the bcrypt thread pool."""
+    return await _run_bcrypt(hash_password, password)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """verify_password() on the bcrypt thread pool."""
+    return await _run_bcrypt(verify_password, password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -34,41 +86,73 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
 def decode_access_token(token: str):
     """Decode and validate a JWT access token."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return payload
     except jwt.PyJWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized()
+    if payload.get("sub") is None:
+        raise _unauthorized()
+    return payload
+
+def _token_key(token: str) -> str:
+    # Keyed by hash so the cache never holds usable tokens.
+    return hashlib.sha256(token.encode()).hexdigest()
+
+async def _verify_token(token: str) -> dict:
+    """Decode a token and check it against the admin user's token_version."""
+    payload = decode_access_token(token)
+    username = payload.get("sub")
+    if payload.get("role") != "admin":
+        raise _unauthorized()
+
+    admin = await admin_users_db.get_one(
+        {"username": username}, projection={"role": 1, "active": 1, "token_version": 1}
+    )
+    # Tokens issued before token versions existed carry no "tv" and count as 0.
+    if (not admin or admin.get("role") != "admin" or not admin.get("active", True)
+            or payload.get("tv", 0) != admin.get("token_version", 0)):
+        raise _unauthorized()
+
+    user = {"username": username, "role": payload["role"]}
+    ttl = min(TOKEN_CACHE_SECONDS, payload["exp"] - time.time())
+    if ttl > 0:
+        _token_cache.set(_token_key(token), user, ttl=ttl)
+    return user
 
 async def get_current_admin_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Get current authenticated admin user."""
-    try:
-        payload = decode_access_token(credentials.credentials)
-        username: str = payload.get("sub")
-        role: str = payload.get("role")
-        
-        if username is None or role != "admin":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials"
-            )
-        
-        return {"username": username, "role": role}
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials"
-        )
\ No newline at end of file
+    """Get current authenticated admin user.
+
+    Verified tokens are cached for TOKEN_CACHE_SECONDS (never past their
+    exp), and concurrent requests with the same uncached token share one
+    verification.
+    """
+    token = credentials.credentials
+    key = _token_key(token)
+    user = _token_cache.get(key)
+    if user is not None:
+        return dict(user)
+
+    pending = _verifying.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(_verify_token(token))
+        _verifying[key] = pending
+        pending.add_done_callback(lambda _: _verifying.pop(key, None))
+    # Only a bad token is a 401; a database outage surfaces as a 500
+    # instead of logging the admin out.
+    return dict(await asyncio.shield(pending))
+
+async def revoke_tokens(username: str):
+    """Invalidate every token issued to a user (logout, password change)."""
+    await admin_users_db.collection.update_one({"username": username}, {"$inc": {"token_version": 1}})
+    admin_users_db.invalidate()
+    # Other workers stop accepting the tokens once their cache entries expire.
+    _token_cache.clear()
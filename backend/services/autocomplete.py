@@ -0,0 +1,174 @@
+from bisect import bisect_left, insort
+from heapq import nsmallest
+from typing import Dict, List, Optional, Tuple
+from services.database import DatabaseService, properties_db, budget_homes_db, plots_db
+import asyncio
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.environ.get('AUTOCOMPLETE_REFRESH_SECONDS', '300'))
+
+# Service -> {document field: suggestion kind}
+AUTOCOMPLETE_SOURCES: Dict[DatabaseService, Dict[str, str]] = {
+    properties_db: {"location": "location", "villa_number": "project"},
+    budget_homes_db: {"location": "location", "property_name": "project"},
+    plots_db: {"location": "location", "plot_name": "project"},
+}
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+class AutocompleteIndex:
+    """In-memory prefix index over location and project names.
+
+    Every suggestion is stored once per word it contains (the text from that
+    word onwards), in one sorted list, so "sainik" finds "Old Sainikpuri"
+    with a binary search. Suggestions are reference-counted per document,
+    which lets a single document be re-indexed when it is written.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, str, str, bool]] = []  # sorted (key, kind, label, leading)
+        self._counts: Dict[Tuple[str, str], int] = {}  # (kind, label) -> documents
+        self._documents: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+
+    def _word_keys(self, kind: str, label: str) -> List[Tuple[str, str, str, bool]]:
+        words = normalize(label).split()
+        return [(" ".join(words[i:]), kind, label, i == 0) for i in range(len(words))]
+
+    def _add_term(self, term: Tuple[str, str]):
+        kind, label = term
+        self._counts[term] = self._counts.get(term, 0) + 1
+        if self._counts[term] == 1:
+            for key in self._word_keys(kind, label):
+                insort(self._keys, key)
+
+    def _remove_term(self, term: Tuple[str, str]):
+        kind, label = term
+        self._counts[term] -= 1
+        if self._counts[term] == 0:
+            del self._counts[term]
+            for key in self._word_keys(kind, label):
+                i = bisect_left(self._keys, key)
+                if i < len(self._keys) and self._keys[i] == key:
+                    del self._keys[i]
+
+    def set_document(self, collection: str, doc_id: str, terms: List[Tuple[str, str]]):
+        """Replace the suggestions contributed by one document."""
+        self.remove_document(collection, doc_id)
+        terms = sorted(set(term for term in terms if normalize(term[1])))
+        for term in terms:
+            self._add_term(term)
+        self._documents[(collection, doc_id)] = terms
+
+    def remove_document(self, collection: str, doc_id: str):
+        """Drop the suggestions contributed by one document."""
+        for term in self._documents.pop((collection, doc_id), []):
+            self._remove_term(term)
+
+    def clear(self):
+        self._keys = []
+        self._counts = {}
+        self._documents = {}
+
+    def suggest(self, prefix: str, limit: int = 10, kind: Optional[str] = None) -> List[dict]:
+        """Get suggestions with a word starting with prefix, best first."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        found = {}
+        i = bisect_left(self._keys, (prefix,))
+        keys = self._keys
+        while i < len(keys) and keys[i][0].startswith(prefix):
+            _, term_kind, label, leading = keys[i]
+            if kind is None or term_kind == kind:
+                # Remember whether the prefix matched the label's first word.
+                found[(term_kind, label)] = found.get((term_kind, label), False) or leading
+            i += 1
+
+        counts = self._counts
+        ranked = nsmallest(
+            limit,
+            found.items(),
+            key=lambda item: (not item[1], -counts[item[0]], item[0][1])
+        )
+        return [
+            {"label": label, "kind": term_kind, "count": counts[(term_kind, label)]}
+            for (term_kind, label), _ in ranked
+        ]
+
+autocomplete_index = AutocompleteIndex()
+
+def _document_terms(fields: Dict[str, str], document: dict) -> List[Tuple[str, str]]:
+    return [
+        (kind, str(document[field]).strip())
+        for field, kind in fields.items()
+        if document.get(field)
+    ]
+
+async def rebuild_autocomplete():
+    """Rebuild the index from every active listing."""
+    index = AutocompleteIndex()
+    for service, fields in AUTOCOMPLETE_SOURCES.items():
+        documents = await service.collection.find(
+            {"active": True}, {field: 1 for field in fields}
+        ).to_list(length=None)
+        for document in documents:
+            index.set_document(service.collection_name, str(document["_id"]), _document_terms(fields, document))
+
+    # Swap the contents in one step so lookups never see a half-built index.
+    autocomplete_index._keys = index._keys
+    autocomplete_index._counts = index._counts
+    autocomplete_index._documents = index._documents
+
+def _make_listener(service: DatabaseService, fields: Dict[str, str]):
+    async def on_write(action: str, doc_id: str):
+        if action == "delete":
+            autocomplete_index.remove_document(service.collection_name, doc_id)
+            return
+        document = await service.get_by_id(doc_id, projection={**{field: 1 for field in fields}, "active": 1})
+        if document and document.get("active", True):
+            autocomplete_index.set_document(service.collection_name, doc_id, _document_terms(fields, document))
+        else:
+            autocomplete_index.remove_document(service.collection_name, doc_id)
+    return on_write
+
+for _service, _fields in AUTOCOMPLETE_SOURCES.items():
+    _service.add_listener(_make_listener(_service, _fields))
+
+async def _refresh_periodically():
+    # Writes handled by other workers only reach this process's index
+    # through the periodic rebuild.
+    while True:
+        await asyncio.sleep(AUTOCOMPLETE_REFRESH_SECONDS)
+        try:
+            await rebuild_autocomplete()
+        except Exception as e:
+            logger.error(f"Error refreshing autocomplete index: {e}")
+
+_refresh_task = None
+
+async def start_autocomplete():
+    """Build the index and keep it refreshed in the background."""
+    global _refresh_task
+    try:
+        await rebuild_autocomplete()
+    except Exception as e:
+        logger.error(f"Error building autocomplete index: {e}")
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_periodically())
+
+async def stop_autocomplete():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
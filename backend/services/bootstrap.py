@@ -0,0 +1,196 @@
+"""
+One-time startup tasks
+
+Index creation, backfills, provisioning the first admin user and data
+migrations run through run_bootstrap() instead of on every boot. Each task
+has a version; once it has completed, a record in the bootstrap collection
+stops it from running again until its version changes.
+
+When several workers start together, the first to take the leader lock
+runs the pending tasks and the others start serving immediately. A lock
+left by a crashed leader expires after BOOTSTRAP_LOCK_SECONDS; a failed
+task is not recorded, so the next boot retries it.
+
+From backend/:
+    python -m services.bootstrap            # run pending tasks
+    python -m services.bootstrap --status   # list tasks and when they ran
+    python -m services.bootstrap --force indexes
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from pymongo.errors import DuplicateKeyError
+from services.auth import hash_password_async
+from services.database import (
+    DatabaseService, admin_users_db, bootstrap_db, ensure_all_indexes, backfill_all_normalized
+)
+from services.jobs import merge_duplicate_pending_jobs
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import sys
+import uuid
+
+logger = logging.getLogger(__name__)
+
+BOOTSTRAP_LOCK_SECONDS = float(os.environ.get('BOOTSTRAP_LOCK_SECONDS', '300'))
+
+ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
+ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@kmkhomes.com')
+ADMIN_INITIAL_PASSWORD = os.environ.get('ADMIN_INITIAL_PASSWORD', 'Manojntr12@')
+
+LOCK_ID = "leader"
+
+@dataclass
+class BootstrapTask:
+    name: str
+    version: str
+    run: Callable[[], Awaitable[Optional[dict]]]
+
+tasks: Dict[str, BootstrapTask] = {}
+
+def register(name: str, version: str = "1"):
+    """Decorator: run an async function once per version at startup.
+
+    Tasks run in registration order and must be idempotent: a leader that
+    dies mid-task leaves it unrecorded, and the next leader runs it again.
+    """
+    def decorator(function):
+        tasks[name] = BootstrapTask(name, version, function)
+        return function
+    return decorator
+
+def _index_fingerprint() -> str:
+    # New or changed index declarations make the indexes task run again.
+    declared = sorted((name, repr(service.indexes)) for name, service in DatabaseService.registry.items())
+    return hashlib.sha256(repr(declared).encode()).hexdigest()[:16]
+
+@register("indexes", version=_index_fingerprint())
+async def create_indexes():
+    # The unique pending-job index fails to build over existing duplicates.
+    await merge_duplicate_pending_jobs()
+    await ensure_all_indexes()
+
+@register("backfill_normalized", version="price_min")
+async def backfill_normalized():
+    await backfill_all_normalized()
+
+@register("default_admin")
+async def create_default_admin():
+    """Create the first admin user; an existing one (and its password) is left alone."""
+    if await admin_users_db.get_one({"role": "admin"}, projection={"_id": 1}):
+        return {"created": False}
+    await admin_users_db.create({
+        "username": ADMIN_USERNAME,
+        "email": ADMIN_EMAIL,
+        "password_hash": await hash_password_async(ADMIN_INITIAL_PASSWORD),
+        "role": "admin",
+        "active": True,
+        "created_at": datetime.utcnow()
+    })
+    logger.info(f"Default admin user created: username={ADMIN_USERNAME}; change its password after the first login")
+    return {"created": True}
+
+async def pending_tasks() -> List[BootstrapTask]:
+    done = {}
+    async for record in bootstrap_db.collection.find({"_id": {"$in": [f"task:{name}" for name in tasks]}}):
+        done[record["_id"][len("task:"):]] = record.get("version")
+    return [task for task in tasks.values() if done.get(task.name) != task.version]
+
+async def _acquire_lock(owner: str) -> bool:
+    now = datetime.utcnow()
+    try:
+        await bootstrap_db.collection.find_one_and_update(
+            {"_id": LOCK_ID, "$or": [{"expires_at": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=BOOTSTRAP_LOCK_SECONDS)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Another worker holds an unexpired lock.
+        return False
+    return True
+
+async def _hold_lock(owner: str):
+    """Renew the lock while the leader works, so long tasks do not lose it."""
+    while True:
+        await asyncio.sleep(BOOTSTRAP_LOCK_SECONDS / 3)
+        await _acquire_lock(owner)
+
+async def _release_lock(owner: str):
+    await bootstrap_db.collection.delete_one({"_id": LOCK_ID, "owner": owner})
+
+async def _run_task(task: BootstrapTask, owner: str) -> bool:
+    started = datetime.utcnow()
+    try:
+        result = await task.run()
+    except Exception as e:
+        logger.error(f"Bootstrap task {task.name} failed, it will run again on the next start: {e}")
+        return False
+    await bootstrap_db.collection.update_one(
+        {"_id": f"task:{task.name}"},
+        {"$set": {
+            "version": task.version,
+            "result": result,
+            "started_at": started,
+            "completed_at": datetime.utcnow(),
+            "owner": owner,
+        }},
+        upsert=True
+    )
+    logger.info(f"Bootstrap task {task.name} (version {task.version}) completed")
+    return True
+
+async def run_bootstrap(force: List[str] = None) -> List[str]:
+    """Run pending one-time tasks if this worker becomes the leader.
+
+    Returns the names of the tasks this worker ran; an empty list when
+    everything was already done or another worker is doing it.
+    """
+    force = force or []
+    unknown = [name for name in force if name not in tasks]
+    if unknown:
+        raise ValueError(f"Unknown bootstrap tasks: {', '.join(unknown)}")
+    if not force and not await pending_tasks():
+        return []
+
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    if not await _acquire_lock(owner):
+        logger.info("Bootstrap is running on another worker; starting without waiting")
+        return []
+
+    heartbeat = asyncio.create_task(_hold_lock(owner))
+    try:
+        # Re-check under the lock: a previous leader may have just finished.
+        names = {task.name for task in await pending_tasks()} | set(force)
+        ran = []
+        for task in tasks.values():
+            if task.name in names and await _run_task(task, owner):
+                ran.append(task.name)
+        return ran
+    finally:
+        heartbeat.cancel()
+        await _release_lock(owner)
+
+async def print_status():
+    records = {}
+    async for record in bootstrap_db.collection.find({}):
+        records[record["_id"]] = record
+    for task in tasks.values():
+        record = records.get(f"task:{task.name}")
+        state = "pending" if not record or record.get("version") != task.version else f"done {record['completed_at']:%Y-%m-%d %H:%M}"
+        print(f"{task.name:<24} {task.version:<18} {state}")
+
+if __name__ == '__main__':
+    # Go through the package module so tasks registered by other modules
+    # end up in the same registry as the ones above.
+    from services import bootstrap
+    import services.upload_refs  # noqa: F401 (registers its task)
+
+    logging.basicConfig(level=logging.INFO)
+    if "--status" in sys.argv:
+        asyncio.run(bootstrap.print_status())
+    else:
+        forced = sys.argv[sys.argv.index("--force") + 1:] if "--force" in sys.argv else []
+        print(asyncio.run(bootstrap.run_bootstrap(force=forced)))
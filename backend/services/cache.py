@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from typing import Any, Hashable
+import copy
+import json
+import os
+import time
+
+CACHE_TTL_SECONDS = float(os.environ.get('CACHE_TTL_SECONDS', '300'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '256'))
+
+_MISSING = object()
+
+class TTLCache:
+    """Small in-process LRU cache whose entries also expire after a TTL.
+
+    The cache is per process: writes made through another worker only become
+    visible here once the entry expires, so the TTL bounds that staleness.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a copy of the cached value, or default if missing/expired."""
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        """Store a copy of value, evicting the least recently used entry if full.
+
+        ttl overrides the cache's TTL for this entry.
+        """
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+def make_key(*parts: Any) -> str:
+    """Build a stable cache key from query arguments (filters, sort, ...)."""
+    return json.dumps(parts, sort_keys=True, default=str)
@@ -1,7 +1,15 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional, List, Dict, Any
-from bson import ObjectId
+from pymongo import DeleteOne, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
+from bson import ObjectId, json_util
+from services.cache import TTLCache, make_key
+from utils.listing_numbers import listing_number_normalizer
+import base64
 import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Database connection
 MONGO_URL = os.environ.get('MONGO_URL')
@@ -11,27 +19,159 @@ client = AsyncIOMotorClient(MONGO_URL)
 database = client[DB_NAME]
 
 class DatabaseService:
-    def __init__(self, collection_name: str):
+    # Every service instance, keyed by collection name, so startup code can
+    # provision indexes without importing each instance by hand.
+    registry: Dict[str, "DatabaseService"] = {}
+
+    def __init__(
+        self,
+        collection_name: str,
+        indexes: List[list] = None,
+        cached: bool = False,
+        normalizer: Callable[[dict], dict] = None
+    ):
+        self.collection_name = collection_name
         self.collection = database[collection_name]
+        # Read-through cache for get_all/get_one, cleared by every write made
+        # through this service. Only enabled for near-static CMS content;
+        # facet values use the same cache on every collection.
+        # Values are copied in and out of the cache, so callers may modify
+        # what they get back.
+        self.cached = cached
+        self.cache = TTLCache()
+        # Bumped by invalidate(); a read only fills the cache if no write
+        # happened while it was querying (see _cache_set).
+        self.generation = 0
+        # Declared compound indexes, each a list of (field, direction) pairs
+        # in the same shape as a pymongo sort specification, or a
+        # (keys, options) tuple for indexes that need IndexModel options.
+        self.indexes = indexes or []
+        # Filter/sort shapes seen at runtime, used by index_report().
+        self.query_shapes = set()
+        # Derives extra fields from a document (or partial update) on write;
+        # returns the fields to $set alongside it.
+        self.normalizer = normalizer
+        # Async callbacks run as (action, doc_id) after each document write.
+        self.listeners: List[Callable[[str, str], Awaitable[None]]] = []
+        DatabaseService.registry[collection_name] = self
+
+    async def ensure_indexes(self) -> List[str]:
+        """Create the declared indexes (no-op for ones that already exist)."""
+        if not self.indexes:
+            return []
+        models = []
+        for entry in self.indexes:
+            keys, options = entry if isinstance(entry, tuple) else (entry, {})
+            models.append(IndexModel(keys, **options))
+        return await self.collection.create_indexes(models)
+
+    def _record_query(self, filters: Optional[dict], sort: Optional[list]):
+        """Remember the shape (not the values) of a query for index_report()."""
+        filters = filters or {}
+        equality = tuple(sorted(
+            key for key, value in filters.items()
+            if not key.startswith("$") and not (isinstance(value, dict) and any(k.startswith("$") for k in value))
+        ))
+        other = tuple(sorted(key for key in filters if key not in equality))
+        self.query_shapes.add((equality, other, tuple(tuple(item) for item in (sort or []))))
+
+    def _is_indexed(self, equality: tuple, sort: tuple) -> bool:
+        """Check a query shape against the declared indexes.
+
+        A shape counts as indexed when some index starts with all of its
+        equality fields (in any order) followed by its sort keys, in either
+        the declared direction or fully reversed.
+        """
+        if "_id" in equality:
+            return True
+        sort = [item for item in sort if item[0] not in equality]
+        if not equality and not sort:
+            return True
+        for entry in self.indexes:
+            keys = entry[0] if isinstance(entry, tuple) else entry
+            keys = [tuple(key) for key in keys]
+            if any(direction == "text" for _, direction in keys):
+                continue
+            prefix = keys[:len(equality)]
+            if set(field for field, _ in prefix) != set(equality):
+                continue
+            tail = keys[len(equality):len(equality) + len(sort)]
+            if not sort:
+                return True
+            if tail == sort or tail == [(field, -direction) for field, direction in sort]:
+                return True
+        return False
+
+    def index_report(self) -> List[dict]:
+        """List the query shapes seen so far that no declared index serves."""
+        unindexed = []
+        for equality, other, sort in sorted(self.query_shapes):
+            if not self._is_indexed(equality, sort):
+                unindexed.append({
+                    "collection": self.collection_name,
+                    "equality": list(equality),
+                    "other_filters": list(other),
+                    "sort": [list(item) for item in sort],
+                })
+        return unindexed
     
+    def invalidate(self):
+        """Drop cached reads after a write."""
+        self.generation += 1
+        self.cache.clear()
+
+    def _cache_set(self, key: str, value: Any, generation: int):
+        """Cache a read unless a write invalidated the cache since it started.
+
+        Otherwise a query that began before the write could put its stale
+        result back right after invalidate() cleared it.
+        """
+        if generation == self.generation:
+            self.cache.set(key, value)
+
+    def add_listener(self, callback: Callable[[str, str], Awaitable[None]]):
+        """Register an async callback run after create/update/delete."""
+        self.listeners.append(callback)
+
+    async def _notify(self, action: str, doc_id: str):
+        """Run the write listeners; a failing listener never fails the write."""
+        for callback in self.listeners:
+            try:
+                await callback(action, doc_id)
+            except Exception as e:
+                logger.error(f"Write listener failed on {self.collection_name} {action} {doc_id}: {e}")
+
     async def create(self, document: dict) -> str:
         """Create a new document."""
+        if self.normalizer:
+            document.update(self.normalizer(document))
         result = await self.collection.insert_one(document)
+        self.invalidate()
+        await self._notify("create", str(result.inserted_id))
         return str(result.inserted_id)
     
-    async def get_by_id(self, doc_id: str) -> Optional[dict]:
+    async def get_by_id(self, doc_id: str, projection: dict = None) -> Optional[dict]:
         """Get document by ID."""
         if not ObjectId.is_valid(doc_id):
             return None
-        document = await self.collection.find_one({"_id": ObjectId(doc_id)})
+        document = await self.collection.find_one({"_id": ObjectId(doc_id)}, projection)
         if document:
             document["_id"] = str(document["_id"])
         return document
     
-    async def get_all(self, filters: dict = None, sort: list = None, limit: int = None, skip: int = 0) -> List[dict]:
-        """Get all documents with optional filters and sorting."""
+    async def get_all(self, filters: dict = None, sort: list = None, limit: int = None, skip: int = 0, projection: dict = None) -> List[dict]:
+        """Get all documents with optional filters, sorting and field projection."""
         query = filters or {}
-        cursor = self.collection.find(query)
+        self._record_query(query, sort)
+
+        if self.cached:
+            key = make_key("get_all", query, sort, limit, skip, projection)
+            documents = self.cache.get(key)
+            if documents is not None:
+                return documents
+        generation = self.generation
+
+        cursor = self.collection.find(query, projection)
         
         if sort:
             cursor = cursor.sort(sort)
@@ -46,9 +186,230 @@ class DatabaseService:
         
         for doc in documents:
             doc["_id"] = str(doc["_id"])
-        
+
+        if self.cached:
+            self._cache_set(key, documents, generation)
+
         return documents
     
+    async def get_page(self, filters: dict = None, sort: list = None, limit: int = 20, cursor: str = None, projection: dict = None) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of documents using keyset (cursor) pagination.
+
+        The sort is extended with _id as a tie-breaker, and the cursor encodes
+        the sort values of the last document returned, so every page is an
+        index range scan instead of a skip over all earlier pages. Returns the
+        documents and the cursor for the next page (None on the last page).
+        Raises ValueError for a cursor that does not match the sort.
+        """
+        query = filters or {}
+        sort = [tuple(item) for item in (sort or [])] + [("_id", 1)]
+        self._record_query(query, sort)
+        projection = with_sort_fields(projection, sort)
+
+        if self.cached:
+            key = make_key("get_page", query, sort, limit, cursor, projection)
+            page = self.cache.get(key)
+            if page is not None:
+                return page[0], page[1]
+        generation = self.generation
+
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(sort):
+                raise ValueError("Cursor does not match the sort order")
+            query = {"$and": [query, keyset_filter(sort, values)]}
+
+        documents = await self.collection.find(query, projection).sort(sort).limit(limit + 1).to_list(length=None)
+
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            last = documents[-1]
+            next_cursor = encode_cursor([last.get(field) for field, _ in sort])
+
+        for doc in documents:
+            doc["_id"] = str(doc["_id"])
+
+        if self.cached:
+            self._cache_set(key, (documents, next_cursor), generation)
+
+        return documents, next_cursor
+
+    async def get_facet_values(self, fields: List[str], filters: dict = None) -> Dict[str, list]:
+        """Get the distinct non-empty values of several fields in one round trip.
+
+        Runs a single $facet aggregation over only the requested fields, and
+        caches the result until the next write through this service.
+        """
+        query = filters or {}
+        key = make_key("get_facet_values", fields, query)
+        values = self.cache.get(key)
+        if values is not None:
+            return values
+        generation = self.generation
+
+        pipeline = [
+            {"$match": query},
+            {"$project": {field: 1 for field in fields}},
+            {"$facet": {
+                field: [
+                    {"$match": {field: {"$nin": [None, ""]}}},
+                    {"$group": {"_id": f"${field}"}},
+                ]
+                for field in fields
+            }},
+        ]
+        results = await self.collection.aggregate(pipeline).to_list(length=1)
+        facets = results[0] if results else {}
+
+        values = {
+            field: sorted(item["_id"] for item in facets.get(field, []))
+            for field in fields
+        }
+        self._cache_set(key, values, generation)
+        return values
+
+    async def faceted_search(
+        self,
+        filters: dict,
+        selected: Dict[str, list],
+        facet_fields: List[str],
+        sort: list,
+        limit: int = 20,
+        skip: int = 0,
+        projection: dict = None
+    ) -> dict:
+        """Get a page of results plus per-value counts for each facet field.
+
+        filters always apply; selected maps facet fields to the values the
+        visitor picked. Each facet is counted with every selection except its
+        own, so picking one location still shows counts for the others.
+        """
+        self._record_query(filters, sort)
+
+        def match_selected(exclude: str = None) -> dict:
+            return {
+                field: {"$in": values}
+                for field, values in selected.items()
+                if values and field != exclude
+            }
+
+        facets = {
+            "results": [
+                {"$match": match_selected()},
+                {"$sort": dict(sort)},
+                {"$skip": skip},
+                {"$limit": limit},
+            ] + ([{"$project": projection}] if projection else []),
+            "total": [
+                {"$match": match_selected()},
+                {"$count": "count"},
+            ],
+        }
+        for field in facet_fields:
+            facets[f"facet_{field}"] = [
+                {"$match": match_selected(exclude=field)},
+                {"$match": {field: {"$nin": [None, ""]}}},
+                {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}},
+            ]
+
+        pipeline = [{"$match": filters}, {"$facet": facets}]
+        results = await self.collection.aggregate(pipeline).to_list(length=1)
+        result = results[0] if results else {}
+
+        documents = result.get("results", [])
+        for doc in documents:
+            doc["_id"] = str(doc["_id"])
+
+        total = result.get("total", [])
+        return {
+            "results": documents,
+            "total": total[0]["count"] if total else 0,
+            "facets": {
+                field: [
+                    {"value": item["_id"], "count": item["count"]}
+                    for item in result.get(f"facet_{field}", [])
+                ]
+                for field in facet_fields
+            },
+        }
+
+    async def text_search(self, query: str, filters: dict = None, limit: int = 10, projection: dict = None) -> List[dict]:
+        """Get documents matching a $text query, best match first.
+
+        Needs the collection's text index. Each document carries its
+        relevance in a "score" field. $text matches whole (stemmed) words,
+        not prefixes: "gach" does not find "Gachibowli", so suggestions while
+        typing come from services/autocomplete.py instead. Results are
+        cached until the next write.
+        """
+        key = make_key("text_search", query, filters, limit, projection)
+        documents = self.cache.get(key)
+        if documents is not None:
+            return documents
+        generation = self.generation
+
+        match = {"$text": {"$search": query}, **(filters or {})}
+        score = {"score": {"$meta": "textScore"}}
+        cursor = self.collection.find(match, {**(projection or {}), **score})
+        documents = await cursor.sort([("score", {"$meta": "textScore"})]).limit(limit).to_list(length=None)
+
+        for doc in documents:
+            doc["_id"] = str(doc["_id"])
+
+        self._cache_set(key, documents, generation)
+        return documents
+
+    async def geo_near(
+        self,
+        lat: float,
+        lon: float,
+        max_distance_m: float,
+        filters: dict = None,
+        limit: int = 20,
+        projection: dict = None,
+        field: str = "geo"
+    ) -> List[dict]:
+        """Get documents within max_distance_m of a point, nearest first.
+
+        Needs a 2dsphere index on field. Each document carries its distance
+        in metres in a "distance_m" field.
+        """
+        pipeline = [
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": [lon, lat]},
+                "distanceField": "distance_m",
+                "maxDistance": max_distance_m,
+                "query": filters or {},
+                "key": field,
+                "spherical": True,
+            }},
+            {"$limit": limit},
+        ]
+        if projection:
+            # Keep the computed distance whether the projection includes or excludes.
+            included = any(value for value in projection.values())
+            pipeline.append({"$project": {**projection, "distance_m": 1} if included else projection})
+        documents = await self.collection.aggregate(pipeline).to_list(length=None)
+
+        for doc in documents:
+            doc["_id"] = str(doc["_id"])
+        return documents
+
+    async def set_derived(self, doc_id: str, fields: dict) -> bool:
+        """Store fields computed from a document (geocodes, ...).
+
+        Unlike update_by_id this neither touches updated_at nor runs the
+        write listeners, so a listener can use it without re-triggering
+        itself.
+        """
+        if not ObjectId.is_valid(doc_id):
+            return False
+        result = await self.collection.update_one({"_id": ObjectId(doc_id)}, {"$set": fields})
+        self.invalidate()
+        return result.matched_count > 0
+
     async def update_by_id(self, doc_id: str, update_data: dict) -> bool:
         """Update document by ID."""
         if not ObjectId.is_valid(doc_id):
@@ -56,46 +417,399 @@ class DatabaseService:
         
         from datetime import datetime
         update_data["updated_at"] = datetime.utcnow()
+        if self.normalizer:
+            update_data.update(self.normalizer(update_data))
         
         result = await self.collection.update_one(
             {"_id": ObjectId(doc_id)}, 
             {"$set": update_data}
         )
+        self.invalidate()
+        if result.matched_count:
+            await self._notify("update", str(doc_id))
         return result.modified_count > 0
     
+    async def increment_many(self, field: str, deltas: Dict[str, int]) -> int:
+        """Atomically add per-document deltas to a counter field in one bulk write.
+
+        Unlike update_by_id this does not touch updated_at, since counters
+        are not content edits.
+        """
+        operations = [
+            UpdateOne({"_id": ObjectId(doc_id)}, {"$inc": {field: delta}})
+            for doc_id, delta in deltas.items()
+            if delta and ObjectId.is_valid(doc_id)
+        ]
+        if not operations:
+            return 0
+        result = await self.collection.bulk_write(operations, ordered=False)
+        self.invalidate()
+        return result.modified_count
+
+    async def backfill_normalized(self, marker_field: str) -> int:
+        """Run the normalizer over documents written before it existed.
+
+        Documents still lacking marker_field (one of the derived fields) are
+        updated in one bulk write; returns how many were updated.
+        """
+        if not self.normalizer:
+            return 0
+        operations = []
+        async for document in self.collection.find({marker_field: {"$exists": False}}):
+            derived = self.normalizer(document)
+            if derived:
+                operations.append(UpdateOne({"_id": document["_id"]}, {"$set": derived}))
+        if not operations:
+            return 0
+        await self.collection.bulk_write(operations, ordered=False)
+        self.invalidate()
+        return len(operations)
+
     async def delete_by_id(self, doc_id: str) -> bool:
         """Delete document by ID."""
         if not ObjectId.is_valid(doc_id):
             return False
         result = await self.collection.delete_one({"_id": ObjectId(doc_id)})
+        self.invalidate()
+        if result.deleted_count:
+            await self._notify("delete", str(doc_id))
         return result.deleted_count > 0
     
+    # Bulk writes: one round trip for the whole batch, with a result per item
+    # in request order: {"id", "ok"} plus "error" for items that failed.
+
+    async def _existing_ids(self, doc_ids: List[str]) -> set:
+        object_ids = [ObjectId(doc_id) for doc_id in doc_ids if ObjectId.is_valid(doc_id)]
+        if not object_ids:
+            return set()
+        cursor = self.collection.find({"_id": {"$in": object_ids}}, {"_id": 1})
+        return {str(document["_id"]) async for document in cursor}
+
+    async def _bulk_by_id(self, doc_ids: List[str], make_operation: Callable[[int, ObjectId], Any]) -> List[dict]:
+        """Run one operation per existing, distinct id; unknown and repeated ids fail."""
+        existing = await self._existing_ids(doc_ids)
+        results, operations, positions, seen = [], [], [], set()
+        for index, doc_id in enumerate(doc_ids):
+            if doc_id not in existing:
+                results.append({"id": doc_id, "ok": False, "error": "Not found"})
+            elif doc_id in seen:
+                results.append({"id": doc_id, "ok": False, "error": "Repeated in this request"})
+            else:
+                seen.add(doc_id)
+                results.append({"id": doc_id, "ok": True})
+                operations.append(make_operation(index, ObjectId(doc_id)))
+                positions.append(index)
+        if not operations:
+            return results
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                results[positions[error["index"]]].update(ok=False, error=error.get("errmsg", "Write failed"))
+        finally:
+            self.invalidate()
+        return results
+
+    async def create_many(self, documents: List[dict]) -> List[dict]:
+        """Insert documents in one round trip; a failed insert does not stop the others."""
+        if not documents:
+            return []
+        for document in documents:
+            if self.normalizer:
+                document.update(self.normalizer(document))
+            document.setdefault("_id", ObjectId())
+        results = [{"id": str(document["_id"]), "ok": True} for document in documents]
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                results[error["index"]].update(id=None, ok=False, error=error.get("errmsg", "Write failed"))
+        finally:
+            self.invalidate()
+        for result in results:
+            if result["ok"]:
+                await self._notify("create", result["id"])
+        return results
+
+    async def update_many_by_id(self, updates: List[Tuple[str, dict]]) -> List[dict]:
+        """Apply (doc_id, fields) partial updates in one round trip, like update_by_id each."""
+        from datetime import datetime
+        now = datetime.utcnow()
+        update_data = []
+        for _, fields in updates:
+            fields["updated_at"] = now
+            if self.normalizer:
+                fields.update(self.normalizer(fields))
+            update_data.append(fields)
+
+        results = await self._bulk_by_id(
+            [doc_id for doc_id, _ in updates],
+            lambda index, object_id: UpdateOne({"_id": object_id}, {"$set": update_data[index]})
+        )
+        for result in results:
+            if result["ok"]:
+                await self._notify("update", result["id"])
+        return results
+
+    async def delete_many_by_id(self, doc_ids: List[str]) -> List[dict]:
+        """Delete documents by id in one round trip."""
+        results = await self._bulk_by_id(doc_ids, lambda index, object_id: DeleteOne({"_id": object_id}))
+        for result in results:
+            if result["ok"]:
+                await self._notify("delete", result["id"])
+        return results
+
+    async def reorder(self, doc_ids: List[str], field: str = "display_order") -> List[dict]:
+        """Number documents 1, 2, ... in the given order.
+
+        Like increment_many, a change of order is not a content edit: it
+        neither touches updated_at nor runs the write listeners. Documents
+        left out keep their current position.
+        """
+        return await self._bulk_by_id(
+            doc_ids, lambda index, object_id: UpdateOne({"_id": object_id}, {"$set": {field: index + 1}})
+        )
+
     async def count_documents(self, filters: dict = None) -> int:
         """Count documents with optional filters."""
         query = filters or {}
+        self._record_query(query, None)
         return await self.collection.count_documents(query)
     
-    async def get_one(self, filters: dict) -> Optional[dict]:
+    async def get_one(self, filters: dict, projection: dict = None) -> Optional[dict]:
         """Get single document by filters."""
-        document = await self.collection.find_one(filters)
+        self._record_query(filters, None)
+
+        if self.cached:
+            key = make_key("get_one", filters, projection)
+            # A cached miss is stored as {} so "not found" is cached too.
+            document = self.cache.get(key)
+            if document is not None:
+                return document or None
+        generation = self.generation
+
+        document = await self.collection.find_one(filters, projection)
         if document:
             document["_id"] = str(document["_id"])
+
+        if self.cached:
+            self._cache_set(key, document or {}, generation)
+
         return document
 
+def with_sort_fields(projection: Optional[dict], sort: list) -> Optional[dict]:
+    """Make sure an inclusion projection keeps the fields a cursor is built from."""
+    if not projection:
+        return projection
+    inclusion = any(value in (1, True) for field, value in projection.items() if field != "_id")
+    if not inclusion:
+        return projection
+    return {**projection, **{field: 1 for field, _ in sort}}
+
+def encode_cursor(values: list) -> str:
+    """Encode the sort values of a document as an opaque pagination cursor."""
+    raw = json_util.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    """Decode a cursor from encode_cursor(), raising ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json_util.loads(raw.decode("utf-8"))
+    except Exception:
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list):
+        raise ValueError("Malformed cursor")
+    return values
+
+def keyset_filter(sort: list, values: list) -> dict:
+    """Build the filter matching documents that sort after the given values.
+
+    For sort keys (k1, k2, ...) this is the usual expansion
+    (k1 after v1) OR (k1 = v1 AND k2 after v2) OR ..., where "after" follows
+    each key's direction. MongoDB sorts null/missing lowest, which is handled
+    explicitly since range operators never match null.
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        value = values[i]
+        if value is None:
+            if direction == -1:
+                # Nothing sorts after null in descending order.
+                continue
+            after = {field: {"$ne": None}}
+        elif direction == 1:
+            after = {field: {"$gt": value}}
+        else:
+            after = {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+        equal = [{prefix_field: values[j]} for j, (prefix_field, _) in enumerate(sort[:i])]
+        clauses.append({"$and": equal + [after]} if equal else after)
+
+    if not clauses:
+        # The cursor pointed at the last possible document.
+        return {"_id": {"$exists": False}}
+    return {"$or": clauses}
+
+async def ensure_all_indexes():
+    """Create the declared indexes for every registered collection."""
+    for name, service in DatabaseService.registry.items():
+        try:
+            created = await service.ensure_indexes()
+            if created:
+                logger.info(f"Indexes ensured on {name}: {', '.join(created)}")
+        except Exception as e:
+            logger.error(f"Error creating indexes on {name}: {e}")
+
+async def backfill_all_normalized():
+    """Backfill derived fields on every collection that has a normalizer."""
+    for name, service in DatabaseService.registry.items():
+        if not service.normalizer:
+            continue
+        try:
+            updated = await service.backfill_normalized("price_min")
+            if updated:
+                logger.info(f"Backfilled derived fields on {updated} {name} documents")
+        except Exception as e:
+            logger.error(f"Error backfilling derived fields on {name}: {e}")
+
+def index_report() -> List[dict]:
+    """Collect unindexed query shapes across every registered collection."""
+    report = []
+    for service in DatabaseService.registry.values():
+        report.extend(service.index_report())
+    return report
+
 # Service instances
-properties_db = DatabaseService('properties')
-home_banners_db = DatabaseService('home_banners')
-about_sections_db = DatabaseService('about_sections')
-team_members_db = DatabaseService('team_members')
-amenities_db = DatabaseService('amenities')
-upcoming_projects_db = DatabaseService('upcoming_projects')
-testimonials_db = DatabaseService('testimonials')
-news_events_db = DatabaseService('news_events')
-nri_content_db = DatabaseService('nri_content')
-contact_info_db = DatabaseService('contact_info')
-site_settings_db = DatabaseService('site_settings')
-admin_users_db = DatabaseService('admin_users')
-contact_submissions_db = DatabaseService('contact_submissions')
-budget_homes_db = DatabaseService('budget_homes')
-plots_db = DatabaseService('plots')
-blogs_db = DatabaseService('blogs')
+# Near-static CMS content (banners, about, team, amenities, ...) is served
+# through the read cache; listings and blogs change too often to benefit.
+# Listings derive numeric price/area range fields from their free-text
+# price_range and area on every write, and carry a GeoJSON "geo" point
+# geocoded from their location (services/geo_listings.py).
+# Indexes follow the equality-then-sort shape of the queries in routes/:
+# {"active": True, ...} filters with the listing's sort order appended, and
+# _id last on paginated listings since get_page() sorts on it as tie-breaker.
+properties_db = DatabaseService('properties', indexes=[
+    [("active", 1), ("featured", -1), ("created_at", -1), ("_id", 1)],
+    [("active", 1), ("status", 1), ("featured", -1), ("created_at", -1), ("_id", 1)],
+    [("active", 1), ("facing", 1), ("featured", -1), ("created_at", -1), ("_id", 1)],
+    [("created_at", -1), ("_id", 1)],
+    ([("villa_number", "text"), ("location", "text"), ("amenities", "text"), ("description", "text")],
+     {"name": "text_search", "weights": {"villa_number": 10, "location": 5, "amenities": 2, "description": 1}}),
+    [("active", 1), ("price_min", 1), ("price_max", 1)],
+    [("active", 1), ("area_sqft_min", 1), ("area_sqft_max", 1)],
+    [("geo", "2dsphere")],
+], normalizer=listing_number_normalizer("price_range", "built_up_area"))
+home_banners_db = DatabaseService('home_banners', indexes=[
+    [("active", 1), ("display_order", 1), ("created_at", -1)],
+    [("display_order", 1), ("_id", 1)],
+], cached=True)
+about_sections_db = DatabaseService('about_sections', indexes=[
+    [("active", 1), ("display_order", 1)],
+], cached=True)
+team_members_db = DatabaseService('team_members', indexes=[
+    [("active", 1), ("display_order", 1)],
+], cached=True)
+amenities_db = DatabaseService('amenities', indexes=[
+    [("active", 1), ("display_order", 1)],
+    [("display_order", 1), ("created_at", -1), ("_id", 1)],
+], cached=True)
+upcoming_projects_db = DatabaseService('upcoming_projects', indexes=[
+    [("active", 1), ("launch_date", 1)],
+], cached=True)
+testimonials_db = DatabaseService('testimonials', indexes=[
+    [("active", 1), ("featured", -1), ("display_order", 1)],
+    [("created_at", -1), ("_id", 1)],
+], cached=True)
+news_events_db = DatabaseService('news_events', indexes=[
+    [("active", 1), ("featured", -1), ("publish_date", -1), ("_id", 1)],
+    [("active", 1), ("category", 1), ("featured", -1), ("publish_date", -1), ("_id", 1)],
+    [("created_at", -1), ("_id", 1)],
+    ([("title", "text"), ("category", "text"), ("excerpt", "text"), ("content", "text")],
+     {"name": "text_search", "weights": {"title": 10, "category": 2, "excerpt": 3, "content": 1}}),
+])
+nri_content_db = DatabaseService('nri_content', indexes=[
+    [("active", 1), ("display_order", 1)],
+    [("active", 1), ("section_name", 1), ("display_order", 1)],
+    [("created_at", -1), ("_id", 1)],
+], cached=True)
+contact_info_db = DatabaseService('contact_info', cached=True)
+site_settings_db = DatabaseService('site_settings', indexes=[
+    [("setting_key", 1)],
+], cached=True)
+admin_users_db = DatabaseService('admin_users', indexes=[
+    [("username", 1)],
+])
+contact_submissions_db = DatabaseService('contact_submissions', indexes=[
+    [("created_at", -1), ("_id", 1)],
+])
+budget_homes_db = DatabaseService('budget_homes', indexes=[
+    [("active", 1), ("display_order", 1), ("created_at", -1), ("_id", 1)],
+    [("active", 1), ("status", 1), ("display_order", 1), ("created_at", -1), ("_id", 1)],
+    [("display_order", 1), ("created_at", -1), ("_id", 1)],
+    ([("property_name", "text"), ("location", "text"), ("property_type", "text"), ("description", "text")],
+     {"name": "text_search", "weights": {"property_name": 10, "location": 5, "property_type": 2, "description": 1}}),
+    [("active", 1), ("price_min", 1), ("price_max", 1)],
+    [("active", 1), ("area_sqft_min", 1), ("area_sqft_max", 1)],
+    [("geo", "2dsphere")],
+], normalizer=listing_number_normalizer("price_range", "built_up_area"))
+plots_db = DatabaseService('plots', indexes=[
+    [("active", 1), ("display_order", 1), ("created_at", -1), ("_id", 1)],
+    [("active", 1), ("status", 1), ("display_order", 1), ("created_at", -1), ("_id", 1)],
+    [("display_order", 1), ("created_at", -1), ("_id", 1)],
+    ([("plot_name", "text"), ("location", "text"), ("property_type", "text"), ("description", "text")],
+     {"name": "text_search", "weights": {"plot_name": 10, "location": 5, "property_type": 2, "description": 1}}),
+    [("active", 1), ("price_min", 1), ("price_max", 1)],
+    [("active", 1), ("area_sqft_min", 1), ("area_sqft_max", 1)],
+    [("geo", "2dsphere")],
+], normalizer=listing_number_normalizer("price_range", "plot_area"))
+blogs_db = DatabaseService('blogs', indexes=[
+    [("active", 1), ("publish_date", -1), ("_id", 1)],
+    [("active", 1), ("category", 1), ("publish_date", -1), ("_id", 1)],
+    [("slug", 1), ("active", 1)],
+    [("publish_date", -1), ("_id", 1)],
+    ([("title", "text"), ("tags", "text"), ("category", "text"), ("excerpt", "text"), ("content", "text")],
+     {"name": "text_search", "weights": {"title": 10, "tags": 5, "category": 2, "excerpt": 3, "content": 1}}),
+])
+# One record per uploaded file: hash, size, type, reference count and, for
+# images, the variant manifest from services/images.py
+uploads_db = DatabaseService('uploads', indexes=[
+    ([("filename", 1)], {"unique": True}),
+    [("sha256", 1)],
+    [("original_sha256s", 1)],
+    [("created_at", -1), ("_id", 1)],
+    [("ref_count", 1), ("last_uploaded_at", 1)],
+])
+# Which documents reference which uploaded file (services/upload_refs.py)
+upload_refs_db = DatabaseService('upload_refs', indexes=[
+    ([("sha256", 1), ("collection", 1), ("doc_id", 1)], {"unique": True}),
+    [("collection", 1), ("doc_id", 1)],
+])
+# Resumable upload sessions (services/uploads.py), dropped once expired
+upload_sessions_db = DatabaseService('upload_sessions', indexes=[
+    ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+])
+# Background jobs (services/jobs.py); finished jobs are dropped after
+# JOB_RETENTION_DAYS.
+jobs_db = DatabaseService('jobs', indexes=[
+    # At most one pending job per document (JobQueue.enqueue merges into it)
+    ([("kind", 1), ("collection", 1), ("doc_id", 1)], {
+        "unique": True,
+        "partialFilterExpression": {"status": "pending"},
+        "name": "one_pending_per_document",
+    }),
+    [("status", 1), ("run_after", 1)],
+    [("status", 1), ("locked_at", 1)],
+    [("collection", 1), ("doc_id", 1), ("created_at", -1), ("_id", 1)],
+    [("created_at", -1), ("_id", 1)],
+    [("status", 1), ("created_at", -1), ("_id", 1)],
+    ([("finished_at", 1)], {"expireAfterSeconds": int(float(os.environ.get('JOB_RETENTION_DAYS', '30')) * 86400)}),
+])
+# Leader lock and completed one-time startup tasks (services/bootstrap.py)
+bootstrap_db = DatabaseService('bootstrap')
+# Geocoding/nearby-places lookups (utils/nearby_places.py); MongoDB drops
+# entries once expires_at passes.
+geo_cache_db = DatabaseService('geo_cache', indexes=[
+    ([("key", 1)], {"unique": True}),
+    ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+])
@@ -0,0 +1,200 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from services.database import DatabaseService, jobs_db, properties_db, budget_homes_db, plots_db
+from services.jobs import job_queue
+from services.search import SEARCH_SOURCES
+from utils.nearby_places import find_nearby_places, geocode
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+NEARBY_RADIUS_KM = float(os.environ.get('NEARBY_RADIUS_KM', '5'))
+NEARBY_REFRESH_DAYS = float(os.environ.get('NEARBY_REFRESH_DAYS', '30'))
+ENRICHMENT_SCAN_SECONDS = float(os.environ.get('ENRICHMENT_SCAN_SECONDS', '3600'))
+
+ENRICH_JOB = "enrich_listing"
+
+# Result type (as in services/search.py) -> service. Each service declares a
+# 2dsphere index on "geo".
+GEO_SOURCES: Dict[str, DatabaseService] = {
+    "property": properties_db,
+    "budget_home": budget_homes_db,
+    "plot": plots_db,
+}
+
+async def nearby_places_source(service: DatabaseService, nearby_places: list, doc_id: Optional[str] = None) -> str:
+    """nearby_places_source for an admin write carrying nearby_places.
+
+    "manual" protects the list from enrich_listing; "auto" lets the job
+    (re)fill it. An empty list is left to the job, and an edit that sends
+    back the job's own list unchanged keeps it automatic.
+    """
+    if not nearby_places:
+        return "auto"
+    if doc_id:
+        stored = await service.get_by_id(doc_id, projection={"nearby_places": 1, "nearby_places_source": 1})
+        if stored and stored.get("nearby_places_source") == "auto" and stored.get("nearby_places") == nearby_places:
+            return "auto"
+    return "manual"
+
+def _auto_nearby_places(document: dict) -> bool:
+    # Listings from before nearby_places_source existed were curated by
+    # hand (pasted from /admin/fetch-nearby-places) unless still empty.
+    source = document.get("nearby_places_source")
+    return source == "auto" if source else not document.get("nearby_places")
+
+async def enrich_listing(collection: str, doc_id: str) -> Optional[dict]:
+    """Job handler: geocode a listing and refresh its nearby places.
+
+    Only runs the lookups when the location changed since the last run
+    (geo_location records it) or the last check is older than
+    NEARBY_REFRESH_DAYS. Upstream errors propagate so the job is retried.
+    nearby_places is only written when it is empty or was written by this
+    job (nearby_places_source "auto"); places curated by an admin are
+    never replaced. An address with no match clears the point. Either way
+    enrichment_checked_at records the run, so an address that never
+    matches is not looked up again until the next refresh.
+    """
+    service = DatabaseService.registry[collection]
+    document = await service.get_by_id(doc_id, projection={
+        "location": 1, "geo_location": 1, "enrichment_checked_at": 1, "nearby_places_updated_at": 1,
+        "nearby_places": 1, "nearby_places_source": 1,
+    })
+    if not document:
+        return {"skipped": "deleted"}
+
+    location = document.get("location") or ""
+    # Listings enriched before enrichment_checked_at existed only have nearby_places_updated_at.
+    checked_at = document.get("enrichment_checked_at") or document.get("nearby_places_updated_at")
+    fresh = checked_at and checked_at > datetime.utcnow() - timedelta(days=NEARBY_REFRESH_DAYS)
+    if location == document.get("geo_location") and fresh:
+        return {"skipped": "up to date"}
+
+    coordinates = await geocode(location) if location.strip() else None
+    fields = {
+        "geo": {"type": "Point", "coordinates": [coordinates[1], coordinates[0]]} if coordinates else None,
+        "geo_location": location,
+        "enrichment_checked_at": datetime.utcnow(),
+    }
+    if coordinates and _auto_nearby_places(document):
+        fields["nearby_places"] = await find_nearby_places(location, NEARBY_RADIUS_KM)
+        fields["nearby_places_source"] = "auto"
+        fields["nearby_places_updated_at"] = datetime.utcnow()
+    await service.set_derived(doc_id, fields)
+    return {"geocoded": bool(coordinates), "nearby_places": len(fields.get("nearby_places", []))}
+
+job_queue.register(ENRICH_JOB, enrich_listing)
+
+async def enqueue_stale_listings() -> int:
+    """Queue enrichment for listings whose point or nearby places are missing or out of date.
+
+    Listings whose last job failed within NEARBY_REFRESH_DAYS are left for
+    an admin to retry, and a job already pending keeps its schedule (retry
+    backoff included).
+    """
+    cutoff = datetime.utcnow() - timedelta(days=NEARBY_REFRESH_DAYS)
+    stale = {
+        "location": {"$nin": [None, ""]},
+        "$or": [
+            {"$expr": {"$ne": [{"$ifNull": ["$geo_location", None]}, "$location"]}},
+            {
+                "enrichment_checked_at": {"$not": {"$gt": cutoff}},
+                "nearby_places_updated_at": {"$not": {"$gt": cutoff}},
+            },
+        ],
+    }
+    failed = set()
+    async for job in jobs_db.collection.find(
+        {"kind": ENRICH_JOB, "status": "failed", "finished_at": {"$gt": cutoff}}, {"collection": 1, "doc_id": 1}
+    ):
+        failed.add((job["collection"], job["doc_id"]))
+
+    queued = 0
+    for service in GEO_SOURCES.values():
+        async for document in service.collection.find(stale, {"_id": 1}):
+            doc_id = str(document["_id"])
+            if (service.collection_name, doc_id) in failed:
+                continue
+            await job_queue.enqueue(ENRICH_JOB, service.collection_name, doc_id, reschedule=False)
+            queued += 1
+    return queued
+
+def _make_listener(service: DatabaseService):
+    async def on_write(action: str, doc_id: str):
+        if action != "delete":
+            await job_queue.enqueue(ENRICH_JOB, service.collection_name, doc_id)
+    return on_write
+
+for _service in GEO_SOURCES.values():
+    _service.add_listener(_make_listener(_service))
+
+async def _scan_periodically():
+    while True:
+        try:
+            queued = await enqueue_stale_listings()
+            if queued:
+                logger.info(f"Queued enrichment for {queued} listings")
+        except Exception as e:
+            logger.error(f"Error queueing listing enrichment: {e}")
+        await asyncio.sleep(ENRICHMENT_SCAN_SECONDS)
+
+_scan_task = None
+
+def start_listing_enrichment():
+    """Start the job workers and the periodic scan for stale listings."""
+    global _scan_task
+    job_queue.start()
+    if _scan_task is None:
+        _scan_task = asyncio.create_task(_scan_periodically())
+
+async def stop_listing_enrichment():
+    global _scan_task
+    if _scan_task is not None:
+        _scan_task.cancel()
+        try:
+            await _scan_task
+        except asyncio.CancelledError:
+            pass
+        _scan_task = None
+    await job_queue.stop()
+
+async def nearby_listings(
+    lat: float,
+    lon: float,
+    radius_km: float,
+    types: List[str] = None,
+    limit: int = 20,
+    projections: Optional[Dict[str, dict]] = None
+) -> List[dict]:
+    """Get active listings of every type within radius_km, nearest first."""
+    types = types or list(GEO_SOURCES)
+    projections = projections or {}
+
+    batches = await asyncio.gather(*[
+        GEO_SOURCES[name].geo_near(
+            lat, lon, radius_km * 1000,
+            filters={"active": True},
+            limit=limit,
+            projection=projections.get(name)
+        )
+        for name in types
+    ])
+
+    results = []
+    for name, documents in zip(types, batches):
+        source = SEARCH_SOURCES[name]
+        for doc in documents:
+            distance_m = doc.pop("distance_m")
+            results.append((distance_m, {
+                "type": name,
+                "id": doc["_id"],
+                "title": doc.get(source.title_field, ""),
+                "url": source.url.format_map({"_id": doc["_id"]}),
+                "distance_km": round(distance_m / 1000, 2),
+                "document": doc,
+            }))
+
+    results.sort(key=lambda result: result[0])
+    return [result for _, result in results[:limit]]
@@ -0,0 +1,257 @@
+"""
+Responsive image variants for uploads
+
+Each uploaded image is re-encoded without EXIF metadata (after applying
+its orientation) and capped at IMAGE_MAX_DIMENSION before it is named by
+its hash, then gets downsized variants at IMAGE_WIDTHS in WebP, AVIF (when
+Pillow supports it) and the original format, plus a square thumbnail. Encoding runs in a process pool
+so it never blocks the event loop. The resulting manifest is stored on the
+file's record in the uploads collection and returned to the uploader.
+
+Existing uploads can be processed with, from backend/:
+    python -m services.images /app/backend/uploads
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+from services.database import uploads_db
+import asyncio
+import logging
+import os
+import re
+import sys
+
+logger = logging.getLogger(__name__)
+
+IMAGE_WIDTHS = [int(width) for width in os.environ.get('IMAGE_WIDTHS', '320,640,1024,1600').split(',')]
+IMAGE_MAX_DIMENSION = int(os.environ.get('IMAGE_MAX_DIMENSION', '2560'))
+IMAGE_THUMBNAIL_SIZE = int(os.environ.get('IMAGE_THUMBNAIL_SIZE', '240'))
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+IMAGE_AVIF = os.environ.get('IMAGE_AVIF', 'true').lower() == 'true'
+
+# Formats Pillow re-encodes; anything else (GIF, SVG, video, PDF) is kept as uploaded.
+RASTER_FORMATS = {"JPEG": "jpeg", "PNG": "png", "WEBP": "webp", "MPO": "jpeg"}
+QUALITY = {"jpeg": 82, "webp": 80, "avif": 55}
+# Extra Pillow save options per output format
+SAVE_OPTIONS = {
+    "jpeg": {"optimize": True, "progressive": True},
+    "png": {"optimize": True},
+    "webp": {"method": 4},
+    "avif": {"speed": 6},
+}
+PIL_FORMATS = {"jpeg": "JPEG", "png": "PNG", "webp": "WEBP", "avif": "AVIF"}
+VARIANT_NAME = re.compile(r"-(\d+w|thumb)$")
+
+def _save(image, path: str, fmt: str, icc_profile: Optional[bytes] = None):
+    options = dict(SAVE_OPTIONS.get(fmt, {}))
+    if fmt in QUALITY:
+        options["quality"] = QUALITY[fmt]
+    if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("L" if image.mode == "LA" else "RGB")
+    # Keep the colour profile (wide-gamut phone photos look washed out
+    # without it) but not EXIF (GPS, camera, ...): no exif= argument.
+    if icc_profile:
+        options["icc_profile"] = icc_profile
+    image.save(path, PIL_FORMATS[fmt], **options)
+
+def _open_raster(path: str):
+    """(image, output format) of a raster image this pipeline handles, else (None, None)."""
+    from PIL import Image
+
+    try:
+        image = Image.open(path)
+        source_format = RASTER_FORMATS.get(image.format)
+        if source_format is None or getattr(image, "is_animated", False):
+            return None, None
+        image.load()
+    except Exception:
+        return None, None
+    return image, source_format
+
+def _needs_cleaning(image) -> bool:
+    has_metadata = bool(image.info.get("exif") or image.info.get("xmp"))
+    return has_metadata or max(image.size) > IMAGE_MAX_DIMENSION
+
+def _cleaned(image):
+    """The image oriented by its EXIF tag, in an encodable mode, capped at IMAGE_MAX_DIMENSION.
+
+    Returns (image, icc_profile); the profile is dropped when the pixels
+    were converted to another colour space.
+    """
+    from PIL import Image, ImageOps
+
+    icc_profile = image.info.get("icc_profile")
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        icc_profile = None
+    if max(image.size) > IMAGE_MAX_DIMENSION:
+        image.thumbnail((IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION), Image.LANCZOS)
+    return image, icc_profile
+
+def clean_image(path: str) -> bool:
+    """
+    Rewrite an image in place without EXIF/XMP metadata and capped at IMAGE_MAX_DIMENSION.
+
+    Runs in a worker process, before the upload is named by its hash.
+    Returns whether the file was rewritten; clean originals are left as
+    uploaded rather than re-encoded.
+    """
+    image, source_format = _open_raster(path)
+    if image is None or not _needs_cleaning(image):
+        return False
+    image, icc_profile = _cleaned(image)
+    _save(image, path, source_format, icc_profile)
+    return True
+
+def process_image(path: str) -> Optional[dict]:
+    """
+    Build the variants for one image file, next to it on disk.
+
+    Runs in a worker process. Returns None for files that are not raster
+    images this pipeline handles; paths in the manifest are file names
+    relative to the image's directory. The file itself is never modified
+    (its name is its content hash); when it still needs cleaning (see
+    clean_image()), the full-size entry is a cleaned copy instead.
+    """
+    from PIL import Image, ImageOps, features
+
+    image, source_format = _open_raster(path)
+    if image is None:
+        return None
+
+    directory, filename = os.path.split(path)
+    stem = os.path.splitext(filename)[0]
+
+    original_usable = not _needs_cleaning(image)
+    image, icc_profile = _cleaned(image)
+    width, height = image.size
+
+    formats = ["webp"] + (["avif"] if IMAGE_AVIF and features.check("avif") else []) + [source_format]
+    formats = list(dict.fromkeys(formats))
+    widths = sorted(set(w for w in IMAGE_WIDTHS if w < width)) + [width]
+
+    variants: Dict[str, List[dict]] = {fmt: [] for fmt in formats}
+    for target_width in widths:
+        resized = image if target_width == width else image.resize(
+            (target_width, max(1, round(height * target_width / width))), Image.LANCZOS
+        )
+        for fmt in formats:
+            if fmt == source_format and target_width == width and original_usable:
+                name = filename
+            else:
+                name = f"{stem}-{target_width}w.{fmt}"
+                _save(resized, os.path.join(directory, name), fmt, icc_profile)
+            variants[fmt].append({
+                "file": name,
+                "width": resized.width,
+                "height": resized.height,
+                "bytes": os.path.getsize(os.path.join(directory, name)),
+            })
+
+    thumbnail = ImageOps.fit(image, (IMAGE_THUMBNAIL_SIZE, IMAGE_THUMBNAIL_SIZE), Image.LANCZOS)
+    thumbnail_name = f"{stem}-thumb.webp"
+    _save(thumbnail, os.path.join(directory, thumbnail_name), "webp", icc_profile)
+
+    return {
+        "file": filename,
+        "format": source_format,
+        "width": width,
+        "height": height,
+        "variants": variants,
+        "thumbnail": thumbnail_name,
+    }
+
+def build_manifest(result: dict, base_url: str) -> dict:
+    """Turn process_image() output into URLs plus srcset strings per format."""
+    def url(name: str) -> str:
+        return f"{base_url}/{name}"
+
+    variants = {
+        fmt: [{**item, "url": url(item.pop("file"))} for item in items]
+        for fmt, items in result["variants"].items()
+    }
+    return {
+        "url": url(result["file"]),
+        "filename": result["file"],
+        "format": result["format"],
+        "width": result["width"],
+        "height": result["height"],
+        "thumbnail_url": url(result["thumbnail"]),
+        "variants": variants,
+        "srcset": {
+            fmt: ", ".join(f"{item['url']} {item['width']}w" for item in items)
+            for fmt, items in variants.items()
+        },
+    }
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+def shutdown_image_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def clean_upload(path: str) -> bool:
+    """Strip metadata from and cap an uploaded image in place (clean_image()).
+
+    Returns False when the file was left as uploaded, including when
+    cleaning failed.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_pool(), clean_image, path)
+    except Exception as e:
+        logger.error(f"Error cleaning image {path}: {e}")
+        return False
+
+async def process_upload(path: str, base_url: str) -> Optional[dict]:
+    """Generate an uploaded image's variants and record its manifest.
+
+    Returns None when the file is not an image the pipeline handles or
+    processing failed; the upload itself is kept either way.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(_get_pool(), process_image, path)
+    except Exception as e:
+        logger.error(f"Error processing image {path}: {e}")
+        return None
+    if result is None:
+        return None
+
+    manifest = build_manifest(result, base_url)
+    await uploads_db.collection.update_one(
+        {"filename": manifest["filename"]},
+        {"$set": {"image": manifest, "updated_at": datetime.utcnow()}, "$setOnInsert": {"created_at": datetime.utcnow()}},
+        upsert=True
+    )
+    uploads_db.invalidate()
+    return manifest
+
+async def _process_directory(directory: str, base_url: str):
+    processed = set(await uploads_db.collection.distinct("filename"))
+    for name in sorted(os.listdir(directory)):
+        # Skip generated variants and files already in the manifest table.
+        if name in processed or VARIANT_NAME.search(os.path.splitext(name)[0]):
+            continue
+        manifest = await process_upload(os.path.join(directory, name), base_url)
+        if manifest:
+            count = sum(len(items) for items in manifest["variants"].values())
+            print(f"{name}: {manifest['width']}x{manifest['height']}, {count} variants")
+        else:
+            print(f"{name}: skipped")
+    shutdown_image_pool()
+
+if __name__ == '__main__':
+    asyncio.run(_process_directory(
+        sys.argv[1] if len(sys.argv) > 1 else "/app/backend/uploads",
+        sys.argv[2] if len(sys.argv) > 2 else f"{os.environ.get('BACKEND_URL', '')}/uploads"
+    ))
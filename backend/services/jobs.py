@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from services.database import DatabaseService, jobs_db
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_BATCH_SIZE = int(os.environ.get('JOB_BATCH_SIZE', '10'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '5'))
+JOB_RETRY_BASE_SECONDS = float(os.environ.get('JOB_RETRY_BASE_SECONDS', '30'))
+JOB_RETRY_MAX_SECONDS = float(os.environ.get('JOB_RETRY_MAX_SECONDS', '3600'))
+JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', '5'))
+# A running job not finished within this long is assumed lost (crashed worker).
+JOB_LOCK_SECONDS = float(os.environ.get('JOB_LOCK_SECONDS', '600'))
+
+JOB_STATUSES = ["pending", "running", "done", "failed"]
+
+# (collection, doc_id) -> optional result summary stored on the job
+JobHandler = Callable[[str, str], Awaitable[Optional[dict]]]
+
+class JobQueue:
+    """In-process worker pool over a persisted job table.
+
+    Jobs live in MongoDB, so they survive restarts and any worker process
+    can pick them up: workers claim due jobs with an atomic
+    find_one_and_update, and a job whose worker died is reclaimed once its
+    lock expires. Failed jobs are retried with exponential backoff until
+    JOB_MAX_ATTEMPTS. enqueue() wakes the local workers immediately; jobs
+    enqueued by other processes are picked up on the next poll.
+    """
+
+    def __init__(self, service: DatabaseService, workers: int = JOB_WORKERS, batch_size: int = JOB_BATCH_SIZE):
+        self.service = service
+        self.workers = workers
+        self.batch_size = batch_size
+        self.handlers: Dict[str, JobHandler] = {}
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, kind: str, handler: JobHandler):
+        self.handlers[kind] = handler
+
+    async def enqueue(self, kind: str, collection: str, doc_id: str, reschedule: bool = True):
+        """Queue a job for a document, merging with one already pending.
+
+        With reschedule, a pending job is made due now (the document
+        changed); without it, as for periodic scans, a pending job keeps
+        its run_after, including any retry backoff.
+        """
+        now = datetime.utcnow()
+        update = {"$set": {"updated_at": now}, "$setOnInsert": {"attempts": 0, "created_at": now}}
+        update["$set" if reschedule else "$setOnInsert"]["run_after"] = now
+        query = {"kind": kind, "collection": collection, "doc_id": doc_id, "status": "pending"}
+        try:
+            await self.service.collection.update_one(query, update, upsert=True)
+        except DuplicateKeyError:
+            # A concurrent enqueue inserted the pending job first (the unique
+            # index allows one per document); merge into it.
+            await self.service.collection.update_one(query, update)
+        self.service.invalidate()
+        self._wakeup.set()
+
+    async def retry(self, job_id: str) -> bool:
+        """Put a failed job back in the queue with a fresh set of attempts."""
+        document = await self.service.get_by_id(job_id, projection={"status": 1})
+        if not document or document["status"] != "failed":
+            return False
+        try:
+            await self.service.set_derived(job_id, {
+                "status": "pending",
+                "attempts": 0,
+                "run_after": datetime.utcnow(),
+                "finished_at": None,
+            })
+        except DuplicateKeyError:
+            # The document already has a pending job, which covers the retry.
+            pass
+        self._wakeup.set()
+        return True
+
+    async def status_counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in JOB_STATUSES}
+        async for item in self.service.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[item["_id"]] = item["count"]
+        return counts
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.service.collection.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "run_after": {"$lte": now}},
+                {"status": "running", "locked_at": {"$lt": now - timedelta(seconds=JOB_LOCK_SECONDS)}},
+            ]},
+            {"$set": {"status": "running", "locked_at": now, "updated_at": now}, "$inc": {"attempts": 1}},
+            sort=[("run_after", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self, job: dict):
+        handler = self.handlers.get(job["kind"])
+        now = datetime.utcnow()
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind {job['kind']}")
+            result = await handler(job["collection"], job["doc_id"])
+            update = {"status": "done", "result": result, "last_error": None, "finished_at": datetime.utcnow()}
+        except Exception as e:
+            logger.error(f"Job {job['kind']} {job['collection']} {job['doc_id']} failed (attempt {job['attempts']}): {e}")
+            if job["attempts"] >= JOB_MAX_ATTEMPTS or handler is None:
+                update = {"status": "failed", "last_error": str(e), "finished_at": datetime.utcnow()}
+            else:
+                delay = min(JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1), JOB_RETRY_MAX_SECONDS)
+                update = {"status": "pending", "last_error": str(e), "run_after": now + timedelta(seconds=delay)}
+        update["updated_at"] = datetime.utcnow()
+        try:
+            await self.service.collection.update_one({"_id": job["_id"]}, {"$set": update})
+        except DuplicateKeyError:
+            # The document was queued again while this job ran; the newer
+            # pending job takes over the retry.
+            update.update(status="failed", finished_at=datetime.utcnow())
+            update.pop("run_after", None)
+            await self.service.collection.update_one({"_id": job["_id"]}, {"$set": update})
+        self.service.invalidate()
+
+    async def _worker(self):
+        while True:
+            try:
+                # Claim a batch and run it concurrently; lookups for the same
+                # location then share one upstream call.
+                jobs = []
+                while len(jobs) < self.batch_size:
+                    job = await self._claim()
+                    if job is None:
+                        break
+                    jobs.append(job)
+                if jobs:
+                    self.service.invalidate()
+                    await asyncio.gather(*[self._run(job) for job in jobs])
+                    continue
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the worker tasks on the running event loop."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers; interrupted jobs are reclaimed after their lock expires."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+async def merge_duplicate_pending_jobs() -> int:
+    """Keep one pending job per (kind, collection, doc_id), the earliest due.
+
+    Needed once before the unique pending-job index can be built on a
+    table written before it existed. Returns how many jobs were removed.
+    """
+    removed = 0
+    pipeline = [
+        {"$match": {"status": "pending"}},
+        {"$sort": {"run_after": 1}},
+        {"$group": {"_id": {"kind": "$kind", "collection": "$collection", "doc_id": "$doc_id"},
+                    "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    async for group in jobs_db.collection.aggregate(pipeline):
+        result = await jobs_db.collection.delete_many({"_id": {"$in": group["ids"][1:]}})
+        removed += result.deleted_count
+    if removed:
+        jobs_db.invalidate()
+    return removed
+
+job_queue = JobQueue(jobs_db)
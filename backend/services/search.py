@@ -0,0 +1,111 @@
+from typing import Dict, List, Optional
+from services.database import (
+    DatabaseService, properties_db, budget_homes_db, plots_db, blogs_db, news_events_db
+)
+import asyncio
+import html
+import re
+
+SNIPPET_RADIUS = 60
+
+class SearchSource:
+    """How one collection takes part in site-wide search."""
+
+    def __init__(self, service: DatabaseService, title_field: str, url: str, fields: List[str], extra_fields: List[str] = None):
+        self.service = service
+        self.title_field = title_field
+        # Frontend path, formatted with the document (e.g. "/insights/{slug}").
+        self.url = url
+        # Fields searched for highlight snippets, in display priority order.
+        self.fields = fields
+        self.projection = {field: 1 for field in [title_field] + fields + (extra_fields or [])}
+
+# Result type -> source. Each collection has a weighted text index named
+# "text_search" declared in services/database.py.
+SEARCH_SOURCES: Dict[str, SearchSource] = {
+    "property": SearchSource(
+        properties_db, "villa_number", "/property/{_id}",
+        ["location", "description", "amenities"], ["gallery_images", "price_range"]
+    ),
+    "budget_home": SearchSource(
+        budget_homes_db, "property_name", "/projects/homes-for-every-budget/{_id}",
+        ["location", "property_type", "description"], ["main_image", "price_range"]
+    ),
+    "plot": SearchSource(
+        plots_db, "plot_name", "/projects/plots/{_id}",
+        ["location", "property_type", "description"], ["main_image", "price_range"]
+    ),
+    "blog": SearchSource(
+        blogs_db, "title", "/insights/{slug}",
+        ["excerpt", "tags", "content"], ["slug", "featured_image", "category"]
+    ),
+    "news": SearchSource(
+        news_events_db, "title", "/news",
+        ["excerpt", "content"], ["image_url", "category"]
+    ),
+}
+
+def _terms(query: str) -> List[str]:
+    """Split a query into lowercase words, dropping a plural "s" so "villas" highlights "villa"."""
+    words = re.findall(r"\w+", query.lower())
+    return [word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words]
+
+def highlight(text, terms: List[str]) -> Optional[str]:
+    """Get an HTML-escaped snippet around the first term match, with matches in <mark>."""
+    if isinstance(text, list):
+        text = ", ".join(str(item) for item in text)
+    if not text or not terms:
+        return None
+
+    text = re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", str(text))).strip()
+    pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\w*", re.IGNORECASE)
+    match = pattern.search(text)
+    if not match:
+        return None
+
+    start = max(0, match.start() - SNIPPET_RADIUS)
+    end = min(len(text), match.end() + SNIPPET_RADIUS)
+    snippet = text[start:end]
+
+    parts = []
+    position = 0
+    for found in pattern.finditer(snippet):
+        parts.append(html.escape(snippet[position:found.start()]))
+        parts.append("<mark>" + html.escape(found.group(0)) + "</mark>")
+        position = found.end()
+    parts.append(html.escape(snippet[position:]))
+
+    return ("…" if start > 0 else "") + "".join(parts) + ("…" if end < len(text) else "")
+
+async def search_site(query: str, types: List[str] = None, limit: int = 10) -> List[dict]:
+    """Search every source concurrently and merge the hits by relevance."""
+    types = types or list(SEARCH_SOURCES)
+    sources = [(name, SEARCH_SOURCES[name]) for name in types]
+    terms = _terms(query)
+
+    batches = await asyncio.gather(*[
+        source.service.text_search(query, filters={"active": True}, limit=limit, projection=source.projection)
+        for _, source in sources
+    ])
+
+    results = []
+    for (name, source), documents in zip(sources, batches):
+        for doc in documents:
+            highlights = {}
+            for field in [source.title_field] + source.fields:
+                snippet = highlight(doc.get(field), terms)
+                if snippet:
+                    highlights[field] = snippet
+
+            results.append({
+                "type": name,
+                "id": doc["_id"],
+                "title": doc.get(source.title_field, ""),
+                "url": source.url.format_map({key: doc.get(key, "") for key in ("_id", "slug")}),
+                "score": doc.get("score", 0),
+                "highlights": highlights,
+                "document": {key: value for key, value in doc.items() if key not in source.fields and key != "score"},
+            })
+
+    results.sort(key=lambda result: result["score"], reverse=True)
+    return results[:limit]
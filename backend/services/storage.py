@@ -0,0 +1,260 @@
+"""
+Where uploaded files live
+
+Uploads go through a Storage backend chosen by STORAGE_BACKEND:
+
+- "local" (default): a directory on the API host (UPLOAD_DIR), served by
+  services/upload_server.py under /uploads. Fine for a single replica.
+- "s3": an S3-compatible bucket (AWS S3, MinIO, ...) via boto3. Any replica
+  can read and write every file, clients are given presigned POSTs to
+  upload straight to the bucket, and files are served from the bucket
+  (or a CDN in front of it, S3_PUBLIC_URL).
+
+tests/standins/s3_standin.py is a local S3-compatible server for testing
+the s3 backend without a bucket.
+"""
+from typing import List, Optional
+from services.upload_server import HASHED_NAME, IMMUTABLE_CACHE_CONTROL, UPLOAD_CACHE_SECONDS
+import asyncio
+import hashlib
+import mimetypes
+import os
+import shutil
+
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', '/app/backend/uploads')
+
+S3_BUCKET = os.environ.get('S3_BUCKET', '')
+S3_PREFIX = os.environ.get('S3_PREFIX', 'uploads/')
+S3_REGION = os.environ.get('S3_REGION', 'us-east-1')
+# Set for MinIO, the stand-in or any other non-AWS endpoint
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None
+# Base URL clients load files from; defaults to the bucket's own URL
+S3_PUBLIC_URL = os.environ.get('S3_PUBLIC_URL', '')
+S3_PRESIGN_SECONDS = int(os.environ.get('S3_PRESIGN_SECONDS', '900'))
+
+COPY_CHUNK_BYTES = 1024 * 1024
+
+def cache_control_for(name: str) -> str:
+    return IMMUTABLE_CACHE_CONTROL if HASHED_NAME.match(name) else f"public, max-age={UPLOAD_CACHE_SECONDS}"
+
+class Storage:
+    """A flat namespace of files, addressed by name."""
+
+    # Whether gzip copies (name.gz) are served to clients that accept them
+    serves_precompressed = False
+    # Whether presign_upload() is available
+    direct_uploads = False
+
+    @property
+    def base_url(self) -> str:
+        raise NotImplementedError
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+    async def put_file(self, local_path: str, name: str, content_type: Optional[str] = None):
+        """Store a local file under name; the local file is consumed."""
+        raise NotImplementedError
+
+    async def get_file(self, name: str, local_path: str):
+        """Copy a stored file to a local path."""
+        raise NotImplementedError
+
+    async def size(self, name: str) -> Optional[int]:
+        """Size in bytes, or None when there is no such file."""
+        raise NotImplementedError
+
+    async def exists(self, name: str) -> bool:
+        return await self.size(name) is not None
+
+    async def hash_file(self, name: str) -> str:
+        """SHA-256 of a stored file."""
+        raise NotImplementedError
+
+    async def move(self, source: str, name: str, content_type: Optional[str] = None):
+        """Rename a stored file."""
+        raise NotImplementedError
+
+    async def delete(self, name: str):
+        raise NotImplementedError
+
+    async def list(self, prefix: str = "") -> List[str]:
+        """Names of stored files starting with prefix."""
+        raise NotImplementedError
+
+    async def presign_upload(self, name: str, content_type: str, size: int) -> dict:
+        """Let a client upload one file directly: returns {url, fields} for a form POST."""
+        raise NotImplementedError
+
+class LocalStorage(Storage):
+    serves_precompressed = True
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @property
+    def base_url(self) -> str:
+        backend_url = os.environ.get('BACKEND_URL')
+        return f"{backend_url}/uploads" if backend_url else "/uploads"
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    async def put_file(self, local_path: str, name: str, content_type: Optional[str] = None):
+        os.makedirs(self.directory, exist_ok=True)
+        # shutil.move renames within a filesystem and copies across them.
+        await asyncio.to_thread(shutil.move, local_path, self.path(name))
+
+    async def get_file(self, name: str, local_path: str):
+        await asyncio.to_thread(shutil.copyfile, self.path(name), local_path)
+
+    async def size(self, name: str) -> Optional[int]:
+        try:
+            return (await asyncio.to_thread(os.stat, self.path(name))).st_size
+        except FileNotFoundError:
+            return None
+
+    async def hash_file(self, name: str) -> str:
+        def digest():
+            hasher = hashlib.sha256()
+            with open(self.path(name), "rb") as f:
+                for chunk in iter(lambda: f.read(COPY_CHUNK_BYTES), b""):
+                    hasher.update(chunk)
+            return hasher.hexdigest()
+        return await asyncio.to_thread(digest)
+
+    async def move(self, source: str, name: str, content_type: Optional[str] = None):
+        await asyncio.to_thread(os.replace, self.path(source), self.path(name))
+
+    async def delete(self, name: str):
+        try:
+            await asyncio.to_thread(os.remove, self.path(name))
+        except FileNotFoundError:
+            pass
+
+    async def list(self, prefix: str = "") -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [name for name in await asyncio.to_thread(os.listdir, self.directory) if name.startswith(prefix)]
+
+class S3Storage(Storage):
+    direct_uploads = True
+
+    def __init__(self, bucket: str, prefix: str = S3_PREFIX, region: str = S3_REGION,
+                 endpoint_url: Optional[str] = S3_ENDPOINT_URL, public_url: str = S3_PUBLIC_URL):
+        import boto3
+        from botocore.config import Config
+
+        if not bucket:
+            raise ValueError("S3_BUCKET is required for the s3 storage backend")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.public_url = public_url.rstrip("/")
+        config = Config(
+            region_name=region,
+            signature_version="s3v4",
+            max_pool_connections=20,
+            # Path-style URLs and checksums only where required keep
+            # non-AWS servers (MinIO, the stand-in) compatible.
+            s3={"addressing_style": "path" if endpoint_url else "auto"},
+            request_checksum_calculation="when_required" if endpoint_url else "when_supported",
+            response_checksum_validation="when_required" if endpoint_url else "when_supported",
+        )
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, config=config)
+
+    def key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    @property
+    def base_url(self) -> str:
+        if self.public_url:
+            return self.public_url
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{self.prefix}".rstrip("/")
+        return f"https://{self.bucket}.s3.amazonaws.com/{self.prefix}".rstrip("/")
+
+    async def put_file(self, local_path: str, name: str, content_type: Optional[str] = None):
+        extra = {
+            "ContentType": content_type or mimetypes.guess_type(name)[0] or "application/octet-stream",
+            "CacheControl": cache_control_for(name),
+        }
+        # upload_file switches to a multipart upload for large files.
+        await asyncio.to_thread(self.client.upload_file, local_path, self.bucket, self.key(name), ExtraArgs=extra)
+        await asyncio.to_thread(os.remove, local_path)
+
+    async def get_file(self, name: str, local_path: str):
+        await asyncio.to_thread(self.client.download_file, self.bucket, self.key(name), local_path)
+
+    async def size(self, name: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=self.key(name))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return head["ContentLength"]
+
+    async def hash_file(self, name: str) -> str:
+        def digest():
+            hasher = hashlib.sha256()
+            body = self.client.get_object(Bucket=self.bucket, Key=self.key(name))["Body"]
+            for chunk in body.iter_chunks(COPY_CHUNK_BYTES):
+                hasher.update(chunk)
+            return hasher.hexdigest()
+        return await asyncio.to_thread(digest)
+
+    async def move(self, source: str, name: str, content_type: Optional[str] = None):
+        # Server-side copy (uploads stay well under its 5 GB limit): the
+        # bytes never pass through the API.
+        await asyncio.to_thread(
+            self.client.copy_object,
+            Bucket=self.bucket,
+            Key=self.key(name),
+            CopySource={"Bucket": self.bucket, "Key": self.key(source)},
+            ContentType=content_type or mimetypes.guess_type(name)[0] or "application/octet-stream",
+            CacheControl=cache_control_for(name),
+            MetadataDirective="REPLACE",
+        )
+        await self.delete(source)
+
+    async def delete(self, name: str):
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=self.key(name))
+
+    async def list(self, prefix: str = "") -> List[str]:
+        def list_keys():
+            names = []
+            paginator = self.client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self.key(prefix)):
+                names.extend(item["Key"][len(self.prefix):] for item in page.get("Contents", []))
+            return names
+        return await asyncio.to_thread(list_keys)
+
+    async def presign_upload(self, name: str, content_type: str, size: int) -> dict:
+        # The policy pins the key, type and exact size, so the form cannot be
+        # reused for another file.
+        cache_control = cache_control_for(name)
+        return await asyncio.to_thread(
+            self.client.generate_presigned_post,
+            Bucket=self.bucket,
+            Key=self.key(name),
+            Fields={"Content-Type": content_type, "Cache-Control": cache_control},
+            Conditions=[
+                {"Content-Type": content_type},
+                {"Cache-Control": cache_control},
+                ["content-length-range", size, size],
+            ],
+            ExpiresIn=S3_PRESIGN_SECONDS,
+        )
+
+def get_storage() -> Storage:
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(S3_BUCKET)
+    if STORAGE_BACKEND == "local":
+        return LocalStorage(UPLOAD_DIR)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+storage = get_storage()
@@ -0,0 +1,197 @@
+"""
+Reference counting and garbage collection for uploaded files
+
+Uploads are stored under their content hash (services/uploads.py), so one
+file can back many documents. A write listener on every content
+collection records which documents mention which stored file (by the
+hash in its name, under any storage URL) in upload_refs and keeps
+ref_count on the upload record current.
+
+collect_garbage() deletes files nothing references. It re-scans the
+content collections rather than trusting the counters alone, and only
+considers files uploaded more than UPLOAD_GC_GRACE_HOURS ago, so a file
+uploaded for a form that has not been saved yet is kept.
+
+From backend/:
+    python -m services.upload_refs [--delete]
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Set
+from services.bootstrap import register
+from services.database import DatabaseService, upload_refs_db, uploads_db
+from services.storage import storage
+import asyncio
+import logging
+import os
+import re
+import sys
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_GC_GRACE_HOURS = float(os.environ.get('UPLOAD_GC_GRACE_HOURS', '24'))
+
+# The hash in a stored file name or one of its variants (<hash>.jpg,
+# <hash>-640w.webp, <hash>-thumb.webp), whatever URL it is under: the local
+# /uploads/ path, an S3 bucket, a CDN (S3_PUBLIC_URL) or none at all.
+STORED_NAME = re.compile(r"(?<![0-9A-Za-z])([0-9a-f]{64})(?![0-9A-Za-z])")
+
+# Collections that hold bookkeeping rather than content
+UNTRACKED = {"uploads", "upload_sessions", "upload_refs", "jobs", "geo_cache", "admin_users", "bootstrap"}
+
+def tracked_services() -> Dict[str, DatabaseService]:
+    return {
+        name: service for name, service in DatabaseService.registry.items()
+        if name not in UNTRACKED
+    }
+
+def referenced_hashes(value) -> Set[str]:
+    """Hashes of every stored upload named anywhere in a document."""
+    hashes: Set[str] = set()
+    if isinstance(value, str):
+        if len(value) >= 64:
+            hashes.update(STORED_NAME.findall(value))
+    elif isinstance(value, dict):
+        for item in value.values():
+            hashes |= referenced_hashes(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            hashes |= referenced_hashes(item)
+    return hashes
+
+async def _recount(hashes: Iterable[str]):
+    for sha256 in hashes:
+        count = await upload_refs_db.collection.count_documents({"sha256": sha256})
+        await uploads_db.collection.update_many({"sha256": sha256}, {"$set": {"ref_count": count}})
+    uploads_db.invalidate()
+
+async def sync_document_refs(collection: str, doc_id: str):
+    """Bring the reference rows of one document in line with its content."""
+    service = DatabaseService.registry[collection]
+    document = await service.get_by_id(doc_id)
+    current = referenced_hashes(document) if document else set()
+
+    previous = set()
+    async for ref in upload_refs_db.collection.find({"collection": collection, "doc_id": doc_id}, {"sha256": 1}):
+        previous.add(ref["sha256"])
+    if current == previous:
+        return
+
+    removed = previous - current
+    if removed:
+        await upload_refs_db.collection.delete_many(
+            {"collection": collection, "doc_id": doc_id, "sha256": {"$in": list(removed)}}
+        )
+    for sha256 in current - previous:
+        await upload_refs_db.collection.update_one(
+            {"sha256": sha256, "collection": collection, "doc_id": doc_id},
+            {"$setOnInsert": {"created_at": datetime.utcnow()}},
+            upsert=True
+        )
+    upload_refs_db.invalidate()
+    await _recount(removed | (current - previous))
+
+def _make_listener(collection: str):
+    async def on_write(action: str, doc_id: str):
+        await sync_document_refs(collection, doc_id)
+    return on_write
+
+def _register_listeners():
+    for name, service in tracked_services().items():
+        service.add_listener(_make_listener(name))
+
+_register_listeners()
+
+async def _stored_files(sha256: str) -> Dict[str, int]:
+    """The stored file plus everything generated from it (variants, gzip copy), with sizes."""
+    # All of them are named <hash>... in the storage backend.
+    sizes = {}
+    for name in await storage.list(sha256):
+        size = await storage.size(name)
+        if size is not None:
+            sizes[name] = size
+    return sizes
+
+async def rebuild_refs() -> Dict[str, int]:
+    """Re-scan every content collection and rewrite upload_refs from scratch.
+
+    Returns the reference count per hash.
+    """
+    counts: Dict[str, int] = {}
+    seen = set()
+    for name, service in tracked_services().items():
+        async for document in service.collection.find({}):
+            doc_id = str(document["_id"])
+            for sha256 in referenced_hashes(document):
+                counts[sha256] = counts.get(sha256, 0) + 1
+                seen.add((sha256, name, doc_id))
+                await upload_refs_db.collection.update_one(
+                    {"sha256": sha256, "collection": name, "doc_id": doc_id},
+                    {"$setOnInsert": {"created_at": datetime.utcnow()}},
+                    upsert=True
+                )
+    async for ref in upload_refs_db.collection.find({}):
+        if (ref["sha256"], ref["collection"], ref["doc_id"]) not in seen:
+            await upload_refs_db.collection.delete_one({"_id": ref["_id"]})
+    upload_refs_db.invalidate()
+    return counts
+
+@register("upload_refs")
+async def build_upload_refs():
+    """Count references to files uploaded before reference tracking existed."""
+    counts = await rebuild_refs()
+    for sha256, count in counts.items():
+        await uploads_db.collection.update_many({"sha256": sha256}, {"$set": {"ref_count": count}})
+    uploads_db.invalidate()
+    return {"referenced_files": len(counts)}
+
+async def collect_garbage(grace_hours: float = UPLOAD_GC_GRACE_HOURS, dry_run: bool = True) -> dict:
+    """Delete uploaded files that no document references.
+
+    Mark: rebuild the reference table and ref_count from the content
+    collections. Sweep: remove content-addressed uploads with no references
+    whose last upload is older than the grace period, with their variants.
+    Files from before content addressing (random names) are never removed.
+    With dry_run, the bookkeeping is still corrected but no file is
+    deleted; the report lists what would be.
+    """
+    counts = await rebuild_refs()
+    cutoff = datetime.utcnow() - timedelta(hours=grace_hours)
+
+    report = {"scanned": 0, "referenced": 0, "deleted": [], "freed_bytes": 0, "dry_run": dry_run}
+    async for record in uploads_db.collection.find({"sha256": {"$exists": True}}):
+        report["scanned"] += 1
+        sha256 = record["sha256"]
+        count = counts.get(sha256, 0)
+        if count:
+            report["referenced"] += 1
+        if record.get("ref_count") != count:
+            await uploads_db.collection.update_one({"_id": record["_id"]}, {"$set": {"ref_count": count}})
+
+        uploaded_at = record.get("last_uploaded_at") or record.get("created_at")
+        if count or not record["filename"].startswith(sha256) or (uploaded_at and uploaded_at > cutoff):
+            continue
+        # A document saved since the scan started references it after all.
+        if await upload_refs_db.collection.count_documents({"sha256": sha256}, limit=1):
+            continue
+
+        files = await _stored_files(sha256)
+        if not dry_run:
+            await uploads_db.collection.delete_one({"_id": record["_id"]})
+            for name in files:
+                await storage.delete(name)
+        report["freed_bytes"] += sum(files.values())
+        report["deleted"].append(record["filename"])
+
+    uploads_db.invalidate()
+    logger.info(
+        f"Upload GC{' (dry run)' if dry_run else ''}: {len(report['deleted'])} of {report['scanned']} files, "
+        f"{report['freed_bytes']} bytes"
+    )
+    return report
+
+if __name__ == '__main__':
+    result = asyncio.run(collect_garbage(dry_run="--delete" not in sys.argv))
+    for filename in result["deleted"]:
+        print(filename)
+    print(f"{len(result['deleted'])} unreferenced files, {result['freed_bytes']} bytes"
+          f"{' (dry run, pass --delete to remove)' if result['dry_run'] else ' removed'}")
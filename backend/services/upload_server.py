@@ -0,0 +1,230 @@
+"""
+Serving /uploads
+
+A small ASGI app in place of StaticFiles, tuned for the upload directory:
+
+- strong ETags and Last-Modified, with If-None-Match / If-Modified-Since
+  answered by 304 and If-Range honoured;
+- Cache-Control: a year and immutable for content-addressed names (see
+  services/uploads.py), UPLOAD_CACHE_SECONDS for anything else;
+- single byte ranges (206/416), so videos can seek and resume;
+- gzip copies made at upload time (precompress()) served to clients that
+  accept them;
+- zero-copy delivery: the ASGI zerocopysend extension when the server
+  offers it, or, behind nginx, X-Accel-Redirect to an internal location
+  when UPLOAD_ACCEL_REDIRECT is set. Otherwise the file is read in large
+  chunks with os.pread in a worker thread.
+"""
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Optional, Tuple
+import asyncio
+import gzip
+import mimetypes
+import os
+import re
+import stat
+
+UPLOAD_CACHE_SECONDS = int(os.environ.get('UPLOAD_CACHE_SECONDS', '3600'))
+UPLOAD_SEND_CHUNK_BYTES = int(os.environ.get('UPLOAD_SEND_CHUNK_BYTES', str(256 * 1024)))
+# Internal nginx location mapped to the upload directory, e.g. /protected-uploads/
+UPLOAD_ACCEL_REDIRECT = os.environ.get('UPLOAD_ACCEL_REDIRECT', '')
+
+# Content-addressed names (and their variants) never change content.
+HASHED_NAME = re.compile(r"^[0-9a-f]{64}(?![0-9a-f])")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Types worth a gzip copy; images, video and PDF are already compressed.
+COMPRESSIBLE_TYPES = ("text/", "image/svg+xml", "application/json", "application/xml", "application/javascript")
+PRECOMPRESS_MIN_BYTES = 1024
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+def precompress(path: str) -> Optional[str]:
+    """Write path.gz next to a compressible file when it is smaller; returns its path."""
+    if os.path.getsize(path) < PRECOMPRESS_MIN_BYTES:
+        return None
+    with open(path, "rb") as f:
+        data = gzip.compress(f.read(), compresslevel=9, mtime=0)
+    if len(data) >= os.path.getsize(path):
+        return None
+    with open(path + ".gz", "wb") as f:
+        f.write(data)
+    return path + ".gz"
+
+def _is_gzip_copy(name: str) -> bool:
+    """Whether name is a copy written by precompress(), only served as a Content-Encoding."""
+    return name.endswith(".gz") and is_compressible(mimetypes.guess_type(name[:-3])[0] or "")
+
+def make_etag(name: str, st: os.stat_result) -> str:
+    # Hashed names identify their content, so the tag is the same on every
+    # server; other files fall back to modification time and size.
+    if HASHED_NAME.match(name):
+        return f'"{os.path.splitext(name)[0]}-{st.st_size:x}"'
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+def _etag_list(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def _weak_match(tags: List[str], etags: List[str]) -> Optional[str]:
+    """The first of etags that tags match (weak comparison), if any."""
+    if "*" in tags:
+        return etags[0]
+    tags = {tag.removeprefix("W/") for tag in tags}
+    return next((etag for etag in etags if etag in tags), None)
+
+def _not_modified(headers: dict, etags: List[str], mtime: float) -> Optional[str]:
+    """The ETag to answer a 304 with, or None when the client's copy is stale."""
+    if "if-none-match" in headers:
+        return _weak_match(_etag_list(headers["if-none-match"]), etags)
+    if "if-modified-since" in headers:
+        try:
+            if int(mtime) <= parsedate_to_datetime(headers["if-modified-since"]).timestamp():
+                return etags[0]
+        except (TypeError, ValueError):
+            pass
+    return None
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single byte range into inclusive (start, end).
+
+    Returns None for headers this server ignores (multiple ranges, other
+    units) and raises ValueError for a range outside the file.
+    """
+    match = RANGE.match(header.replace(" ", ""))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+class UploadServer:
+    """ASGI app serving files from one flat directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._respond(send, 405, [(b"allow", b"GET, HEAD")], b"Method Not Allowed")
+            return
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        name = path.lstrip("/")
+        if not name or "/" in name or "\\" in name or "\x00" in name or name.startswith(".") or _is_gzip_copy(name):
+            await self._respond(send, 404, [], b"Not Found")
+            return
+        path = os.path.join(self.directory, name)
+        try:
+            st = await asyncio.to_thread(os.stat, path)
+        except (OSError, ValueError):
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            await self._respond(send, 404, [], b"Not Found")
+            return
+
+        request_headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        content_type, encoding = mimetypes.guess_type(name)
+        if encoding:
+            # An uploaded archive (.tar.gz, ...) is served as what it is,
+            # not as its contents without a Content-Encoding.
+            content_type = "application/gzip" if encoding == "gzip" else "application/octet-stream"
+        content_type = content_type or "application/octet-stream"
+        etag = make_etag(name, st)
+        headers = [
+            (b"etag", etag.encode()),
+            (b"last-modified", formatdate(st.st_mtime, usegmt=True).encode()),
+            (b"cache-control", (
+                IMMUTABLE_CACHE_CONTROL if HASHED_NAME.match(name) else f"public, max-age={UPLOAD_CACHE_SECONDS}"
+            ).encode()),
+            (b"accept-ranges", b"bytes"),
+            (b"x-content-type-options", b"nosniff"),
+        ]
+        compressible = is_compressible(content_type)
+        if compressible:
+            headers.append((b"vary", b"Accept-Encoding"))
+
+        # The gzip copy is a different representation, so it has its own tag.
+        gzip_etag = etag[:-1] + '-gz"'
+        matched = _not_modified(request_headers, [etag, gzip_etag] if compressible else [etag], st.st_mtime)
+        if matched:
+            headers[0] = (b"etag", matched.encode())
+            await self._respond(send, 304, headers, b"")
+            return
+
+        if UPLOAD_ACCEL_REDIRECT and scope["method"] == "GET":
+            # nginx sends the file itself (sendfile, ranges) with these headers.
+            target = UPLOAD_ACCEL_REDIRECT.rstrip("/") + "/" + name
+            await self._respond(send, 200, headers + [(b"x-accel-redirect", target.encode())], b"")
+            return
+
+        status, start, length = 200, 0, st.st_size
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        # If-Range: only send the range when the client's copy is current.
+        if range_header and (not if_range or if_range == etag):
+            try:
+                byte_range = parse_range(range_header, st.st_size)
+            except ValueError:
+                await self._respond(send, 416, headers + [(b"content-range", f"bytes */{st.st_size}".encode())], b"")
+                return
+            if byte_range:
+                status, start = 206, byte_range[0]
+                length = byte_range[1] - byte_range[0] + 1
+                headers.append((b"content-range", f"bytes {byte_range[0]}-{byte_range[1]}/{st.st_size}".encode()))
+
+        if status == 200 and compressible and "gzip" in request_headers.get("accept-encoding", ""):
+            try:
+                gz_stat = await asyncio.to_thread(os.stat, path + ".gz")
+                path, length = path + ".gz", gz_stat.st_size
+                headers[0] = (b"etag", gzip_etag.encode())
+                headers.append((b"content-encoding", b"gzip"))
+            except OSError:
+                pass
+
+        headers.append((b"content-type", content_type.encode()))
+        headers.append((b"content-length", str(length).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if scope["method"] == "HEAD" or length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self._send_file(scope, send, path, start, length)
+
+    async def _send_file(self, scope, send, path: str, offset: int, length: int):
+        fd = await asyncio.to_thread(os.open, path, os.O_RDONLY)
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({"type": "http.response.zerocopysend", "file": fd, "offset": offset, "count": length})
+                return
+            end = offset + length
+            while offset < end:
+                chunk = await asyncio.to_thread(os.pread, fd, min(UPLOAD_SEND_CHUNK_BYTES, end - offset), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": offset < end})
+        finally:
+            os.close(fd)
+
+    async def _respond(self, send, status: int, headers: list, body: bytes):
+        if body:
+            headers = headers + [(b"content-type", b"text/plain; charset=utf-8")]
+        if status != 304:
+            headers = headers + [(b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,595 @@
+"""
+Streaming and resumable file uploads
+
+Files are copied to disk in chunks through worker threads, hashed
+(SHA-256) as they stream and checked against per-type size limits as
+bytes arrive, so neither memory nor the event loop is tied up by large
+files. Large gallery batches can use resumable sessions instead: create a
+session with the file's size, send the bytes in any number of PATCH
+requests at the current offset, and resume after a dropped connection by
+asking for the offset again.
+
+Stored files are named by the SHA-256 of their content, so identical
+uploads are kept once and a URL never changes content (safe to cache
+forever). services/upload_refs.py counts references to them and removes
+files nothing uses.
+"""
+from bson import ObjectId
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from typing import AsyncIterator, Optional
+from services.database import upload_sessions_db, uploads_db
+from services.images import clean_upload, process_upload
+from services.storage import UPLOAD_DIR, storage
+from services.upload_server import is_compressible, precompress
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Partial files of resumable sessions and files being processed, outside
+# the publicly served directory
+UPLOAD_TEMP_DIR = os.environ.get('UPLOAD_TEMP_DIR', os.path.join(os.path.dirname(UPLOAD_DIR), 'upload_partials'))
+UPLOAD_CHUNK_BYTES = int(os.environ.get('UPLOAD_CHUNK_BYTES', str(1024 * 1024)))
+UPLOAD_SESSION_HOURS = float(os.environ.get('UPLOAD_SESSION_HOURS', '24'))
+UPLOAD_WRITE_LOCK_SECONDS = float(os.environ.get('UPLOAD_WRITE_LOCK_SECONDS', '600'))
+# Partial files younger than this are never removed as orphans
+UPLOAD_PARTIAL_GRACE_HOURS = float(os.environ.get('UPLOAD_PARTIAL_GRACE_HOURS', '1'))
+# Prefix of everything in UPLOAD_TEMP_DIR that is not a session's partial
+# file (named by the session id); remove_orphaned_partials() skips them.
+WORK_PREFIX = "work-"
+# Where direct uploads land before the file is verified and named by its hash
+INCOMING_PREFIX = "incoming/"
+
+MB = 1024 * 1024
+
+# Content type prefix -> maximum size in bytes; the first matching prefix wins.
+UPLOAD_LIMITS = [
+    ("image/", int(float(os.environ.get('UPLOAD_MAX_IMAGE_MB', '20')) * MB)),
+    ("video/", int(float(os.environ.get('UPLOAD_MAX_VIDEO_MB', '500')) * MB)),
+    ("application/pdf", int(float(os.environ.get('UPLOAD_MAX_DOCUMENT_MB', '25')) * MB)),
+    ("", int(float(os.environ.get('UPLOAD_MAX_OTHER_MB', '10')) * MB)),
+]
+MAX_UPLOAD_BYTES = max(limit for _, limit in UPLOAD_LIMITS)
+# Non-file fields sent along with an upload form
+MAX_FORM_FIELD_BYTES = 64 * 1024
+
+def content_type_for(filename: str, declared: Optional[str] = None) -> str:
+    """Use the declared content type, falling back to the file extension."""
+    if declared and declared != "application/octet-stream":
+        return declared
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+def size_limit(content_type: str) -> int:
+    return next(limit for prefix, limit in UPLOAD_LIMITS if content_type.startswith(prefix))
+
+def _too_large(content_type: str) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large: {content_type} uploads are limited to {size_limit(content_type) // MB} MB"
+    )
+
+async def write_stream(chunks: AsyncIterator[bytes], path: str, limit: int, content_type: str, mode: str = "wb", hasher=None) -> int:
+    """Write chunks to path via a worker thread; returns the bytes written.
+
+    Raises 413 as soon as the running total passes limit. hasher, when
+    given, is updated with every chunk.
+    """
+    f = await asyncio.to_thread(open, path, mode)
+    written = 0
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            written += len(chunk)
+            if written > limit:
+                raise _too_large(content_type)
+            if hasher is not None:
+                hasher.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+    return written
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def stored_filename(sha256: str, original: str) -> str:
+    """Content-addressed name: the SHA-256 of the uploaded bytes plus the original extension."""
+    extension = original.rsplit('.', 1)[-1].lower() if '.' in original else ''
+    return f"{sha256}.{extension}" if extension else sha256
+
+def _response(record: dict, deduplicated: bool = False) -> dict:
+    return {
+        "file_url": storage.url(record["filename"]),
+        "filename": record["filename"],
+        "content_type": record["content_type"],
+        "size": record["size"],
+        "sha256": record["sha256"],
+        "image": record.get("image"),
+        "deduplicated": deduplicated,
+    }
+
+def _has_variants(content_type: str) -> bool:
+    return content_type.startswith("image/") and content_type != "image/svg+xml"
+
+async def _record(filename: str, sha256: str, size: int, content_type: str, original_sha256: Optional[str] = None) -> dict:
+    now = datetime.utcnow()
+    record = {
+        "filename": filename,
+        "sha256": sha256,
+        "size": size,
+        "content_type": content_type,
+    }
+    update = {"$set": {**record, "last_uploaded_at": now}, "$setOnInsert": {"created_at": now, "ref_count": 0}}
+    if original_sha256:
+        update["$addToSet"] = {"original_sha256s": original_sha256}
+    await uploads_db.collection.update_one({"filename": filename}, update, upsert=True)
+    uploads_db.invalidate()
+    return record
+
+async def _existing(sha256: str) -> Optional[dict]:
+    """The stored upload with this content, or cleaned from an upload with this content."""
+    existing = await uploads_db.get_one({"$or": [{"sha256": sha256}, {"original_sha256s": sha256}]})
+    if existing and await storage.exists(existing["filename"]):
+        # Restart the garbage collection grace period for the re-uploaded file.
+        await uploads_db.set_derived(existing["_id"], {"last_uploaded_at": datetime.utcnow()})
+        return _response(existing, deduplicated=True)
+    return None
+
+async def _store(temp_path: str, original_filename: str, content_type: str, size: int, sha256: str) -> dict:
+    """Move a fully received file into storage under its content hash.
+
+    A file whose content is already stored is not stored again: the
+    temporary copy is dropped and the existing upload is returned, so a
+    photo used on several listings is stored once. Images are cleaned
+    (services/images.py) first and named by the hash of the cleaned bytes;
+    the hash of what was uploaded is kept in original_sha256s so the same
+    photo uploaded again is recognised before it is processed.
+    """
+    existing = await _existing(sha256)
+    if existing:
+        await asyncio.to_thread(_remove, temp_path)
+        return existing
+
+    # The file and its variants are prepared in a private working
+    # directory, then everything in it is handed to the storage backend.
+    work_dir = await asyncio.to_thread(tempfile.mkdtemp, prefix=WORK_PREFIX, dir=UPLOAD_TEMP_DIR)
+    try:
+        path = os.path.join(work_dir, stored_filename("upload", original_filename))
+        await asyncio.to_thread(os.replace, temp_path, path)
+        original_sha256 = None
+        if _has_variants(content_type) and await clean_upload(path):
+            original_sha256 = sha256
+            sha256 = await asyncio.to_thread(_hash_file, path)
+            size = await asyncio.to_thread(os.path.getsize, path)
+            existing = await _existing(sha256)
+            if existing:
+                await _record(existing["filename"], existing["sha256"], existing["size"], existing["content_type"], original_sha256)
+                return existing
+
+        filename = stored_filename(sha256, original_filename)
+        record = await _record(filename, sha256, size, content_type, original_sha256)
+        await asyncio.to_thread(os.replace, path, os.path.join(work_dir, filename))
+        path = os.path.join(work_dir, filename)
+        if storage.serves_precompressed and is_compressible(content_type):
+            # Served to clients that accept gzip (services/upload_server.py)
+            await asyncio.to_thread(precompress, path)
+        if _has_variants(content_type):
+            # Resized WebP/AVIF variants and a thumbnail, stored on the record
+            record["image"] = await process_upload(path, storage.base_url)
+        # The original goes last: once it exists, so do its variants.
+        names = sorted(await asyncio.to_thread(os.listdir, work_dir), key=lambda name: name == filename)
+        for name in names:
+            await storage.put_file(os.path.join(work_dir, name), name, content_type if name == filename else None)
+    finally:
+        await asyncio.to_thread(shutil.rmtree, work_dir, True)
+    return _response(record)
+
+class _MultipartFile:
+    """Collects the events of a streaming multipart parser for one request.
+
+    Parser callbacks are synchronous, so they only record what arrived;
+    save_multipart_upload() acts on it (opening the file, writing through a
+    thread) after each chunk of the body.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.header_field = b""
+        self.header_value = b""
+        self.headers = {}
+        self.in_file = False
+        self.filename = None
+        self.content_type = None
+        self.started = False  # the file part's headers arrived
+        self.finished = False
+        self.data = bytearray()
+        self.other_bytes = 0
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": lambda data, start, end: self._append("header_field", data[start:end]),
+            "on_header_value": lambda data, start, end: self._append("header_value", data[start:end]),
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def _append(self, name: str, data: bytes):
+        setattr(self, name, getattr(self, name) + data)
+        self.other_bytes += len(data)
+
+    def on_part_begin(self):
+        self.headers = {}
+
+    def on_header_end(self):
+        self.headers[self.header_field.decode("latin-1").lower()] = self.header_value.decode("latin-1")
+        self.header_field = self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get("content-disposition", ""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        # Only the first file part is kept; other fields are skipped.
+        self.in_file = name == self.field and filename is not None and not self.started
+        if self.in_file:
+            self.started = True
+            self.filename = os.path.basename(filename.decode("utf-8", "replace").replace("\\", "/"))
+            self.content_type = content_type_for(self.filename, self.headers.get("content-type"))
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.in_file:
+            self.data += data[start:end]
+        else:
+            self.other_bytes += end - start
+
+    def on_part_end(self):
+        if self.in_file:
+            self.in_file = False
+            self.finished = True
+
+async def save_multipart_upload(request, field: str = "file") -> dict:
+    """Stream the file of a multipart/form-data request into storage.
+
+    Parses the request body as it arrives instead of letting the framework
+    spool the whole form first, so the file's per-type size limit applies
+    from the first byte: an oversized image is refused after 20 MB have
+    been read, not after the whole body was written to disk.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    os.makedirs(UPLOAD_TEMP_DIR, exist_ok=True)
+    temp_path = _work_path()
+    form = _MultipartFile(field)
+    parser = MultipartParser(boundary, form.callbacks())
+    hasher = hashlib.sha256()
+    f = None
+    size = 0
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if form.other_bytes > MAX_FORM_FIELD_BYTES:
+                raise HTTPException(status_code=413, detail="Form fields too large")
+            if form.started and f is None:
+                f = await asyncio.to_thread(open, temp_path, "wb")
+            if form.data:
+                size += len(form.data)
+                if size > size_limit(form.content_type):
+                    raise _too_large(form.content_type)
+                data = bytes(form.data)
+                form.data.clear()
+                hasher.update(data)
+                await asyncio.to_thread(f.write, data)
+        parser.finalize()
+        if not form.finished or not form.filename:
+            raise HTTPException(status_code=400, detail="No file selected")
+    except BaseException as e:
+        if f is not None:
+            await asyncio.to_thread(f.close)
+        await asyncio.to_thread(_remove, temp_path)
+        if isinstance(e, FormParserError):
+            raise HTTPException(status_code=400, detail="Malformed multipart body") from e
+        raise
+    await asyncio.to_thread(f.close)
+    return await _store(temp_path, form.filename, form.content_type, size, hasher.hexdigest())
+
+def _work_path() -> str:
+    return os.path.join(UPLOAD_TEMP_DIR, WORK_PREFIX + uuid.uuid4().hex)
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+# Resumable sessions
+
+async def create_session(filename: str, size: int, content_type: Optional[str] = None, sha256: Optional[str] = None) -> dict:
+    """Start a resumable upload of a file of known size."""
+    content_type = content_type_for(filename, content_type)
+    if size > size_limit(content_type):
+        raise _too_large(content_type)
+
+    os.makedirs(UPLOAD_TEMP_DIR, exist_ok=True)
+    now = datetime.utcnow()
+    session = {
+        "original_filename": filename,
+        "content_type": content_type,
+        "size": size,
+        "expected_sha256": sha256.lower() if sha256 else None,
+        "offset": 0,
+        "status": "open",
+        "created_at": now,
+        "expires_at": now + timedelta(hours=UPLOAD_SESSION_HOURS),
+    }
+    session_id = await upload_sessions_db.create(session)
+    await asyncio.to_thread(lambda: open(_partial_path(session_id), "wb").close())
+    return await get_session(session_id)
+
+def _partial_path(session_id: str) -> str:
+    return os.path.join(UPLOAD_TEMP_DIR, session_id)
+
+async def get_session(session_id: str) -> dict:
+    session = await upload_sessions_db.get_by_id(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return {
+        "upload_id": session["_id"],
+        "status": session["status"],
+        "offset": session["offset"],
+        "size": session["size"],
+        "chunk_size": UPLOAD_CHUNK_BYTES,
+        "expires_at": session["expires_at"],
+        "result": session.get("result"),
+    }
+
+async def append_to_session(session_id: str, offset: int, chunks: AsyncIterator[bytes]) -> dict:
+    """Append one request's bytes at offset; completes the upload at the last byte."""
+    session = await upload_sessions_db.get_by_id(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if session["status"] == "complete":
+        raise HTTPException(status_code=409, detail="Upload is already complete")
+    if offset != session["offset"]:
+        raise HTTPException(status_code=409, detail=f"Offset mismatch, resume from {session['offset']}")
+
+    # Claim the session so two requests cannot append at once; a claim left
+    # by a crashed worker lapses after UPLOAD_WRITE_LOCK_SECONDS.
+    now = datetime.utcnow()
+    claimed = await upload_sessions_db.collection.find_one_and_update(
+        {
+            "_id": ObjectId(session_id),
+            "offset": offset,
+            "$or": [
+                {"status": "open"},
+                {"status": "writing", "writing_since": {"$lt": now - timedelta(seconds=UPLOAD_WRITE_LOCK_SECONDS)}},
+            ],
+        },
+        {"$set": {"status": "writing", "writing_since": now}}
+    )
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Another request is writing to this upload")
+    # Drop any bytes past the recorded offset (from a crashed writer).
+    await asyncio.to_thread(_truncate, _partial_path(session_id), offset)
+
+    remaining = session["size"] - offset
+    written = 0
+    try:
+        written = await write_stream(chunks, _partial_path(session_id), remaining, session["content_type"], mode="ab")
+    except HTTPException as e:
+        if e.status_code == 413:
+            e.detail = "More bytes than the declared upload size"
+        await _truncate_and_reopen(session_id, offset)
+        raise
+    except BaseException:
+        # Dropped connection: keep what arrived so the client can resume.
+        written = await asyncio.to_thread(os.path.getsize, _partial_path(session_id)) - offset
+        await upload_sessions_db.set_derived(session_id, {"status": "open", "offset": offset + written})
+        raise
+
+    offset += written
+    if offset < session["size"]:
+        await upload_sessions_db.set_derived(session_id, {"status": "open", "offset": offset})
+        return await get_session(session_id)
+
+    return await _complete_session(session_id, session)
+
+def _truncate(path: str, size: int):
+    with open(path, "r+b") as f:
+        f.truncate(size)
+
+async def _truncate_and_reopen(session_id: str, offset: int):
+    await asyncio.to_thread(_truncate, _partial_path(session_id), offset)
+    await upload_sessions_db.set_derived(session_id, {"status": "open", "offset": offset})
+
+async def _complete_session(session_id: str, session: dict) -> dict:
+    partial = _partial_path(session_id)
+    try:
+        sha256 = await asyncio.to_thread(_hash_file, partial)
+        if session.get("expected_sha256") and sha256 != session["expected_sha256"]:
+            await _truncate_and_reopen(session_id, 0)
+            raise HTTPException(status_code=422, detail="Checksum mismatch, the upload was reset")
+        result = await _store(partial, session["original_filename"], session["content_type"], session["size"], sha256)
+    except BaseException:
+        await _reopen_at_partial(session_id)
+        raise
+    await upload_sessions_db.set_derived(session_id, {"status": "complete", "offset": session["size"], "result": result})
+    return await get_session(session_id)
+
+async def _reopen_at_partial(session_id: str):
+    """Release a session after a failed completion, at the bytes still on disk.
+
+    _store() may already have moved the partial file away; the client then
+    starts over from offset 0.
+    """
+    partial = _partial_path(session_id)
+    try:
+        offset = await asyncio.to_thread(os.path.getsize, partial)
+    except FileNotFoundError:
+        await asyncio.to_thread(lambda: open(partial, "wb").close())
+        offset = 0
+    await upload_sessions_db.set_derived(session_id, {"status": "open", "offset": offset})
+
+async def abort_session(session_id: str) -> bool:
+    deleted = await upload_sessions_db.delete_by_id(session_id)
+    await asyncio.to_thread(_remove, _partial_path(session_id))
+    return deleted
+
+def _orphan(session: Optional[dict], now: datetime) -> bool:
+    return not session or session["expires_at"] < now
+
+def _older_than(path: str, cutoff: float) -> bool:
+    try:
+        return os.path.getmtime(path) < cutoff
+    except FileNotFoundError:
+        return False
+
+async def remove_orphaned_partials():
+    """Delete partial files and direct uploads whose session has expired or been removed.
+
+    Only files named by a session id are considered, and only once they
+    have not been written to for UPLOAD_PARTIAL_GRACE_HOURS, so uploads in
+    progress on other workers (and their WORK_PREFIX files) are left alone.
+    """
+    now = datetime.utcnow()
+    if os.path.isdir(UPLOAD_TEMP_DIR):
+        cutoff = time.time() - UPLOAD_PARTIAL_GRACE_HOURS * 3600
+        for name in await asyncio.to_thread(os.listdir, UPLOAD_TEMP_DIR):
+            path = os.path.join(UPLOAD_TEMP_DIR, name)
+            if not ObjectId.is_valid(name) or not await asyncio.to_thread(_older_than, path, cutoff):
+                continue
+            if _orphan(await upload_sessions_db.get_by_id(name, projection={"expires_at": 1}), now):
+                await asyncio.to_thread(_remove, path)
+    if storage.direct_uploads:
+        for name in await storage.list(INCOMING_PREFIX):
+            session_id = name[len(INCOMING_PREFIX):]
+            if ObjectId.is_valid(session_id) and _orphan(
+                await upload_sessions_db.get_by_id(session_id, projection={"expires_at": 1}), now
+            ):
+                await storage.delete(name)
+
+# Direct uploads
+
+async def create_direct_upload(filename: str, size: int, content_type: Optional[str] = None, sha256: Optional[str] = None) -> dict:
+    """Start an upload that goes straight to the storage bucket.
+
+    Returns the session with a presigned form (upload.url, upload.fields)
+    for an incoming/ object; the client POSTs the file there and then
+    calls complete_direct_upload(). Content that is already stored is
+    returned as a completed upload without a form.
+    """
+    if not storage.direct_uploads:
+        raise HTTPException(status_code=400, detail="Direct uploads need the s3 storage backend")
+    if not sha256:
+        raise HTTPException(status_code=400, detail="sha256 of the file is required for direct uploads")
+    content_type = content_type_for(filename, content_type)
+    if size > size_limit(content_type):
+        raise _too_large(content_type)
+
+    existing = await _existing(sha256.lower())
+    if existing:
+        return {"upload_id": None, "status": "complete", "offset": size, "size": size, "result": existing}
+
+    now = datetime.utcnow()
+    session_id = await upload_sessions_db.create({
+        "original_filename": filename,
+        "content_type": content_type,
+        "size": size,
+        "expected_sha256": sha256.lower(),
+        "direct": True,
+        "offset": 0,
+        "status": "open",
+        "created_at": now,
+        "expires_at": now + timedelta(hours=UPLOAD_SESSION_HOURS),
+    })
+    form = await storage.presign_upload(INCOMING_PREFIX + session_id, content_type, size)
+    return {**await get_session(session_id), "upload": form}
+
+async def complete_direct_upload(session_id: str) -> dict:
+    """Verify a file uploaded to the bucket and store it under its hash."""
+    session = await upload_sessions_db.get_by_id(session_id)
+    if not session or not session.get("direct"):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if session["status"] == "complete":
+        return await get_session(session_id)
+
+    incoming = INCOMING_PREFIX + session_id
+    size = await storage.size(incoming)
+    if size is None:
+        raise HTTPException(status_code=409, detail="The file has not been uploaded yet")
+    claimed = await upload_sessions_db.collection.find_one_and_update(
+        {"_id": ObjectId(session_id), "status": "open"},
+        {"$set": {"status": "writing", "writing_since": datetime.utcnow()}}
+    )
+    if not claimed:
+        raise HTTPException(status_code=409, detail="This upload is already being completed")
+
+    content_type = session["content_type"]
+    try:
+        if _has_variants(content_type):
+            # Variants are made from a local copy.
+            await asyncio.to_thread(os.makedirs, UPLOAD_TEMP_DIR, exist_ok=True)
+            path = _work_path()
+            await storage.get_file(incoming, path)
+            sha256 = await asyncio.to_thread(_hash_file, path)
+        else:
+            # Everything else stays in the bucket: hashed as it streams, then moved.
+            path = None
+            sha256 = await storage.hash_file(incoming)
+
+        if sha256 != session["expected_sha256"]:
+            if path:
+                await asyncio.to_thread(_remove, path)
+            await storage.delete(incoming)
+            await upload_sessions_db.set_derived(session_id, {"status": "open"})
+            raise HTTPException(status_code=422, detail="Checksum mismatch, upload the file again")
+
+        if path:
+            result = await _store(path, session["original_filename"], content_type, size, sha256)
+            await storage.delete(incoming)
+        else:
+            result = await _existing(sha256)
+            if result:
+                await storage.delete(incoming)
+            else:
+                filename = stored_filename(sha256, session["original_filename"])
+                await storage.move(incoming, filename, content_type)
+                result = _response(await _record(filename, sha256, size, content_type))
+    except BaseException:
+        await upload_sessions_db.set_derived(session_id, {"status": "open"})
+        raise
+
+    await upload_sessions_db.set_derived(session_id, {"status": "complete", "offset": size, "result": result})
+    return await get_session(session_id)
+
+async def reject_oversized_uploads(request, call_next):
+    """HTTP middleware: refuse upload requests whose Content-Length exceeds every limit.
+
+    Runs before the body is read. It only knows the largest limit; the
+    per-type limits are applied while the body streams in
+    (save_multipart_upload, append_to_session).
+    """
+    length = request.headers.get("content-length")
+    if request.url.path.startswith("/api/admin/upload") and length and length.isdigit() and int(length) > MAX_UPLOAD_BYTES + MB:
+        return JSONResponse(status_code=413, content={"detail": f"File too large: uploads are limited to {MAX_UPLOAD_BYTES // MB} MB"})
+    return await call_next(request)
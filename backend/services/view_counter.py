@@ -0,0 +1,80 @@
+from collections import defaultdict
+from pymongo.errors import BulkWriteError
+from typing import Dict
+from services.database import DatabaseService, blogs_db
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+VIEW_FLUSH_INTERVAL_SECONDS = float(os.environ.get('VIEW_FLUSH_INTERVAL_SECONDS', '10'))
+
+class ViewCounter:
+    """Buffers per-document view counts in memory and flushes them in bulk.
+
+    Reads call record() instead of writing, and a background task turns the
+    accumulated counts into one bulk $inc every flush interval. Increments
+    are atomic on the server, so concurrent readers and workers never lose
+    counts the way a read-modify-write does.
+    """
+
+    def __init__(self, service: DatabaseService, field: str = "views", interval: float = VIEW_FLUSH_INTERVAL_SECONDS):
+        self.service = service
+        self.field = field
+        self.interval = interval
+        self._pending: Dict[str, int] = defaultdict(int)
+        self._task = None
+
+    def record(self, doc_id: str):
+        """Count one view of a document."""
+        self._pending[doc_id] += 1
+
+    def pending(self, doc_id: str) -> int:
+        """Views recorded for a document that are not flushed yet."""
+        return self._pending.get(doc_id, 0)
+
+    async def flush(self):
+        """Write the accumulated counts to the database."""
+        if not self._pending:
+            return
+        deltas, self._pending = self._pending, defaultdict(int)
+        try:
+            await self.service.increment_many(self.field, deltas)
+        except BulkWriteError as e:
+            # The other increments were applied; keep only the failed ones
+            # so the next flush does not count them twice.
+            failed = e.details.get("writeErrors", [])
+            for error in failed:
+                doc_id = str(error["op"]["q"]["_id"])
+                self._pending[doc_id] += deltas[doc_id]
+            logger.error(f"Error flushing {len(failed)} {self.field} counts for {self.service.collection_name}: {e}")
+        except Exception as e:
+            # No per-operation result (e.g. the connection failed): keep
+            # every count for the next flush rather than dropping them.
+            for doc_id, count in deltas.items():
+                self._pending[doc_id] += count
+            logger.error(f"Error flushing {self.field} counts for {self.service.collection_name}: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self):
+        """Start the periodic flush task on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush task and write out whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+blog_views = ViewCounter(blogs_db, "views")
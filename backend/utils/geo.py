@@ -0,0 +1,45 @@
+"""
+Batch great-circle distances and nearest-k selection with NumPy
+"""
+from typing import Optional, Sequence, Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(lat: float, lon: float, lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+    """Distances in km from one point to each of lats/lons."""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lons, dtype=np.float64)) - np.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def nearest(
+    lat: float,
+    lon: float,
+    lats: Sequence[float],
+    lons: Sequence[float],
+    k: int,
+    radius_km: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k points closest to (lat, lon), optionally within radius_km.
+
+    Returns (indices, distances) ordered nearest first. Only the k winners
+    are sorted; argpartition selects them in linear time.
+    """
+    distances = haversine_km(lat, lon, lats, lons)
+    indices = np.arange(len(distances))
+    if radius_km is not None:
+        inside = distances <= radius_km
+        indices = indices[inside]
+        distances = distances[inside]
+
+    if k < len(distances):
+        top = np.argpartition(distances, k)[:k]
+        indices = indices[top]
+        distances = distances[top]
+
+    order = np.argsort(distances, kind="stable")
+    return indices[order], distances[order]
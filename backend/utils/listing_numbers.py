@@ -0,0 +1,115 @@
+"""
+Parse free-text listing prices and areas into numeric ranges
+"""
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Multipliers to rupees
+PRICE_UNITS = {
+    'cr': 10_000_000, 'crs': 10_000_000, 'crore': 10_000_000, 'crores': 10_000_000,
+    'l': 100_000, 'lac': 100_000, 'lacs': 100_000, 'lakh': 100_000, 'lakhs': 100_000,
+    'k': 1_000, 'thousand': 1_000,
+}
+
+# Multipliers to square feet, keyed by the unit with dots/spaces removed
+AREA_UNITS = {
+    'sqft': 1, 'sft': 1, 'sqfeet': 1, 'ft': 1,
+    'sqyd': 9, 'sqyds': 9, 'sqyard': 9, 'sqyards': 9, 'yd': 9, 'yds': 9, 'gaj': 9,
+    'sqm': 10.7639, 'sqmt': 10.7639, 'sqmtr': 10.7639, 'sqmtrs': 10.7639, 'sqmeter': 10.7639, 'sqmeters': 10.7639,
+    'acre': 43_560, 'acres': 43_560,
+    'gunta': 1_089, 'guntas': 1_089,
+}
+
+_PRICE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(crores?|crs?|lakhs?|lacs?|l|k|thousand)?\b')
+_AREA_PATTERN = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(sq\.?\s*(?:ft|feet|yds?|yards?|mtrs?|meters?|mt|m)\b|sft|gaj|acres?|guntas?|yds?)?'
+)
+
+# What may sit between the two ends of a range ("2.5 - 3.2 Cr", "₹45 to ₹60 L")
+_RANGE_SEPARATOR = re.compile(r'\s*(?:₹|rs\.?|inr)?\s*(?:-|–|—|to)\s*(?:₹|rs\.?|inr)?\s*')
+
+def _parse_range(text: str, pattern: re.Pattern, units: Dict[str, float], normalize_unit: Callable[[str], str]) -> Optional[Tuple[float, float]]:
+    """Find numbers in text and scale each by its unit.
+
+    A number without a unit takes the unit of the number it forms a range
+    with, so "2.5 - 3.2 Cr" reads as 2.5 Cr to 3.2 Cr; other bare numbers
+    ("3 BHK 1800 sft") are ignored. Returns None if no number has a unit.
+    """
+    text = re.sub(r'(?<=\d),(?=\d)', '', text.lower())
+    matches: List[Tuple[float, Optional[str], int, int]] = [
+        (float(match.group(1)), normalize_unit(match.group(2)) if match.group(2) else None, match.start(), match.end(1))
+        for match in pattern.finditer(text)
+    ]
+    if not matches:
+        return None
+
+    values = []
+    next_unit = None
+    next_start = None
+    for number, unit, start, end in reversed(matches):
+        if unit not in units:
+            joined = next_start is not None and _RANGE_SEPARATOR.fullmatch(text, end, next_start)
+            unit = next_unit if joined else None
+        next_unit, next_start = unit, start
+        if unit is not None:
+            values.append(number * units[unit])
+
+    if not values:
+        return None
+    return min(values), max(values)
+
+def parse_price(text) -> Optional[Tuple[int, int]]:
+    """Parse a price like "₹2.5 - 3.2 Cr" or "₹45 Lakhs" into (min, max) rupees."""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return int(text), int(text)
+    parsed = _parse_range(str(text), _PRICE_PATTERN, PRICE_UNITS, lambda unit: unit)
+    if parsed is None:
+        # "₹ 85,00,000" style: plain rupee amounts
+        numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', re.sub(r'(?<=\d),(?=\d)', '', str(text)))]
+        numbers = [n for n in numbers if n >= 10_000]
+        if not numbers:
+            return None
+        parsed = min(numbers), max(numbers)
+    return int(round(parsed[0])), int(round(parsed[1]))
+
+def parse_area(text, default_unit: str = 'sqft') -> Optional[Tuple[int, int]]:
+    """Parse an area like "300 sq.yds" or "1200 - 1800 sq.ft" into (min, max) sq.ft.
+
+    Bare numbers (the integer Property fields) are read in default_unit.
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        value = text * AREA_UNITS[default_unit]
+        return int(round(value)), int(round(value))
+    parsed = _parse_range(
+        str(text), _AREA_PATTERN, AREA_UNITS,
+        lambda unit: re.sub(r'[\s.]', '', unit)
+    )
+    if parsed is None:
+        numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', re.sub(r'(?<=\d),(?=\d)', '', str(text)))]
+        if not numbers:
+            return None
+        parsed = min(numbers) * AREA_UNITS[default_unit], max(numbers) * AREA_UNITS[default_unit]
+    return int(round(parsed[0])), int(round(parsed[1]))
+
+def listing_number_normalizer(price_field: str, area_field: str) -> Callable[[dict], dict]:
+    """
+    Build a DatabaseService normalizer deriving indexed numeric fields.
+
+    Adds price_min/price_max (rupees) from price_field and
+    area_sqft_min/area_sqft_max from area_field, for whichever of the two
+    source fields the written document carries.
+    """
+    def normalize(document: dict) -> dict:
+        derived = {}
+        if price_field in document:
+            price = parse_price(document[price_field])
+            derived["price_min"], derived["price_max"] = price if price else (None, None)
+        if area_field in document:
+            area = parse_area(document[area_field])
+            derived["area_sqft_min"], derived["area_sqft_max"] = area if area else (None, None)
+        return derived
+    return normalize
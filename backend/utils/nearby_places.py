@@ -1,74 +1,271 @@
 """
 Utility to fetch nearby places using OpenStreetMap Overpass API (Free)
+
+Upstream calls go through one pooled requests.Session run in worker
+threads, are rate limited per upstream and cached in the geo_cache
+collection. Point NOMINATIM_URL/OVERPASS_URL at
+tests/standins/osm_standin.py to work offline. When POI_DATASET_PATH names an offline dataset (see
+utils/poi_index.py), places inside its area are answered locally instead of
+through Overpass.
 """
+from requests.adapters import HTTPAdapter
+from typing import Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+from services.database import geo_cache_db
+from utils.poi_index import PoiIndex
+from utils.geo import nearest
+from math import radians, sin, cos, sqrt, atan2
+import asyncio
+import logging
+import os
+import re
+import time
 import requests
-from typing import List, Dict, Optional
 
-def get_coordinates_from_address(address: str) -> Optional[tuple]:
-    """
-    Get latitude and longitude from address using Nominatim (OpenStreetMap)
+logger = logging.getLogger(__name__)
+
+NOMINATIM_URL = os.environ.get('NOMINATIM_URL', 'https://nominatim.openstreetmap.org')
+OVERPASS_URL = os.environ.get('OVERPASS_URL', 'https://overpass-api.de')
+
+# Nominatim's usage policy allows at most one request per second.
+NOMINATIM_MIN_INTERVAL = float(os.environ.get('NOMINATIM_MIN_INTERVAL_SECONDS', '1'))
+OVERPASS_MIN_INTERVAL = float(os.environ.get('OVERPASS_MIN_INTERVAL_SECONDS', '1'))
+
+GEOCODE_CACHE_DAYS = float(os.environ.get('GEOCODE_CACHE_DAYS', '30'))
+NEARBY_CACHE_DAYS = float(os.environ.get('NEARBY_CACHE_DAYS', '7'))
+
+POI_DATASET_PATH = os.environ.get('POI_DATASET_PATH')
+
+USER_AGENT = 'KMKHomes/1.0'
+
+MAX_PLACES = 20
+
+# Categories to search for
+amenity_types = {
+    'railway': '🚉 Railway Station',
+    'hospital': '🏥 Hospital',
+    'school': '🏫 School',
+    'college': '🎓 College',
+    'restaurant': '🍽️ Restaurant',
+    'cafe': '☕ Cafe',
+    'bank': '🏦 Bank',
+    'atm': '💳 ATM',
+    'pharmacy': '💊 Pharmacy',
+    'police': '👮 Police Station',
+    'fire_station': '🚒 Fire Station',
+    'park': '🌳 Park',
+    'cinema': '🎬 Cinema',
+    'shopping_mall': '🏪 Shopping Mall',
+    'supermarket': '🛒 Supermarket',
+    'fuel': '⛽ Petrol Pump',
+    'airport': '✈️ Airport',
+    'bus_station': '🚌 Bus Station',
+    'gym': '💪 Gym',
+    'library': '📚 Library'
+}
+
+class RateLimiter:
+    """Space out calls to one upstream by a minimum interval."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._next_at = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_at = time.monotonic() + self.min_interval
+
+nominatim_limiter = RateLimiter(NOMINATIM_MIN_INTERVAL)
+overpass_limiter = RateLimiter(OVERPASS_MIN_INTERVAL)
+
+# Offline amenities, filled by load_poi_dataset() at startup
+poi_index = PoiIndex()
+
+async def load_poi_dataset(path: Optional[str] = POI_DATASET_PATH) -> int:
+    """Load the offline POI dataset, if configured; returns the point count."""
+    if not path:
+        return 0
+    index = PoiIndex()
+    try:
+        await asyncio.to_thread(index.load_file, path, amenity_types)
+    except Exception as e:
+        logger.error(f"Error loading POI dataset {path}: {e}")
+        return 0
+    global poi_index
+    poi_index = index
+    logger.info(f"Loaded {index.count} points of interest from {path}")
+    return index.count
+
+def _make_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+# Shared so repeated lookups reuse keep-alive connections.
+session = _make_session()
+
+def normalize_address(address: str) -> str:
+    """Lowercase, drop punctuation other than commas and collapse whitespace."""
+    text = re.sub(r'[^\w\s,]', ' ', address.lower())
+    parts = [" ".join(part.split()) for part in text.split(',')]
+    return ", ".join(part for part in parts if part)
+
+# Lookups in progress, so concurrent requests for one key share a fetch.
+_inflight: Dict[str, "asyncio.Future"] = {}
+
+async def _cached(key: str, ttl_days: float, fetch: Callable[[], Awaitable]):
+    """Return the cached value for key, or fetch and cache it.
+
+    fetch raises on upstream errors, which are not cached; a definitive
+    "nothing found" (None or []) is.
     """
+    entry = await geo_cache_db.collection.find_one({"key": key, "expires_at": {"$gt": datetime.utcnow()}})
+    if entry:
+        return entry["value"]
+
+    if key in _inflight:
+        return await asyncio.shield(_inflight[key])
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
     try:
-        url = "https://nominatim.openstreetmap.org/search"
+        value = await fetch()
+        try:
+            await geo_cache_db.collection.update_one(
+                {"key": key},
+                {"$set": {"value": value, "expires_at": datetime.utcnow() + timedelta(days=ttl_days)}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Error caching {key}: {e}")
+        future.set_result(value)
+        return value
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception retrieved when no other request was waiting.
+        future.exception()
+        raise
+    finally:
+        del _inflight[key]
+
+async def _request(limiter: RateLimiter, method: str, url: str, timeout: float, **kwargs):
+    await limiter.wait()
+    response = await asyncio.to_thread(session.request, method, url, timeout=timeout, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+async def geocode(address: str) -> Optional[tuple]:
+    """
+    Get (latitude, longitude) for an address using Nominatim (OpenStreetMap).
+
+    Returns None when Nominatim has no match and raises on upstream errors,
+    so callers can tell "not found" from "try again later".
+    """
+    normalized = normalize_address(address)
+    if not normalized:
+        return None
+
+    async def fetch():
         params = {
             'q': address,
             'format': 'json',
             'limit': 1
         }
-        headers = {'User-Agent': 'KMKHomes/1.0'}
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await _request(nominatim_limiter, 'GET', f"{NOMINATIM_URL}/search", timeout=10, params=params)
         if data:
-            return float(data[0]['lat']), float(data[0]['lon'])
+            return [float(data[0]['lat']), float(data[0]['lon'])]
         return None
+
+    coordinates = await _cached(f"geocode:{normalized}", GEOCODE_CACHE_DAYS, fetch)
+    return tuple(coordinates) if coordinates else None
+
+async def get_coordinates_from_address(address: str) -> Optional[tuple]:
+    """
+    Get latitude and longitude from address using Nominatim (OpenStreetMap)
+    """
+    try:
+        return await geocode(address)
     except Exception as e:
-        print(f"Error getting coordinates: {e}")
+        logger.error(f"Error getting coordinates: {e}")
         return None
 
-def fetch_nearby_places(address: str, radius_km: float = 5.0) -> List[Dict]:
+def _place(amenity: str, name: str, address: str, distance_km: float) -> Dict:
+    return {
+        'name': name or f"Unnamed {amenity_types[amenity]}",
+        'type': amenity_types[amenity],
+        'category': amenity,
+        'distance': round(distance_km, 2),
+        'address': address
+    }
+
+def _nearby_from_index(lat: float, lon: float, radius_km: float) -> List[Dict]:
+    return [
+        _place(amenity, name, address, distance_km)
+        for (_, _, amenity, name, address), distance_km in poi_index.nearest(lat, lon, radius_km, MAX_PLACES)
+    ]
+
+def _parse_elements(data: dict, lat: float, lon: float) -> List[Dict]:
+    found = []
+    for element in data.get('elements', []):
+        tags = element.get('tags', {})
+        amenity = tags.get('amenity')
+
+        if amenity not in amenity_types:
+            continue
+
+        # Get element coordinates
+        if element['type'] == 'node':
+            elem_lat = element['lat']
+            elem_lon = element['lon']
+        elif 'center' in element:
+            elem_lat = element['center']['lat']
+            elem_lon = element['center']['lon']
+        else:
+            continue
+
+        found.append((elem_lat, elem_lon, amenity, tags))
+
+    # Distances in one batch, keeping only the nearest 20 sorted
+    indices, distances = nearest(
+        lat, lon, [item[0] for item in found], [item[1] for item in found], MAX_PLACES
+    )
+    places = []
+    for i, distance_km in zip(indices, distances):
+        _, _, amenity, tags = found[i]
+        places.append(_place(
+            amenity,
+            tags.get('name', ''),
+            tags.get('addr:full', tags.get('addr:street', '')),
+            float(distance_km)
+        ))
+    return places
+
+async def find_nearby_places(address: str, radius_km: float = 5.0) -> List[Dict]:
     """
-    Fetch nearby places using Overpass API
-    Returns list of nearby amenities with name, type, and distance
+    Get the amenities around an address, nearest first.
+
+    Like geocode(), returns [] when the address has no match and raises on
+    upstream errors.
     """
-    coordinates = get_coordinates_from_address(address)
+    coordinates = await geocode(address)
     if not coordinates:
         return []
-    
+
     lat, lon = coordinates
+    if poi_index.covers(lat, lon):
+        return _nearby_from_index(lat, lon, radius_km)
+
     radius_meters = radius_km * 1000
-    
-    # Categories to search for
-    amenity_types = {
-        'railway': '🚉 Railway Station',
-        'hospital': '🏥 Hospital',
-        'school': '🏫 School',
-        'college': '🎓 College',
-        'restaurant': '🍽️ Restaurant',
-        'cafe': '☕ Cafe',
-        'bank': '🏦 Bank',
-        'atm': '💳 ATM',
-        'pharmacy': '💊 Pharmacy',
-        'police': '👮 Police Station',
-        'fire_station': '🚒 Fire Station',
-        'park': '🌳 Park',
-        'cinema': '🎬 Cinema',
-        'shopping_mall': '🏪 Shopping Mall',
-        'supermarket': '🛒 Supermarket',
-        'fuel': '⛽ Petrol Pump',
-        'airport': '✈️ Airport',
-        'bus_station': '🚌 Bus Station',
-        'gym': '💪 Gym',
-        'library': '📚 Library'
-    }
-    
-    try:
-        # Build Overpass query
+
+    async def fetch():
         amenity_query = '|'.join([f'amenity={key}' for key in amenity_types.keys()])
-        
-        overpass_url = "https://overpass-api.de/api/interpreter"
         query = f"""
         [out:json][timeout:25];
         (
@@ -77,48 +274,20 @@ def fetch_nearby_places(address: str, radius_km: float = 5.0) -> List[Dict]:
         );
         out center;
         """
-        
-        response = requests.post(overpass_url, data={'data': query}, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        places = []
-        
-        for element in data.get('elements', []):
-            tags = element.get('tags', {})
-            amenity = tags.get('amenity')
-            
-            if amenity not in amenity_types:
-                continue
-            
-            # Get element coordinates
-            if element['type'] == 'node':
-                elem_lat = element['lat']
-                elem_lon = element['lon']
-            elif 'center' in element:
-                elem_lat = element['center']['lat']
-                elem_lon = element['center']['lon']
-            else:
-                continue
-            
-            # Calculate distance (approximate)
-            distance_km = calculate_distance(lat, lon, elem_lat, elem_lon)
-            
-            place = {
-                'name': tags.get('name', f"Unnamed {amenity_types[amenity]}"),
-                'type': amenity_types[amenity],
-                'category': amenity,
-                'distance': round(distance_km, 2),
-                'address': tags.get('addr:full', tags.get('addr:street', ''))
-            }
-            places.append(place)
-        
-        # Sort by distance and limit to top 20
-        places.sort(key=lambda x: x['distance'])
-        return places[:20]
-        
+        data = await _request(overpass_limiter, 'POST', f"{OVERPASS_URL}/api/interpreter", timeout=30, data={'data': query})
+        return _parse_elements(data, lat, lon)
+
+    return await _cached(f"nearby:{normalize_address(address)}|{radius_km:g}", NEARBY_CACHE_DAYS, fetch)
+
+async def fetch_nearby_places(address: str, radius_km: float = 5.0) -> List[Dict]:
+    """
+    Fetch nearby places using Overpass API
+    Returns list of nearby amenities with name, type, and distance
+    """
+    try:
+        return await find_nearby_places(address, radius_km)
     except Exception as e:
-        print(f"Error fetching nearby places: {e}")
+        logger.error(f"Error fetching nearby places: {e}")
         return []
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -126,15 +295,13 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     Calculate distance between two coordinates in kilometers
     Using Haversine formula
     """
-    from math import radians, sin, cos, sqrt, atan2
-    
     R = 6371  # Earth's radius in km
-    
+
     lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
     dlat = lat2 - lat1
     dlon = lon2 - lon1
-    
+
     a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
     c = 2 * atan2(sqrt(a), sqrt(1-a))
-    
+
     return R * c
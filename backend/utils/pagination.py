@@ -0,0 +1,45 @@
+"""
+Shared keyset pagination for listing endpoints
+"""
+from fastapi import HTTPException, Response
+from typing import List, Optional
+from services.database import DatabaseService
+
+DEFAULT_PAGE_SIZE = 20
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+async def paginate(
+    service: DatabaseService,
+    response: Response,
+    filters: dict = None,
+    sort: list = None,
+    limit: Optional[int] = None,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None
+) -> List[dict]:
+    """
+    Fetch a listing page, using cursor pagination whenever it applies.
+
+    Requests with a cursor, or with a limit and no skip, go through keyset
+    pagination and get the next page's cursor in the X-Next-Cursor header.
+    Requests without a limit (full listings) or with a legacy skip keep the
+    old behaviour so existing clients are unaffected.
+    """
+    if cursor is None and (not limit or skip):
+        return await service.get_all(filters=filters, sort=sort, limit=limit, skip=skip, projection=projection)
+
+    try:
+        documents, next_cursor = await service.get_page(
+            filters=filters,
+            sort=sort,
+            limit=limit or DEFAULT_PAGE_SIZE,
+            cursor=cursor,
+            projection=projection
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return documents
@@ -0,0 +1,218 @@
+"""
+In-memory spatial index over an offline points-of-interest dataset
+
+Loads amenities from an Overpass JSON export, a GeoJSON FeatureCollection or
+a CSV (lat, lon, amenity, name[, address]) into a fixed-size lat/lon grid so
+radius queries only look at nearby cells.
+
+Build a Hyderabad extract once (needs network), from backend/:
+    python -m utils.poi_index export hyderabad_pois.json
+then set POI_DATASET_PATH=hyderabad_pois.json. Time a query with:
+    python -m utils.poi_index query hyderabad_pois.json 17.44 78.35 --radius 5
+"""
+from collections import defaultdict
+from math import cos, floor, radians
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.geo import nearest
+import argparse
+import csv
+import json
+import time
+import numpy as np
+
+# Roughly 1.1 km per cell at Hyderabad's latitude
+CELL_DEGREES = 0.01
+KM_PER_DEGREE = 111.32
+
+# south, west, north, east
+HYDERABAD_BBOX = (17.20, 78.20, 17.65, 78.75)
+
+class PoiIndex:
+    """Grid index of (lat, lon, amenity, name, address) points."""
+
+    def __init__(self, cell_degrees: float = CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.points: List[tuple] = []
+        self._cell_lists: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        # Built by build(): coordinate arrays and cell -> point positions
+        self._lats = np.empty(0)
+        self._lons = np.empty(0)
+        self._cells: Dict[Tuple[int, int], np.ndarray] = {}
+        self.bounds: Optional[Tuple[float, float, float, float]] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.points)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return floor(lat / self.cell_degrees), floor(lon / self.cell_degrees)
+
+    def add(self, lat: float, lon: float, amenity: str, name: str = '', address: str = ''):
+        """Add a point; call build() once done adding."""
+        self._cell_lists[self._cell(lat, lon)].append(len(self.points))
+        self.points.append((lat, lon, amenity, name, address))
+        if self.bounds is None:
+            self.bounds = (lat, lon, lat, lon)
+        else:
+            south, west, north, east = self.bounds
+            self.bounds = (min(south, lat), min(west, lon), max(north, lat), max(east, lon))
+
+    def build(self):
+        """Freeze the added points into arrays for nearest()."""
+        self._lats = np.array([point[0] for point in self.points], dtype=np.float64)
+        self._lons = np.array([point[1] for point in self.points], dtype=np.float64)
+        self._cells = {cell: np.array(positions, dtype=np.int64) for cell, positions in self._cell_lists.items()}
+
+    def covers(self, lat: float, lon: float) -> bool:
+        """Whether a point lies inside the area the dataset was built for."""
+        if self.bounds is None:
+            return False
+        south, west, north, east = self.bounds
+        return south <= lat <= north and west <= lon <= east
+
+    def candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Positions of the points in every cell the radius can reach (a superset of the matches)."""
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = radius_km / (KM_PER_DEGREE * max(cos(radians(lat)), 0.01))
+        row_min, col_min = self._cell(lat - dlat, lon - dlon)
+        row_max, col_max = self._cell(lat + dlat, lon + dlon)
+        found = [
+            self._cells[(row, col)]
+            for row in range(row_min, row_max + 1)
+            for col in range(col_min, col_max + 1)
+            if (row, col) in self._cells
+        ]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def nearest(self, lat: float, lon: float, radius_km: float, k: int) -> List[Tuple[tuple, float]]:
+        """Get up to k (point, distance_km) pairs within radius_km, nearest first."""
+        positions = self.candidates(lat, lon, radius_km)
+        found, distances = nearest(lat, lon, self._lats[positions], self._lons[positions], k, radius_km)
+        return [(self.points[positions[i]], float(distance)) for i, distance in zip(found, distances)]
+
+    def load_file(self, path: str, categories: Iterable[str] = None) -> int:
+        """Load a dataset file; returns how many points were added.
+
+        Points whose amenity is not in categories (when given) are skipped.
+        """
+        wanted = set(categories) if categories is not None else None
+        added = 0
+        for lat, lon, amenity, name, address in read_dataset(path):
+            if wanted is not None and amenity not in wanted:
+                continue
+            self.add(lat, lon, amenity, name, address)
+            added += 1
+        self.build()
+        return added
+
+def _centroid(coordinates) -> Optional[Tuple[float, float]]:
+    """Average the positions of a GeoJSON geometry's outer ring (lon, lat order)."""
+    while coordinates and isinstance(coordinates[0][0], list):
+        coordinates = coordinates[0]
+    if not coordinates:
+        return None
+    lons = [point[0] for point in coordinates]
+    lats = [point[1] for point in coordinates]
+    return sum(lats) / len(lats), sum(lons) / len(lons)
+
+def _address(tags: dict) -> str:
+    return tags.get('addr:full', tags.get('addr:street', tags.get('address', ''))) or ''
+
+def read_dataset(path: str) -> Iterable[Tuple[float, float, str, str, str]]:
+    """Yield (lat, lon, amenity, name, address) from a CSV, GeoJSON or Overpass file."""
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                lat = row.get('lat') or row.get('latitude')
+                lon = row.get('lon') or row.get('longitude')
+                if not lat or not lon or not row.get('amenity'):
+                    continue
+                yield float(lat), float(lon), row['amenity'], row.get('name', ''), row.get('address', '')
+        return
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    if 'elements' in data:
+        # Overpass "out center" output
+        for element in data['elements']:
+            tags = element.get('tags', {})
+            if 'lat' in element:
+                lat, lon = element['lat'], element['lon']
+            elif 'center' in element:
+                lat, lon = element['center']['lat'], element['center']['lon']
+            else:
+                continue
+            if tags.get('amenity'):
+                yield lat, lon, tags['amenity'], tags.get('name', ''), _address(tags)
+    else:
+        for feature in data.get('features', []):
+            geometry = feature.get('geometry') or {}
+            tags = feature.get('properties') or {}
+            if geometry.get('type') == 'Point':
+                lon, lat = geometry['coordinates'][:2]
+            else:
+                point = _centroid(geometry.get('coordinates'))
+                if point is None:
+                    continue
+                lat, lon = point
+            if tags.get('amenity'):
+                yield lat, lon, tags['amenity'], tags.get('name', ''), _address(tags)
+
+def _export(args):
+    from utils.nearby_places import OVERPASS_URL, amenity_types, session
+
+    south, west, north, east = args.bbox
+    amenity_query = '|'.join(amenity_types)
+    query = f"""
+    [out:json][timeout:180];
+    (
+      node[amenity~"^({amenity_query})$"]({south},{west},{north},{east});
+      way[amenity~"^({amenity_query})$"]({south},{west},{north},{east});
+    );
+    out center;
+    """
+    response = session.post(f"{OVERPASS_URL}/api/interpreter", data={'data': query}, timeout=200)
+    response.raise_for_status()
+    data = response.json()
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    print(f"Wrote {len(data.get('elements', []))} elements to {args.output}")
+
+def _query(args):
+    from utils.nearby_places import amenity_types
+
+    index = PoiIndex()
+    started = time.perf_counter()
+    index.load_file(args.path, amenity_types)
+    loaded = time.perf_counter()
+    matches = index.nearest(args.lat, args.lon, args.radius, args.limit)
+    queried = time.perf_counter()
+    print(f"Loaded {index.count} points in {(loaded - started) * 1000:.1f} ms")
+    print(f"Nearest {len(matches)} within {args.radius} km in {(queried - loaded) * 1000:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline POI dataset tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='Download amenities in a bounding box from Overpass')
+    export.add_argument('output')
+    export.add_argument(
+        '--bbox', type=lambda value: tuple(float(part) for part in value.split(',')),
+        default=HYDERABAD_BBOX, help='south,west,north,east (default: Hyderabad)'
+    )
+    export.set_defaults(handler=_export)
+
+    query = commands.add_parser('query', help='Load a dataset and time one radius query')
+    query.add_argument('path')
+    query.add_argument('lat', type=float)
+    query.add_argument('lon', type=float)
+    query.add_argument('--radius', type=float, default=5.0, help='Radius in km')
+    query.add_argument('--limit', type=int, default=20)
+    query.set_defaults(handler=_query)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
@@ -356,6 +356,62 @@ class KMKHomesAPITester:
             except Exception as e:
                 self.log_result(name, False, f"Error: {str(e)}")
     
+    def test_bootstrap_endpoint(self):
+        """Test aggregated homepage bootstrap endpoint and its ETag."""
+        try:
+            response = requests.get(f"{self.api_url}/bootstrap", timeout=10)
+            
+            if response.status_code != 200:
+                self.log_result("Bootstrap", False, f"HTTP {response.status_code}", response.text)
+                return
+            
+            data = response.json()
+            expected_keys = ["home_banners", "featured_properties", "testimonials",
+                             "amenities", "upcoming_projects", "contact_info"]
+            missing = [key for key in expected_keys if key not in data]
+            if missing:
+                self.log_result("Bootstrap", False, f"Missing keys: {missing}", data)
+                return
+            self.log_result("Bootstrap", True, "Retrieved combined homepage payload")
+            
+            etag = response.headers.get("ETag")
+            if not etag:
+                self.log_result("Bootstrap ETag", False, "No ETag header returned")
+                return
+            
+            response = requests.get(f"{self.api_url}/bootstrap", headers={"If-None-Match": etag}, timeout=10)
+            if response.status_code == 304:
+                self.log_result("Bootstrap ETag", True, "Conditional request returned 304")
+            else:
+                self.log_result("Bootstrap ETag", False, f"Expected 304, got {response.status_code}")
+                
+        except Exception as e:
+            self.log_result("Bootstrap", False, f"Error: {str(e)}")
+    
+    def test_site_search(self):
+        """Test site-wide search endpoint."""
+        try:
+            response = requests.get(f"{self.api_url}/search", params={"q": "villa"}, timeout=10)
+            
+            if response.status_code == 200:
+                data = response.json()
+                results = data.get("results", [])
+                if all("type" in r and "url" in r and "highlights" in r for r in results):
+                    self.log_result("Site Search", True, f"Retrieved {len(results)} ranked results")
+                else:
+                    self.log_result("Site Search", False, "Results missing type/url/highlights", data)
+            else:
+                self.log_result("Site Search", False, f"HTTP {response.status_code}", response.text)
+            
+            response = requests.get(f"{self.api_url}/search", params={"q": "villa", "type": "unknown"}, timeout=10)
+            if response.status_code == 400:
+                self.log_result("Site Search Validation", True, "Unknown type correctly rejected")
+            else:
+                self.log_result("Site Search Validation", False, f"Expected 400, got {response.status_code}")
+                
+        except Exception as e:
+            self.log_result("Site Search", False, f"Error: {str(e)}")
+    
     def test_health_check(self):
         """Test API health check."""
         try:
@@ -733,6 +789,8 @@ class KMKHomesAPITester:
         # Test public APIs
         self.test_properties_api()
         self.test_public_endpoints()
+        self.test_bootstrap_endpoint()
+        self.test_site_search()
         
         # Test NEW Budget Homes and Plots public APIs
         self.test_budget_homes_public_api()
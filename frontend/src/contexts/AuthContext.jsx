@@ -52,7 +52,13 @@ export const AuthProvider = ({ children }) => {
     }
   };
 
-  const logout = () => {
+  const logout = async () => {
+    try {
+      // Revoke the token server side; sign out locally even if that fails.
+      await adminApi.logout();
+    } catch (error) {
+      // The token may already be revoked (e.g. after a password change)
+    }
     localStorage.removeItem('admin_token');
     setUser(null);
   };
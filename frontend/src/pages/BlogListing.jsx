@@ -24,7 +24,7 @@ const BlogListing = () => {
   const fetchBlogs = async () => {
     try {
       setLoading(true);
-      const params = {};
+      const params = { view: 'summary' };
       if (selectedCategory !== 'all') {
         params.category = selectedCategory;
       }
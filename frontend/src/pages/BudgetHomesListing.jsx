@@ -27,7 +27,7 @@ const BudgetHomesListing = () => {
 
   const fetchHomes = async () => {
     try {
-      const response = await publicApi.getBudgetHomes();
+      const response = await publicApi.getBudgetHomes({ view: 'summary' });
       setHomes(response.data || []);
     } catch (error) {
       console.error('Error fetching budget homes:', error);
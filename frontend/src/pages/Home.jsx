@@ -20,7 +20,6 @@ const Home = () => {
   const [homeBanners, setHomeBanners] = useState([]);
   const [featuredProperties, setFeaturedProperties] = useState([]);
   const [testimonials, setTestimonials] = useState([]);
-  const [allProperties, setAllProperties] = useState([]);
   const [plotSizeRanges, setPlotSizeRanges] = useState([]);
   const [builtUpAreaRanges, setBuiltUpAreaRanges] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -31,17 +30,13 @@ const Home = () => {
 
   const fetchHomeData = async () => {
     try {
-      const [bannersRes, allPropertiesRes, testimonialsRes] = await Promise.all([
-        publicApi.getHomeBanners(),
-        publicApi.getProperties(),
-        publicApi.getTestimonials({ featured: true, limit: 3 })
-      ]);
-
-      const properties = allPropertiesRes.data || [];
-      setHomeBanners(bannersRes.data);
-      setAllProperties(properties);
-      setFeaturedProperties(properties.filter(p => p.featured).slice(0, 6));
-      setTestimonials(testimonialsRes.data);
+      const bootstrapRes = await publicApi.getBootstrap();
+
+      const bootstrap = bootstrapRes.data || {};
+      const properties = bootstrap.property_sizes || [];
+      setHomeBanners(bootstrap.home_banners || []);
+      setFeaturedProperties(bootstrap.featured_properties || []);
+      setTestimonials(bootstrap.testimonials || []);
 
       // Calculate dynamic ranges from actual property data
       if (properties.length > 0) {
@@ -26,7 +26,7 @@ const PlotsListing = () => {
 
   const fetchPlots = async () => {
     try {
-      const response = await publicApi.getPlots();
+      const response = await publicApi.getPlots({ view: 'summary' });
       setPlots(response.data || []);
     } catch (error) {
       console.error('Error fetching plots:', error);
@@ -44,7 +44,7 @@ const Projects = () => {
 
   const fetchProperties = async () => {
     try {
-      const response = await publicApi.getProperties();
+      const response = await publicApi.getProperties({ view: 'summary' });
       console.log('Properties API response:', response.data);
       setProperties(response.data || []);
     } catch (error) {
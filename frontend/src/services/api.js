@@ -18,6 +18,9 @@ api.interceptors.request.use((config) => {
 
 // Public API calls (no auth required)
 export const publicApi = {
+  // Homepage bootstrap (banners, featured properties/testimonials, amenities, projects, contact)
+  getBootstrap: () => api.get('/bootstrap'),
+
   // Properties
   getProperties: (params = {}) => api.get('/properties', { params }),
   getProperty: (id) => api.get(`/properties/${id}`),
@@ -46,6 +49,18 @@ export const publicApi = {
   getPlots: (params = {}) => api.get('/plots', { params }),
   getPlot: (id) => api.get(`/plots/${id}`),
   
+  // Faceted listing search (type: properties | budget-homes | plots), returns results + facet counts
+  searchListings: (params = {}) => api.get('/listings/search', { params, paramsSerializer: { indexes: null } }),
+  
+  // Site-wide search (properties, budget homes, plots, blogs, news); whole words only, use autocomplete while typing
+  search: (q, params = {}) => api.get('/search', { params: { q, ...params }, paramsSerializer: { indexes: null } }),
+  
+  // Location / project name suggestions (kind: location | project)
+  autocomplete: (q, params = {}) => api.get('/autocomplete', { params: { q, ...params } }),
+  
+  // Listings near a point ({ lat, lon } or { location }, radius_km, type), nearest first
+  getNearbyListings: (params = {}) => api.get('/nearby-listings', { params, paramsSerializer: { indexes: null } }),
+  
   // Dynamic Filters
   getPropertiesFilters: () => api.get('/properties/filters'),
   getBudgetHomesFilters: () => api.get('/budget-homes/filters'),
@@ -63,6 +78,7 @@ export const adminApi = {
   // Auth
   login: (credentials) => api.post('/admin/auth/login', credentials),
   getCurrentUser: () => api.get('/admin/auth/me'),
+  logout: () => api.post('/admin/auth/logout'),
   changePassword: (data) => api.post('/admin/auth/change-password', data),
   
   // Properties
@@ -117,6 +133,13 @@ export const adminApi = {
   // Fetch Nearby Places
   fetchNearbyPlaces: (location) => api.post('/admin/fetch-nearby-places', null, { params: { location } }),
   
+  // Background Jobs (listing enrichment runs automatically after saves)
+  getJobs: (params = {}) => api.get('/admin/jobs', { params }),
+  getJobsSummary: () => api.get('/admin/jobs/summary'),
+  enqueueEnrichment: (collection, docId) => api.post('/admin/jobs/enrich', null, { params: { collection, doc_id: docId } }),
+  retryJob: (id) => api.post(`/admin/jobs/${id}/retry`),
+  collectUploadGarbage: (params = {}) => api.post('/admin/storage/gc', null, { params }),
+  
   // Budget Homes
   getBudgetHomes: () => api.get('/admin/budget-homes'),
   createBudgetHome: (data) => api.post('/admin/budget-homes', data),
@@ -136,6 +159,13 @@ export const adminApi = {
   updateBlog: (id, data) => api.put(`/admin/blogs/${id}`, data),
   deleteBlog: (id) => api.delete(`/admin/blogs/${id}`),
   
+  // Bulk operations (resource: 'properties', 'budget-homes', 'plots',
+  // 'amenities', 'home-banners' or 'blogs'); results come back per item
+  bulkCreate: (resource, items) => api.post(`/admin/${resource}/bulk`, { items }),
+  bulkUpdate: (resource, items) => api.patch(`/admin/${resource}/bulk`, { items }),
+  bulkDelete: (resource, ids) => api.post(`/admin/${resource}/bulk/delete`, { ids }),
+  reorder: (resource, ids) => api.put(`/admin/${resource}/bulk/order`, { ids }),
+  
   // File Upload
   uploadFile: (file) => {
     const formData = new FormData();
@@ -146,6 +176,61 @@ export const adminApi = {
       },
     });
   },
+  
+  // Resumable upload for large files: sends chunks and resumes from the
+  // server's offset after a failed chunk. Resolves like uploadFile ({ data }).
+  uploadFileResumable: async (file, { onProgress, retries = 3 } = {}) => {
+    const { data: session } = await api.post('/admin/uploads', {
+      filename: file.name,
+      size: file.size,
+      content_type: file.type || undefined,
+    });
+    let { offset } = session;
+    let failures = 0;
+    while (offset < file.size) {
+      try {
+        const { data } = await api.patch(
+          `/admin/uploads/${session.upload_id}`,
+          file.slice(offset, offset + session.chunk_size),
+          { headers: { 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': offset } }
+        );
+        offset = data.offset;
+        failures = 0;
+        if (onProgress) onProgress(offset / file.size);
+        if (data.status === 'complete') return { data: data.result };
+      } catch (error) {
+        if (error.response && error.response.status === 413) throw error;
+        failures += 1;
+        if (failures > retries) throw error;
+        ({ data: { offset } } = await api.get(`/admin/uploads/${session.upload_id}`));
+      }
+    }
+    const { data } = await api.get(`/admin/uploads/${session.upload_id}`);
+    return { data: data.result };
+  },
+
+  // Upload straight to the storage bucket (s3 backend): the file never
+  // passes through the API. Resolves like uploadFile ({ data }).
+  uploadFileDirect: async (file, { onProgress } = {}) => {
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    const sha256 = Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+    const { data: session } = await api.post('/admin/uploads/direct', {
+      filename: file.name,
+      size: file.size,
+      content_type: file.type || undefined,
+      sha256,
+    });
+    if (session.status === 'complete') return { data: session.result };
+
+    const form = new FormData();
+    Object.entries(session.upload.fields).forEach(([key, value]) => form.append(key, value));
+    form.append('file', file);
+    await axios.post(session.upload.url, form, {
+      onUploadProgress: (event) => onProgress && event.total && onProgress(event.loaded / event.total),
+    });
+    const { data } = await api.post(`/admin/uploads/${session.upload_id}/complete`);
+    return { data: data.result };
+  },
 };
 
 export default api;
\ No newline at end of file
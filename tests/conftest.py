@@ -0,0 +1,26 @@
+import os
+import sys
+
+# The backend is run from backend/ (imports are "services.x", "utils.x").
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+# Tests that need MongoDB get a database of their own and drop it afterwards.
+os.environ["DB_NAME"] = os.environ.get("TEST_DB_NAME", "kmk_homes_test")
+
+import pytest
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    """Point every DatabaseService at a fresh in-memory database (mongomock).
+
+    For tests that run without a MongoDB server; note that mongomock
+    ignores partial index filters.
+    """
+    from mongomock_motor import AsyncMongoMockClient
+    from services.database import DatabaseService
+
+    database = AsyncMongoMockClient()["test"]
+    for name, service in DatabaseService.registry.items():
+        monkeypatch.setattr(service, "collection", database[name])
+        service.invalidate()
+    return database
@@ -0,0 +1,98 @@
+"""
+Local stand-in for the Nominatim and Overpass APIs, for offline testing
+
+Run from the repository root:
+    python -m tests.standins.osm_standin --port 8089
+and start the backend with
+    NOMINATIM_URL=http://localhost:8089 OVERPASS_URL=http://localhost:8089
+
+Every address geocodes to a fixed point (Hyderabad unless it matches one of
+KNOWN_LOCATIONS), and Overpass queries return a few amenities offset from the
+queried centre. --delay simulates slow upstreams.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import argparse
+import json
+import re
+import time
+
+DEFAULT_LOCATION = (17.3850, 78.4867)
+
+KNOWN_LOCATIONS = {
+    'kokapet': (17.3960, 78.3440),
+    'gachibowli': (17.4401, 78.3489),
+    'sainikpuri': (17.4924, 78.5543),
+    'kompally': (17.5355, 78.4843),
+}
+
+# (amenity, name, north offset, east offset) in degrees
+SAMPLE_AMENITIES = [
+    ('hospital', 'Standin General Hospital', 0.004, 0.002),
+    ('school', 'Standin Public School', -0.006, 0.001),
+    ('supermarket', 'Standin Mart', 0.001, -0.003),
+    ('park', 'Standin Park', 0.010, 0.008),
+    ('railway', 'Standin Railway Station', -0.020, 0.015),
+]
+
+class StandinHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def _send_json(self, payload):
+        time.sleep(self.delay)
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/search':
+            self.send_error(404)
+            return
+        address = parse_qs(url.query).get('q', [''])[0].lower()
+        if 'nowhere' in address:
+            self._send_json([])
+            return
+        lat, lon = next(
+            (point for name, point in KNOWN_LOCATIONS.items() if name in address),
+            DEFAULT_LOCATION
+        )
+        self._send_json([{'lat': str(lat), 'lon': str(lon), 'display_name': address}])
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/api/interpreter':
+            self.send_error(404)
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        query = parse_qs(self.rfile.read(length).decode()).get('data', [''])[0]
+        match = re.search(r'around:[\d.]+,(-?[\d.]+),(-?[\d.]+)', query)
+        lat, lon = (float(match.group(1)), float(match.group(2))) if match else DEFAULT_LOCATION
+        elements = [
+            {
+                'type': 'node',
+                'id': i + 1,
+                'lat': lat + north,
+                'lon': lon + east,
+                'tags': {'amenity': amenity, 'name': name},
+            }
+            for i, (amenity, name, north, east) in enumerate(SAMPLE_AMENITIES)
+        ]
+        self._send_json({'elements': elements})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before each response')
+    args = parser.parse_args()
+
+    StandinHandler.delay = args.delay
+    server = ThreadingHTTPServer((args.host, args.port), StandinHandler)
+    print(f"OSM stand-in listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+"""
+Local S3-compatible stand-in, for testing the s3 storage backend offline
+
+Run from the repository root:
+    python -m tests.standins.s3_standin --port 9000 --data-dir /tmp/s3-standin
+and start the backend with
+    STORAGE_BACKEND=s3 S3_BUCKET=uploads S3_ENDPOINT_URL=http://localhost:9000
+    AWS_ACCESS_KEY_ID=standin AWS_SECRET_ACCESS_KEY=standin-secret
+
+Implements the path-style subset the backend uses: buckets are created on
+first write; objects support PUT (including copies and multipart uploads),
+GET with Range, HEAD, DELETE and ListObjectsV2; and browser form uploads
+(presigned POST) are checked against their policy and signature. Requests
+with header authentication are accepted without checking the signature.
+"""
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+from xml.sax.saxutils import escape
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+
+class ObjectStore:
+    """Objects as files under data_dir/bucket/, metadata in a .meta sidecar."""
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.lock = threading.Lock()
+
+    def path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.data_dir, bucket, key.replace('/', '%2F'))
+
+    def put(self, bucket: str, key: str, data: bytes, content_type: str, cache_control: str = None) -> str:
+        path = self.path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(data)
+        etag = hashlib.md5(data).hexdigest()
+        with self.lock:
+            os.replace(temp, path)
+            self.write_meta(bucket, key, {'content_type': content_type, 'cache_control': cache_control, 'etag': etag})
+        return etag
+
+    def write_meta(self, bucket: str, key: str, meta: dict):
+        with open(self.path(bucket, key) + '.meta', 'w') as f:
+            json.dump(meta, f)
+
+    def meta(self, bucket: str, key: str):
+        path = self.path(bucket, key)
+        if not os.path.isfile(path):
+            return None
+        with open(path + '.meta') as f:
+            meta = json.load(f)
+        stat = os.stat(path)
+        return {**meta, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def delete(self, bucket: str, key: str):
+        for path in (self.path(bucket, key), self.path(bucket, key) + '.meta'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def keys(self, bucket: str, prefix: str):
+        directory = os.path.join(self.data_dir, bucket)
+        if not os.path.isdir(directory):
+            return []
+        names = (unquote(name) for name in os.listdir(directory) if not name.endswith(('.meta', '.tmp')))
+        return sorted(name for name in names if name.startswith(prefix))
+
+class StandinHandler(BaseHTTPRequestHandler):
+    store: ObjectStore = None
+    credentials = {}
+    # uploadId -> {bucket, key, content_type, cache_control, parts: {number: bytes}}
+    multipart = {}
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _target(self):
+        url = urlparse(self.path)
+        bucket, _, key = unquote(url.path).lstrip('/').partition('/')
+        query = {name: values[0] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+        return bucket, key, query
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _send(self, status: int, body: bytes = b'', headers: dict = None):
+        self.send_response(status)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'ETag')
+        for name, value in (headers or {}).items():
+            if value is not None:
+                self.send_header(name, value)
+        if 'Content-Length' not in (headers or {}):
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _error(self, status: int, code: str, message: str):
+        body = (
+            f'<?xml version="1.0" encoding="UTF-8"?><Error><Code>{code}</Code>'
+            f'<Message>{escape(message)}</Message></Error>'
+        ).encode()
+        self._send(status, body if self.command != 'HEAD' else b'', {'Content-Type': 'application/xml'})
+
+    def _xml(self, body: str, status: int = 200):
+        self._send(status, ('<?xml version="1.0" encoding="UTF-8"?>' + body).encode(), {'Content-Type': 'application/xml'})
+
+    def do_OPTIONS(self):
+        self._send(200, headers={
+            'Access-Control-Allow-Methods': 'GET, HEAD, PUT, POST, DELETE',
+            'Access-Control-Allow-Headers': self.headers.get('Access-Control-Request-Headers', '*'),
+        })
+
+    def do_PUT(self):
+        bucket, key, query = self._target()
+        body = self._body()
+        if not key:
+            os.makedirs(os.path.join(self.store.data_dir, bucket), exist_ok=True)
+            self._send(200)
+            return
+
+        if 'uploadId' in query:
+            upload = self.multipart.get(query['uploadId'])
+            if not upload:
+                self._error(404, 'NoSuchUpload', 'Unknown upload')
+                return
+            upload['parts'][int(query['partNumber'])] = body
+            self._send(200, headers={'ETag': f'"{hashlib.md5(body).hexdigest()}"'})
+            return
+
+        source = self.headers.get('x-amz-copy-source')
+        if source:
+            source_bucket, _, source_key = unquote(source).lstrip('/').partition('/')
+            meta = self.store.meta(source_bucket, source_key)
+            if meta is None:
+                self._error(404, 'NoSuchKey', 'The specified key does not exist.')
+                return
+            with open(self.store.path(source_bucket, source_key), 'rb') as f:
+                data = f.read()
+            if self.headers.get('x-amz-metadata-directive') == 'REPLACE':
+                content_type, cache_control = self.headers.get('Content-Type'), self.headers.get('Cache-Control')
+            else:
+                content_type, cache_control = meta['content_type'], meta['cache_control']
+            etag = self.store.put(bucket, key, data, content_type, cache_control)
+            self._xml(f'<CopyObjectResult><ETag>"{etag}"</ETag>'
+                      f'<LastModified>{datetime.now(timezone.utc).isoformat()}</LastModified></CopyObjectResult>')
+            return
+
+        etag = self.store.put(
+            bucket, key, body,
+            self.headers.get('Content-Type', 'binary/octet-stream'), self.headers.get('Cache-Control')
+        )
+        self._send(200, headers={'ETag': f'"{etag}"'})
+
+    def do_GET(self):
+        bucket, key, query = self._target()
+        if not key:
+            self._list(bucket, query)
+            return
+        meta = self.store.meta(bucket, key)
+        if meta is None:
+            self._error(404, 'NoSuchKey', 'The specified key does not exist.')
+            return
+
+        start, end, status = 0, meta['size'] - 1, 200
+        match = re.match(r'bytes=(\d*)-(\d*)$', self.headers.get('Range', ''))
+        if match and meta['size']:
+            first, last = match.groups()
+            if first:
+                start, end = int(first), min(int(last), end) if last else end
+            elif last:
+                start = max(0, meta['size'] - int(last))
+            status = 206
+        headers = {
+            'Content-Type': meta['content_type'],
+            'Cache-Control': meta['cache_control'],
+            'ETag': f'"{meta["etag"]}"',
+            'Last-Modified': formatdate(meta['mtime'], usegmt=True),
+            'Accept-Ranges': 'bytes',
+            'Content-Length': str(end - start + 1),
+        }
+        if status == 206:
+            headers['Content-Range'] = f'bytes {start}-{end}/{meta["size"]}'
+        body = b''
+        if self.command == 'GET':
+            with open(self.store.path(bucket, key), 'rb') as f:
+                f.seek(start)
+                body = f.read(end - start + 1)
+        self._send(status, body, headers)
+
+    do_HEAD = do_GET
+
+    def do_DELETE(self):
+        bucket, key, query = self._target()
+        if 'uploadId' in query:
+            self.multipart.pop(query['uploadId'], None)
+        else:
+            self.store.delete(bucket, key)
+        self._send(204)
+
+    def do_POST(self):
+        bucket, key, query = self._target()
+        if 'uploads' in query:
+            upload_id = uuid.uuid4().hex
+            self.multipart[upload_id] = {
+                'bucket': bucket, 'key': key, 'parts': {},
+                'content_type': self.headers.get('Content-Type', 'binary/octet-stream'),
+                'cache_control': self.headers.get('Cache-Control'),
+            }
+            self._body()
+            self._xml(f'<InitiateMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>'
+                      f'<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>')
+            return
+        if 'uploadId' in query:
+            self._body()
+            upload = self.multipart.pop(query['uploadId'], None)
+            if not upload:
+                self._error(404, 'NoSuchUpload', 'Unknown upload')
+                return
+            data = b''.join(upload['parts'][number] for number in sorted(upload['parts']))
+            etag = self.store.put(bucket, key, data, upload['content_type'], upload['cache_control'])
+            self._xml(f'<CompleteMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>'
+                      f'<ETag>"{etag}"</ETag></CompleteMultipartUploadResult>')
+            return
+        self._form_upload(bucket)
+
+    def _list(self, bucket: str, query: dict):
+        prefix = query.get('prefix', '')
+        contents = ''
+        keys = self.store.keys(bucket, prefix)
+        for key in keys:
+            meta = self.store.meta(bucket, key)
+            if meta is None:
+                continue
+            modified = datetime.fromtimestamp(meta['mtime'], timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            contents += (f'<Contents><Key>{escape(key)}</Key><LastModified>{modified}</LastModified>'
+                         f'<ETag>"{meta["etag"]}"</ETag><Size>{meta["size"]}</Size></Contents>')
+        self._xml(f'<ListBucketResult><Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>'
+                  f'<KeyCount>{len(keys)}</KeyCount><MaxKeys>1000</MaxKeys><IsTruncated>false</IsTruncated>'
+                  f'{contents}</ListBucketResult>')
+
+    def _form_upload(self, bucket: str):
+        """Presigned POST: a multipart form whose policy limits what may be uploaded."""
+        body = self._body()
+        message = BytesParser(policy=HTTP).parsebytes(
+            f'Content-Type: {self.headers.get("Content-Type", "")}\r\n\r\n'.encode() + body
+        )
+        fields, data = {}, None
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if name == 'file':
+                data = part.get_payload(decode=True)
+            else:
+                # Form field names are case-insensitive, like headers.
+                fields[name.lower()] = part.get_content().strip()
+
+        problem = self._check_policy(bucket, fields, data)
+        if problem:
+            self._error(403, 'AccessDenied', problem)
+            return
+        content_type = fields.get('content-type', 'binary/octet-stream')
+        self.store.put(bucket, fields['key'], data, content_type, fields.get('cache-control'))
+        self._send(int(fields.get('success_action_status', 204)))
+
+    def _check_policy(self, bucket: str, fields: dict, data: bytes):
+        if data is None or 'policy' not in fields:
+            return 'Missing file or policy'
+        access_key, date, region, service, _ = fields.get('x-amz-credential', '////').split('/')
+        secret = self.credentials.get(access_key)
+        if secret is None:
+            return 'Unknown access key'
+        signing_key = f'AWS4{secret}'.encode()
+        for value in (date, region, service, 'aws4_request'):
+            signing_key = hmac.new(signing_key, value.encode(), hashlib.sha256).digest()
+        expected = hmac.new(signing_key, fields['policy'].encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, fields.get('x-amz-signature', '')):
+            return 'Signature does not match'
+
+        policy = json.loads(base64.b64decode(fields['policy']))
+        if datetime.fromisoformat(policy['expiration'].replace('Z', '+00:00')) < datetime.now(timezone.utc):
+            return 'Policy expired'
+        values = {**fields, 'bucket': bucket}
+        for condition in policy['conditions']:
+            if isinstance(condition, dict):
+                (name, value), = condition.items()
+                condition = ['eq', f'${name}', value]
+            operator = condition[0].lower()
+            if operator == 'content-length-range':
+                if not condition[1] <= len(data) <= condition[2]:
+                    return f'File size {len(data)} outside {condition[1]}-{condition[2]}'
+                continue
+            name = condition[1].lstrip('$').lower()
+            actual = values.get(name, '')
+            if operator == 'eq' and actual != condition[2] or operator == 'starts-with' and not actual.startswith(condition[2]):
+                return f'Policy condition failed: {name}'
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--data-dir', default='/tmp/s3-standin')
+    parser.add_argument('--access-key', default='standin')
+    parser.add_argument('--secret-key', default='standin-secret')
+    parser.add_argument('--reset', action='store_true', help='Delete all stored objects first')
+    args = parser.parse_args()
+
+    if args.reset:
+        shutil.rmtree(args.data_dir, ignore_errors=True)
+    os.makedirs(args.data_dir, exist_ok=True)
+    StandinHandler.store = ObjectStore(args.data_dir)
+    StandinHandler.credentials = {args.access_key: args.secret_key}
+    server = ThreadingHTTPServer((args.host, args.port), StandinHandler)
+    print(f"S3 stand-in listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
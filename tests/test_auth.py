@@ -0,0 +1,107 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.admin_api import router as admin_router
+from services import auth
+from services.auth import create_access_token, hash_password
+from services.database import admin_users_db
+
+PASSWORD = "correct horse"
+
+@pytest.fixture
+def client(mock_db):
+    auth._token_cache.clear()
+    asyncio.run(admin_users_db.collection.insert_one({
+        "username": "admin",
+        "email": "admin@example.com",
+        "password_hash": hash_password(PASSWORD),
+        "role": "admin",
+        "active": True,
+        "created_at": datetime.utcnow(),
+    }))
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/api")
+    with TestClient(app, raise_server_exceptions=False) as client:
+        yield client
+    auth._token_cache.clear()
+
+def _login(client, password: str = PASSWORD) -> dict:
+    response = client.post("/api/admin/auth/login", json={"username": "admin", "password": password})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _me(client, headers: dict) -> int:
+    return client.get("/api/admin/auth/me", headers=headers).status_code
+
+def test_logout_revokes_every_token_of_the_user(client):
+    first, second = _login(client), _login(client)
+    assert _me(client, first) == 200
+
+    assert client.post("/api/admin/auth/logout", headers=first).status_code == 200
+
+    assert _me(client, first) == 401
+    assert _me(client, second) == 401
+    assert _me(client, _login(client)) == 200
+
+def test_password_change_revokes_old_tokens(client):
+    old = _login(client)
+
+    response = client.post(
+        "/api/admin/auth/change-password", headers=old,
+        json={"current_password": PASSWORD, "new_password": "battery staple"},
+    )
+
+    assert response.status_code == 200
+    assert _me(client, old) == 401
+    assert _me(client, _login(client, "battery staple")) == 200
+
+@pytest.mark.parametrize("claims", [
+    {"sub": "admin", "role": "editor"},
+    {"sub": "nobody", "role": "admin"},
+    {"sub": "admin", "role": "admin", "tv": 7},
+])
+def test_tokens_not_matching_an_active_admin_are_refused(client, claims):
+    headers = {"Authorization": f"Bearer {create_access_token(claims)}"}
+
+    assert _me(client, headers) == 401
+
+def test_deactivated_admin_is_refused_once_the_cache_entry_lapses(client):
+    headers = _login(client)
+    assert _me(client, headers) == 200
+
+    asyncio.run(admin_users_db.collection.update_one({"username": "admin"}, {"$set": {"active": False}}))
+    admin_users_db.invalidate()
+    auth._token_cache.clear()
+
+    assert _me(client, headers) == 401
+
+def test_verified_tokens_are_cached(client, monkeypatch):
+    headers = _login(client)
+    lookups = []
+    verify = auth._verify_token
+
+    async def counting_verify(token):
+        lookups.append(token)
+        return await verify(token)
+
+    monkeypatch.setattr(auth, "_verify_token", counting_verify)
+    for _ in range(3):
+        assert _me(client, headers) == 200
+
+    assert len(lookups) == 1
+
+def test_database_errors_are_not_reported_as_bad_tokens(client, monkeypatch):
+    headers = _login(client)
+    auth._token_cache.clear()
+    admin_users_db.invalidate()
+
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("MongoDB is down")
+
+    monkeypatch.setattr(admin_users_db.collection, "find_one", unavailable)
+
+    assert _me(client, headers) == 500
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import bootstrap
+from services.bootstrap import BootstrapTask, run_bootstrap
+from services.database import admin_users_db, bootstrap_db
+
+class RecordingTasks:
+    """Bootstrap tasks that record their runs."""
+
+    def __init__(self):
+        self.runs = []
+
+    def define(self, name: str, version: str = "1", fail: bool = False, delay: float = 0):
+        async def run():
+            await asyncio.sleep(delay)
+            self.runs.append(name)
+            if fail:
+                raise RuntimeError("boom")
+            return {"ok": True}
+        bootstrap.tasks[name] = BootstrapTask(name, version, run)
+
+@pytest.fixture
+def tasks(monkeypatch):
+    monkeypatch.setattr(bootstrap, "tasks", {})
+    return RecordingTasks()
+
+def test_workers_starting_together_run_each_task_once(mock_db, tasks):
+    tasks.define("indexes", delay=0.05)
+    tasks.define("backfill")
+
+    async def run():
+        return await asyncio.gather(*[run_bootstrap() for _ in range(4)])
+
+    results = asyncio.run(run())
+
+    assert tasks.runs == ["indexes", "backfill"]
+    assert sorted(results) == [[], [], [], ["indexes", "backfill"]]
+    # The lock is released once the leader is done.
+    assert asyncio.run(bootstrap_db.collection.find_one({"_id": bootstrap.LOCK_ID})) is None
+
+def test_completed_tasks_run_again_only_for_a_new_version(mock_db, tasks):
+    tasks.define("indexes")
+    assert asyncio.run(run_bootstrap()) == ["indexes"]
+    assert asyncio.run(run_bootstrap()) == []
+
+    tasks.define("indexes", version="2")
+    assert asyncio.run(run_bootstrap()) == ["indexes"]
+    assert tasks.runs == ["indexes", "indexes"]
+
+def test_failed_task_is_retried_on_the_next_start(mock_db, tasks):
+    tasks.define("migration", fail=True)
+    tasks.define("backfill")
+
+    assert asyncio.run(run_bootstrap()) == ["backfill"]
+
+    tasks.define("migration")
+    assert asyncio.run(run_bootstrap()) == ["migration"]
+
+def test_another_leader_holding_the_lock_is_not_waited_for(mock_db, tasks):
+    tasks.define("indexes")
+
+    async def run(expires_at):
+        await bootstrap_db.collection.replace_one(
+            {"_id": bootstrap.LOCK_ID}, {"owner": "other-worker", "expires_at": expires_at}, upsert=True
+        )
+        return await run_bootstrap()
+
+    assert asyncio.run(run(datetime.utcnow() + timedelta(minutes=5))) == []
+    # A lock left behind by a crashed leader expires.
+    assert asyncio.run(run(datetime.utcnow() - timedelta(seconds=1))) == ["indexes"]
+
+def test_force_reruns_a_completed_task(mock_db, tasks):
+    tasks.define("indexes")
+    asyncio.run(run_bootstrap())
+
+    assert asyncio.run(run_bootstrap(force=["indexes"])) == ["indexes"]
+    with pytest.raises(ValueError):
+        asyncio.run(run_bootstrap(force=["nonexistent"]))
+
+def test_default_admin_leaves_an_existing_admin_alone(mock_db):
+    async def run():
+        created = await bootstrap.create_default_admin()
+        admin = await admin_users_db.collection.find_one({"role": "admin"})
+        await admin_users_db.collection.update_one({"_id": admin["_id"]}, {"$set": {"password_hash": "changed"}})
+        admin_users_db.invalidate()
+        again = await bootstrap.create_default_admin()
+        return created, again, await admin_users_db.collection.find({}).to_list(length=None)
+
+    created, again, admins = asyncio.run(run())
+    assert created == {"created": True}
+    assert again == {"created": False}
+    assert [admin["password_hash"] for admin in admins] == ["changed"]
@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.admin_api import router as admin_router
+from services.auth import get_current_admin_user
+from services.database import amenities_db
+
+def _amenity(title: str, **fields) -> dict:
+    return {"title": title, "description": f"About {title}", "icon_name": "star", **fields}
+
+@pytest.fixture
+def client(mock_db):
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/api")
+    app.dependency_overrides[get_current_admin_user] = lambda: {"username": "admin", "role": "admin"}
+    with TestClient(app) as client:
+        yield client
+
+def _titles() -> list:
+    documents = asyncio.run(amenities_db.collection.find({}).sort("display_order", 1).to_list(length=None))
+    return [document["title"] for document in documents]
+
+def test_create_many_reports_each_document_in_request_order(mock_db):
+    results = asyncio.run(amenities_db.create_many([_amenity("Pool"), _amenity("Gym")]))
+
+    assert [result["ok"] for result in results] == [True, True]
+    stored = asyncio.run(amenities_db.collection.find({}).to_list(length=None))
+    assert {str(document["_id"]): document["title"] for document in stored} == {
+        results[0]["id"]: "Pool", results[1]["id"]: "Gym",
+    }
+
+def test_by_id_operations_fail_unknown_and_repeated_ids_individually(mock_db):
+    async def run():
+        pool, gym = await amenities_db.create(_amenity("Pool")), await amenities_db.create(_amenity("Gym"))
+        missing = str(ObjectId())
+        updated = await amenities_db.update_many_by_id([
+            (missing, {"title": "Spa"}), (pool, {"title": "Pool (heated)"}), (pool, {"title": "Pool again"}),
+        ])
+        deleted = await amenities_db.delete_many_by_id([gym, missing, gym])
+        return pool, gym, missing, updated, deleted
+
+    pool, gym, missing, updated, deleted = asyncio.run(run())
+    assert updated == [
+        {"id": missing, "ok": False, "error": "Not found"},
+        {"id": pool, "ok": True},
+        {"id": pool, "ok": False, "error": "Repeated in this request"},
+    ]
+    assert deleted == [
+        {"id": gym, "ok": True},
+        {"id": missing, "ok": False, "error": "Not found"},
+        {"id": gym, "ok": False, "error": "Repeated in this request"},
+    ]
+    assert _titles() == ["Pool (heated)"]
+
+def test_reorder_numbers_documents_without_marking_them_edited(mock_db):
+    async def run():
+        ids = [await amenities_db.create(_amenity(title, display_order=9)) for title in ("Pool", "Gym", "Spa")]
+        last_week = datetime.utcnow() - timedelta(days=7)
+        await amenities_db.collection.update_many({}, {"$set": {"updated_at": last_week}})
+        results = await amenities_db.reorder([ids[2], ids[0]])
+        return ids, results, await amenities_db.collection.find({}).to_list(length=None)
+
+    ids, results, documents = asyncio.run(run())
+    assert results == [{"id": ids[2], "ok": True}, {"id": ids[0], "ok": True}]
+    orders = {document["title"]: document["display_order"] for document in documents}
+    assert orders == {"Spa": 1, "Pool": 2, "Gym": 9}  # left out, left alone
+    for document in documents:
+        assert datetime.utcnow() - document["updated_at"] > timedelta(days=6)
+
+def test_bulk_create_route_rejects_invalid_items_individually(client):
+    response = client.post("/api/admin/amenities/bulk", json={"items": [
+        _amenity("Pool"), {"title": "No description"}, _amenity("Gym"),
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert [result["index"] for result in body["results"]] == [0, 1, 2]
+    assert [result["ok"] for result in body["results"]] == [True, False, True]
+    assert body["results"][1]["id"] is None
+    assert "description" in body["results"][1]["error"]
+    assert sorted(_titles()) == ["Gym", "Pool"]
+
+def test_bulk_update_route_validates_fields_per_item(client):
+    pool = asyncio.run(amenities_db.create(_amenity("Pool")))
+
+    response = client.patch("/api/admin/amenities/bulk", json={"items": [
+        {"id": pool, "fields": {"display_order": "first"}},
+        {"id": pool, "fields": {"colour": "blue"}},
+        {"id": pool, "fields": {"title": "Pool (heated)"}},
+    ]})
+
+    results = response.json()["results"]
+    assert [result["ok"] for result in results] == [False, False, True]
+    assert results[0]["error"].startswith("display_order:")
+    assert results[1]["error"] == "colour: Unknown field"
+    assert _titles() == ["Pool (heated)"]
+
+def test_bulk_order_and_delete_routes(client):
+    ids = asyncio.run(amenities_db.create_many([_amenity(title) for title in ("Pool", "Gym", "Spa")]))
+    pool, gym, spa = [result["id"] for result in ids]
+
+    order = client.put("/api/admin/amenities/bulk/order", json={"ids": [spa, gym, pool]}).json()
+    assert order["succeeded"] == 3
+    assert _titles() == ["Spa", "Gym", "Pool"]
+
+    deleted = client.post("/api/admin/amenities/bulk/delete", json={"ids": [gym, str(ObjectId())]}).json()
+    assert [(result["index"], result["ok"]) for result in deleted["results"]] == [(0, True), (1, False)]
+    assert _titles() == ["Spa", "Pool"]
+
+def test_properties_have_no_order_route(client):
+    assert client.put("/api/admin/properties/bulk/order", json={"ids": [str(ObjectId())]}).status_code in (404, 405)
+
+@pytest.mark.parametrize("body", [{"items": []}, {"items": [_amenity("Pool")] * 501}])
+def test_bulk_request_size_is_limited(client, body):
+    assert client.post("/api/admin/amenities/bulk", json=body).status_code == 422
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image, ImageCms
+
+from services import images, uploads
+from services.database import uploads_db
+from services.storage import LocalStorage
+
+SRGB = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+def _photo(path, size=(800, 600), exif=True) -> str:
+    """A JPEG with an ICC profile and, optionally, EXIF rotating it 90 degrees."""
+    options = {"icc_profile": SRGB}
+    if exif:
+        metadata = Image.Exif()
+        metadata[0x0112] = 6  # orientation: rotate 90 CW
+        metadata[0x010F] = "Camera maker"
+        options["exif"] = metadata.tobytes()
+    Image.new("RGB", size, (200, 30, 30)).save(str(path), "JPEG", **options)
+    return str(path)
+
+def _sha256(path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+@pytest.fixture(autouse=True)
+def image_settings(monkeypatch):
+    monkeypatch.setattr(images, "IMAGE_AVIF", False)
+    monkeypatch.setattr(images, "IMAGE_WIDTHS", [320, 640])
+
+def test_clean_image_strips_exif_and_keeps_the_colour_profile(tmp_path):
+    path = _photo(tmp_path / "a.jpg")
+
+    assert images.clean_image(path) is True
+    cleaned = Image.open(path)
+    assert cleaned.size == (600, 800)  # orientation applied
+    assert not cleaned.info.get("exif")
+    assert cleaned.info.get("icc_profile") == SRGB
+    # Nothing left to clean the second time round
+    assert images.clean_image(path) is False
+
+def test_clean_image_caps_the_dimension(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "IMAGE_MAX_DIMENSION", 500)
+    path = _photo(tmp_path / "a.jpg", exif=False)
+
+    assert images.clean_image(path) is True
+    assert Image.open(path).size == (500, 375)
+
+def test_process_image_manifest(tmp_path):
+    path = _photo(tmp_path / "a.jpg", exif=False)
+    before = _sha256(path)
+
+    result = images.process_image(path)
+
+    assert _sha256(path) == before  # the original is never rewritten
+    assert result["file"] == "a.jpg"
+    assert (result["format"], result["width"], result["height"]) == ("jpeg", 800, 600)
+    assert list(result["variants"]) == ["webp", "jpeg"]
+    assert [item["width"] for item in result["variants"]["webp"]] == [320, 640, 800]
+    assert [item["file"] for item in result["variants"]["jpeg"]] == ["a-320w.jpeg", "a-640w.jpeg", "a.jpg"]
+    for items in result["variants"].values():
+        for item in items:
+            assert item["bytes"] == os.path.getsize(tmp_path / item["file"])
+            assert item["height"] == round(600 * item["width"] / 800)
+            assert Image.open(tmp_path / item["file"]).info.get("icc_profile") == SRGB
+    assert Image.open(tmp_path / result["thumbnail"]).size == (images.IMAGE_THUMBNAIL_SIZE,) * 2
+
+def test_process_image_adds_a_cleaned_full_size_variant_for_unclean_files(tmp_path):
+    path = _photo(tmp_path / "a.jpg")
+    before = _sha256(path)
+
+    result = images.process_image(path)
+
+    assert _sha256(path) == before
+    full_size = result["variants"]["jpeg"][-1]
+    assert full_size["file"] == "a-600w.jpeg"
+    assert not Image.open(tmp_path / full_size["file"]).info.get("exif")
+
+def test_process_image_skips_non_raster_files(tmp_path):
+    path = tmp_path / "a.gif"
+    frames = [Image.new("P", (10, 10), color) for color in (1, 2)]
+    frames[0].save(str(path), save_all=True, append_images=frames[1:])
+    (tmp_path / "b.txt").write_text("not an image")
+
+    assert images.process_image(str(path)) is None
+    assert images.process_image(str(tmp_path / "b.txt")) is None
+
+def test_build_manifest_urls_and_srcset(tmp_path):
+    result = images.process_image(_photo(tmp_path / "a.jpg", exif=False))
+
+    manifest = images.build_manifest(result, "https://cdn.example.com")
+
+    assert manifest["url"] == "https://cdn.example.com/a.jpg"
+    assert manifest["thumbnail_url"] == "https://cdn.example.com/a-thumb.webp"
+    assert manifest["srcset"]["webp"] == (
+        "https://cdn.example.com/a-320w.webp 320w, "
+        "https://cdn.example.com/a-640w.webp 640w, "
+        "https://cdn.example.com/a-800w.webp 800w"
+    )
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_TEMP_DIR", str(tmp_path / "partials"))
+    monkeypatch.setattr(uploads, "storage", LocalStorage(str(tmp_path / "uploads")))
+    # Threads instead of worker processes, so the patched settings apply.
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(images, "_get_pool", lambda: pool)
+    os.makedirs(tmp_path / "partials")
+    yield tmp_path / "uploads"
+    pool.shutdown()
+
+async def _upload(source: str, name: str) -> dict:
+    temp_path = uploads._work_path()
+    with open(source, "rb") as src, open(temp_path, "wb") as dst:
+        dst.write(src.read())
+    return await uploads._store(temp_path, name, "image/jpeg", os.path.getsize(temp_path), _sha256(temp_path))
+
+def test_stored_image_is_named_by_its_cleaned_content(mock_db, local_storage, tmp_path):
+    raw = _photo(tmp_path / "raw.jpg")
+
+    async def run():
+        return await _upload(raw, "IMG_0001.JPG"), await _upload(raw, "copy.jpg")
+
+    first, second = asyncio.run(run())
+    stored = local_storage / first["filename"]
+    assert first["sha256"] != _sha256(raw)
+    assert first["filename"] == f"{_sha256(stored)}.jpg"
+    assert first["size"] == os.path.getsize(stored)
+    assert first["image"]["variants"]["jpeg"][-1]["url"].endswith(first["filename"])
+    # The same raw photo again is recognised by the hash it was uploaded with.
+    assert second["deduplicated"] is True
+    assert second["filename"] == first["filename"]
+    record = asyncio.run(uploads_db.collection.find_one({"filename": first["filename"]}))
+    assert record["original_sha256s"] == [_sha256(raw)]
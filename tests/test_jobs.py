@@ -0,0 +1,154 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import geo_listings, jobs
+from services.database import jobs_db, properties_db
+from services.jobs import JobQueue, merge_duplicate_pending_jobs
+
+def _queue() -> JobQueue:
+    return JobQueue(jobs_db)
+
+async def _pending(doc_id: str = "d1") -> dict:
+    return await jobs_db.collection.find_one({"doc_id": doc_id, "status": "pending"})
+
+def test_enqueue_merges_into_the_pending_job(mock_db):
+    async def run():
+        queue = _queue()
+        await queue.enqueue("kind", "properties", "d1")
+        await queue.enqueue("kind", "properties", "d1")
+        await queue.enqueue("kind", "properties", "d2")
+        return await jobs_db.collection.count_documents({"status": "pending"})
+
+    assert asyncio.run(run()) == 2
+
+def test_enqueue_without_reschedule_keeps_the_backoff(mock_db):
+    later = datetime.utcnow() + timedelta(hours=1)
+
+    async def run():
+        queue = _queue()
+        await queue.enqueue("kind", "properties", "d1")
+        await jobs_db.collection.update_one({"doc_id": "d1"}, {"$set": {"run_after": later}})
+        await queue.enqueue("kind", "properties", "d1", reschedule=False)
+        kept = (await _pending())["run_after"]
+        await queue.enqueue("kind", "properties", "d1")
+        return kept, (await _pending())["run_after"]
+
+    kept, rescheduled = asyncio.run(run())
+    assert abs(kept - later) < timedelta(milliseconds=1)
+    assert rescheduled < later
+
+def test_claim_takes_due_jobs_and_expired_locks_only(mock_db):
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=jobs.JOB_LOCK_SECONDS + 60)
+
+    async def run():
+        await jobs_db.collection.insert_many([
+            {"kind": "k", "doc_id": "future", "status": "pending", "run_after": now + timedelta(hours=1), "attempts": 0},
+            {"kind": "k", "doc_id": "locked", "status": "running", "locked_at": now, "run_after": now, "attempts": 1},
+            {"kind": "k", "doc_id": "lost", "status": "running", "locked_at": stale, "run_after": now - timedelta(hours=1), "attempts": 1},
+            {"kind": "k", "doc_id": "due", "status": "pending", "run_after": now, "attempts": 0},
+        ])
+        queue = _queue()
+        return [await queue._claim() for _ in range(3)]
+
+    first, second, third = asyncio.run(run())
+    # Earliest run_after first; the claim counts an attempt and takes the lock.
+    assert (first["doc_id"], first["attempts"], first["status"]) == ("lost", 2, "running")
+    assert (second["doc_id"], second["attempts"]) == ("due", 1)
+    assert third is None
+
+def test_failed_job_backs_off_exponentially_then_fails(mock_db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(jobs, "JOB_RETRY_BASE_SECONDS", 30)
+
+    async def failing(collection, doc_id):
+        raise RuntimeError("upstream down")
+
+    async def run():
+        queue = _queue()
+        queue.register("k", failing)
+        await queue.enqueue("k", "properties", "d1")
+        delays = []
+        for _ in range(3):
+            await jobs_db.collection.update_one({"doc_id": "d1"}, {"$set": {"run_after": datetime.utcnow()}})
+            job = await queue._claim()
+            await queue._run(job)
+            stored = await jobs_db.collection.find_one({"_id": job["_id"]})
+            if stored["status"] == "pending":
+                delays.append((stored["run_after"] - datetime.utcnow()).total_seconds())
+        return delays, stored
+
+    delays, stored = asyncio.run(run())
+    assert [round(delay, -1) for delay in delays] == [30, 60]
+    assert stored["status"] == "failed"
+    assert stored["last_error"] == "upstream down"
+    assert stored["finished_at"] is not None
+
+def test_unknown_kind_fails_without_retrying(mock_db):
+    async def run():
+        queue = _queue()
+        await queue.enqueue("nobody_handles_this", "properties", "d1")
+        job = await queue._claim()
+        await queue._run(job)
+        return await jobs_db.collection.find_one({"_id": job["_id"]})
+
+    assert asyncio.run(run())["status"] == "failed"
+
+def test_retry_requeues_a_failed_job(mock_db):
+    async def run():
+        queue = _queue()
+        result = await jobs_db.collection.insert_one(
+            {"kind": "k", "collection": "properties", "doc_id": "d1", "status": "failed", "attempts": 5}
+        )
+        retried = await queue.retry(str(result.inserted_id))
+        return retried, await queue.retry(str(result.inserted_id)), await _pending()
+
+    retried, again, job = asyncio.run(run())
+    assert retried is True
+    assert again is False  # only failed jobs are retried
+    assert job["attempts"] == 0
+
+def test_merge_duplicate_pending_jobs_keeps_the_earliest(mock_db):
+    now = datetime.utcnow()
+
+    async def run():
+        await jobs_db.collection.insert_many([
+            {"kind": "k", "collection": "properties", "doc_id": "d1", "status": "pending", "run_after": now + timedelta(minutes=i)}
+            for i in (2, 0, 1)
+        ] + [{"kind": "k", "collection": "properties", "doc_id": "d1", "status": "failed", "run_after": now}])
+        removed = await merge_duplicate_pending_jobs()
+        return removed, [job["run_after"] async for job in jobs_db.collection.find({"status": "pending"})]
+
+    removed, remaining = asyncio.run(run())
+    assert removed == 2
+    assert len(remaining) == 1 and abs(remaining[0] - now) < timedelta(milliseconds=1)
+
+@pytest.fixture
+def upstream(monkeypatch):
+    async def geocode(location):
+        return (17.44, 78.35)
+
+    async def find_nearby_places(location, radius_km):
+        return [{"name": "Found by the job"}]
+
+    monkeypatch.setattr(geo_listings, "geocode", geocode)
+    monkeypatch.setattr(geo_listings, "find_nearby_places", find_nearby_places)
+
+@pytest.mark.parametrize("stored, expected", [
+    ({"nearby_places": []}, [{"name": "Found by the job"}]),
+    ({"nearby_places": [{"name": "Old lookup"}], "nearby_places_source": "auto"}, [{"name": "Found by the job"}]),
+    ({"nearby_places": [{"name": "Typed by an admin"}], "nearby_places_source": "manual"}, [{"name": "Typed by an admin"}]),
+    # Listings from before nearby_places_source existed were curated by hand.
+    ({"nearby_places": [{"name": "Typed by an admin"}]}, [{"name": "Typed by an admin"}]),
+])
+def test_enrichment_keeps_manual_nearby_places(mock_db, upstream, stored, expected):
+    async def run():
+        result = await properties_db.collection.insert_one({"location": "Gachibowli", **stored})
+        await geo_listings.enrich_listing("properties", str(result.inserted_id))
+        return await properties_db.collection.find_one({"_id": result.inserted_id})
+
+    document = asyncio.run(run())
+    assert document["nearby_places"] == expected
+    assert document["geo"]["coordinates"] == [78.35, 17.44]
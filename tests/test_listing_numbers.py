@@ -0,0 +1,31 @@
+import pytest
+
+from utils.listing_numbers import parse_area, parse_price
+
+@pytest.mark.parametrize("text, expected", [
+    ("300 sq.yds", (2700, 2700)),
+    ("1200 - 1800 sq.ft", (1200, 1800)),
+    ("1200-1800 sqft", (1200, 1800)),
+    ("2 BHK 1100 to 1300 sft", (1100, 1300)),
+    # A unit belongs to the number (or range) right before it only
+    ("3 BHK 1800 sft", (1800, 1800)),
+    ("1 acre", (43560, 43560)),
+    (1800, (1800, 1800)),
+    ("1800", (1800, 1800)),
+    (None, None),
+])
+def test_parse_area(text, expected):
+    assert parse_area(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("₹2.5 - 3.2 Cr", (25_000_000, 32_000_000)),
+    ("2.5-3.2Cr", (25_000_000, 32_000_000)),
+    ("₹45 Lakhs", (4_500_000, 4_500_000)),
+    ("₹ 45 - ₹ 60 Lakhs", (4_500_000, 6_000_000)),
+    ("1.2 Cr to 1.5 Cr", (12_000_000, 15_000_000)),
+    ("3 BHK 1.2 Cr", (12_000_000, 12_000_000)),
+    ("₹ 85,00,000", (8_500_000, 8_500_000)),
+    ("Price on request", None),
+])
+def test_parse_price(text, expected):
+    assert parse_price(text) == expected
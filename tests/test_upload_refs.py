@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import upload_refs, uploads
+from services.database import plots_db, properties_db, uploads_db
+from services.storage import LocalStorage
+
+REFERENCED = "ab" * 32
+ORPHAN = "cd" * 32
+
+@pytest.mark.parametrize("url", [
+    f"/uploads/{REFERENCED}.jpg",
+    f"https://api.kmkhomes.com/uploads/{REFERENCED}-640w.webp",
+    f"https://kmk-uploads.s3.amazonaws.com/media/{REFERENCED}.jpg",
+    f"https://cdn.kmkhomes.com/{REFERENCED}-thumb.webp",
+    f"http://127.0.0.1:9000/uploads/uploads/{REFERENCED}",
+    f'<img src="https://cdn.kmkhomes.com/{REFERENCED}.png">',
+])
+def test_referenced_hashes_any_storage_url(url):
+    assert upload_refs.referenced_hashes({"gallery_images": [url]}) == {REFERENCED}
+
+def test_referenced_hashes_ignores_longer_hex():
+    assert upload_refs.referenced_hashes(f"/uploads/{REFERENCED}{'0' * 64}.jpg") == set()
+
+async def _collect_with_cdn_reference(directory: str) -> dict:
+    stale = datetime.utcnow() - timedelta(days=30)
+    for sha256 in (REFERENCED, ORPHAN):
+        with open(os.path.join(directory, f"{sha256}.jpg"), "wb") as f:
+            f.write(b"jpeg")
+        await uploads_db.collection.insert_one({
+            "filename": f"{sha256}.jpg", "sha256": sha256, "size": 4, "content_type": "image/jpeg",
+            "created_at": stale, "last_uploaded_at": stale, "ref_count": 0,
+        })
+    # Written straight to the collection: GC must find the reference by re-scanning.
+    await properties_db.collection.insert_one({
+        "villa_number": "V1",
+        "gallery_images": [f"https://cdn.kmkhomes.com/{REFERENCED}.jpg"],
+    })
+    return await upload_refs.collect_garbage(grace_hours=1, dry_run=False)
+
+def test_gc_keeps_files_referenced_by_cdn_urls(mock_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_refs, "storage", LocalStorage(str(tmp_path)))
+
+    report = asyncio.run(_collect_with_cdn_reference(str(tmp_path)))
+
+    assert report["deleted"] == [f"{ORPHAN}.jpg"]
+    assert (tmp_path / f"{REFERENCED}.jpg").exists()
+    assert not (tmp_path / f"{ORPHAN}.jpg").exists()
+
+@pytest.fixture
+def upload_storage(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path / "uploads"))
+    monkeypatch.setattr(upload_refs, "storage", storage)
+    monkeypatch.setattr(uploads, "storage", storage)
+    monkeypatch.setattr(uploads, "UPLOAD_TEMP_DIR", str(tmp_path / "partials"))
+    os.makedirs(tmp_path / "partials")
+    return tmp_path / "uploads"
+
+async def _store_text(data: bytes, name: str) -> dict:
+    temp_path = uploads._work_path()
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    return await uploads._store(temp_path, name, "text/plain", len(data), hashlib.sha256(data).hexdigest())
+
+def test_identical_uploads_are_stored_once(mock_db, upload_storage):
+    async def run():
+        return await _store_text(b"brochure", "a.txt"), await _store_text(b"brochure", "b.txt")
+
+    first, second = asyncio.run(run())
+
+    assert (first["deduplicated"], second["deduplicated"]) == (False, True)
+    assert first["filename"] == second["filename"] == f"{hashlib.sha256(b'brochure').hexdigest()}.txt"
+    assert os.listdir(upload_storage) == [first["filename"]]
+    assert asyncio.run(uploads_db.collection.count_documents({})) == 1
+
+def test_writes_keep_ref_count_current(mock_db, upload_storage):
+    async def ref_count(upload: dict) -> int:
+        return (await uploads_db.collection.find_one({"filename": upload["filename"]}))["ref_count"]
+
+    async def run():
+        upload = await _store_text(b"floor plan", "plan.txt")
+        counts = [await ref_count(upload)]
+        first = await properties_db.create({"villa_number": "V1", "main_image": upload["file_url"]})
+        second = await plots_db.create({"plot_name": "P1", "gallery_images": [f"https://cdn.kmkhomes.com/{upload['filename']}"]})
+        counts.append(await ref_count(upload))
+        await properties_db.update_by_id(first, {"main_image": ""})
+        counts.append(await ref_count(upload))
+        await plots_db.delete_by_id(second)
+        counts.append(await ref_count(upload))
+        return counts
+
+    assert asyncio.run(run()) == [0, 2, 1, 0]
+
+def test_gc_honours_the_grace_period_and_dry_run(mock_db, upload_storage):
+    async def run():
+        upload = await _store_text(b"unused", "unused.txt")
+        sha256 = upload["sha256"]
+        (upload_storage / f"{sha256}-thumb.webp").write_bytes(b"variant")
+        recent = await upload_refs.collect_garbage(grace_hours=1, dry_run=False)
+        stale = datetime.utcnow() - timedelta(hours=2)
+        await uploads_db.collection.update_one({"sha256": sha256}, {"$set": {"last_uploaded_at": stale}})
+        dry_run = await upload_refs.collect_garbage(grace_hours=1)
+        removed = await upload_refs.collect_garbage(grace_hours=1, dry_run=False)
+        return upload, recent, dry_run, removed
+
+    upload, recent, dry_run, removed = asyncio.run(run())
+    assert recent["deleted"] == []
+    assert dry_run["deleted"] == [upload["filename"]]
+    assert dry_run["freed_bytes"] == len(b"unused") + len(b"variant")
+    assert removed["deleted"] == [upload["filename"]]
+    # The file goes together with its variants and its record.
+    assert os.listdir(upload_storage) == []
+    assert asyncio.run(uploads_db.collection.count_documents({})) == 0
@@ -0,0 +1,119 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.upload_server import IMMUTABLE_CACHE_CONTROL, UploadServer, parse_range, precompress
+
+HASHED = "ab" * 32
+CONTENT = bytes(range(256)) * 16  # 4 KB
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / f"{HASHED}.mp4").write_bytes(CONTENT)
+    (tmp_path / "legacy.jpg").write_bytes(CONTENT)
+    (tmp_path / f"{HASHED}.svg").write_text("<svg>" + " " * 4096 + "</svg>")
+    precompress(str(tmp_path / f"{HASHED}.svg"))
+    (tmp_path / "backup.tar.gz").write_bytes(gzip.compress(b"archive"))
+    return TestClient(UploadServer(str(tmp_path)))
+
+def test_hashed_names_are_immutable(client):
+    response = client.get(f"/{HASHED}.mp4")
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["etag"] == f'"{HASHED}-{len(CONTENT):x}"'
+    assert response.headers["content-type"] == "video/mp4"
+    assert response.headers["accept-ranges"] == "bytes"
+
+def test_other_names_get_a_short_cache_lifetime(client):
+    response = client.get("/legacy.jpg")
+
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert response.headers["cache-control"] != IMMUTABLE_CACHE_CONTROL
+
+def test_matching_etag_is_answered_with_304(client):
+    etag = client.get(f"/{HASHED}.mp4").headers["etag"]
+
+    response = client.get(f"/{HASHED}.mp4", headers={"If-None-Match": f'W/"other", W/{etag}'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+def test_if_modified_since_is_answered_with_304(client):
+    last_modified = client.get("/legacy.jpg").headers["last-modified"]
+
+    assert client.get("/legacy.jpg", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/legacy.jpg", headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}).status_code == 200
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=4000-", 4000, 4095),
+    ("bytes=-96", 4000, 4095),
+    ("bytes=4000-999999", 4000, 4095),
+])
+def test_byte_ranges(client, header, start, end):
+    response = client.get(f"/{HASHED}.mp4", headers={"Range": header})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(CONTENT)}"
+    assert response.headers["content-length"] == str(end - start + 1)
+
+def test_unsatisfiable_range_is_416(client):
+    response = client.get(f"/{HASHED}.mp4", headers={"Range": "bytes=5000-"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+def test_if_range_with_a_stale_etag_sends_the_whole_file(client):
+    response = client.get(f"/{HASHED}.mp4", headers={"Range": "bytes=0-99", "If-Range": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+def test_gzip_copy_is_served_as_a_content_encoding(client):
+    plain = client.get(f"/{HASHED}.svg", headers={"Accept-Encoding": "identity"})
+    compressed = client.get(f"/{HASHED}.svg", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.content == plain.content  # decoded by the client
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.headers["etag"] == plain.headers["etag"][:-1] + '-gz"'
+    # A 304 names the representation the client has.
+    revalidated = client.get(f"/{HASHED}.svg", headers={"If-None-Match": compressed.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == compressed.headers["etag"]
+
+def test_uploaded_archives_keep_their_type(client):
+    response = client.get("/backup.tar.gz")
+
+    assert response.headers["content-type"] == "application/gzip"
+    assert "content-encoding" not in response.headers
+
+@pytest.mark.parametrize("path", [
+    f"/{HASHED}.svg.gz",  # gzip copies only exist as an encoding
+    "/missing.jpg",
+    "/.hidden",
+    "/a%00b",
+    "/../etc/passwd",
+    "/",
+])
+def test_not_found(client, path):
+    assert client.get(path).status_code == 404
+
+def test_only_get_and_head(client):
+    assert client.head(f"/{HASHED}.mp4").headers["content-length"] == str(len(CONTENT))
+    assert client.post(f"/{HASHED}.mp4").status_code == 405
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-0", (0, 0)),
+    ("bytes=0-1,5-6", None),  # multiple ranges are ignored
+    ("items=0-1", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
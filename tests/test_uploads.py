@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from services import images, uploads
+from services.database import upload_sessions_db
+from services.storage import LocalStorage
+
+KB = 1024
+BOUNDARY = "test-boundary"
+
+class StreamingRequest:
+    """Just enough of a Starlette request for save_multipart_upload(), counting what it reads."""
+
+    def __init__(self, body: bytes, chunk_size: int = 4 * KB, content_type: str = f"multipart/form-data; boundary={BOUNDARY}"):
+        self.headers = {"content-type": content_type}
+        self.body = body
+        self.chunk_size = chunk_size
+        self.received = 0
+
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            chunk = self.body[start:start + self.chunk_size]
+            self.received += len(chunk)
+            yield chunk
+
+def _form(filename: str, data: bytes, content_type: str = None, fields: dict = None) -> bytes:
+    parts = []
+    for name, value in (fields or {}).items():
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode() + value + b"\r\n")
+    headers = f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+    if content_type:
+        headers += f"Content-Type: {content_type}\r\n"
+    parts.append(headers.encode() + b"\r\n" + data + b"\r\n")
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+@pytest.fixture
+def upload_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_TEMP_DIR", str(tmp_path / "partials"))
+    monkeypatch.setattr(uploads, "storage", LocalStorage(str(tmp_path / "uploads")))
+    monkeypatch.setattr(uploads, "UPLOAD_LIMITS", [("image/", 64 * KB), ("", 16 * KB)])
+    # Image processing (nothing to do for these non-images) in threads
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(images, "_get_pool", lambda: pool)
+    os.makedirs(tmp_path / "partials")
+    yield tmp_path
+    pool.shutdown()
+
+def _upload(request: StreamingRequest) -> dict:
+    return asyncio.run(uploads.save_multipart_upload(request))
+
+def test_multipart_upload_is_stored_under_its_hash(mock_db, upload_dirs):
+    data = b"plain text " * 100
+
+    result = _upload(StreamingRequest(_form("notes.txt", data, fields={"alt": b"caption"})))
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert (result["filename"], result["size"], result["content_type"]) == (f"{sha256}.txt", len(data), "text/plain")
+    assert (upload_dirs / "uploads" / result["filename"]).read_bytes() == data
+    assert os.listdir(upload_dirs / "partials") == []
+
+@pytest.mark.parametrize("filename, content_type, size, allowed", [
+    ("photo.jpg", None, 60 * KB, True),
+    ("photo.jpg", None, 80 * KB, False),
+    # The type comes from the part's Content-Type, then the file name.
+    ("photo", "image/jpeg", 60 * KB, True),
+    ("notes.txt", None, 20 * KB, False),
+    ("photo.jpg", "text/plain", 20 * KB, False),
+])
+def test_multipart_per_type_limits(mock_db, upload_dirs, filename, content_type, size, allowed):
+    request = StreamingRequest(_form(filename, b"x" * size, content_type))
+
+    if allowed:
+        assert _upload(request)["size"] == size
+    else:
+        with pytest.raises(HTTPException) as error:
+            _upload(request)
+        assert error.value.status_code == 413
+        assert os.listdir(upload_dirs / "partials") == []
+
+def test_multipart_limit_applies_while_the_body_streams(mock_db, upload_dirs):
+    request = StreamingRequest(_form("photo.jpg", b"x" * (10 * 1024 * KB)))
+
+    with pytest.raises(HTTPException) as error:
+        _upload(request)
+
+    assert error.value.status_code == 413
+    # Refused one chunk past the 64 KB image limit, not after 10 MB.
+    assert request.received <= 64 * KB + 2 * request.chunk_size
+
+def test_multipart_form_fields_are_limited(mock_db, upload_dirs, monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_FORM_FIELD_BYTES", 1 * KB)
+    request = StreamingRequest(_form("notes.txt", b"hi", fields={"alt": b"a" * (8 * KB)}))
+
+    with pytest.raises(HTTPException) as error:
+        _upload(request)
+
+    assert error.value.status_code == 413
+
+@pytest.mark.parametrize("request_body, content_type", [
+    (_form("notes.txt", b"hi").replace(b"Content-Disposition:", b"Content Disposition:"), None),
+    (b"not multipart at all", None),
+    (_form("notes.txt", b"hi"), "multipart/form-data"),  # no boundary
+    (_form("notes.txt", b"hi"), "application/json"),
+    (f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="alt"\r\n\r\nhi\r\n--{BOUNDARY}--\r\n'.encode(), None),  # no file
+])
+def test_bad_multipart_requests_are_400(mock_db, upload_dirs, request_body, content_type):
+    request = StreamingRequest(request_body)
+    if content_type:
+        request.headers["content-type"] = content_type
+
+    with pytest.raises(HTTPException) as error:
+        _upload(request)
+
+    assert error.value.status_code == 400
+    assert os.listdir(upload_dirs / "partials") == []
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+def test_session_refuses_bytes_past_the_declared_size(mock_db, upload_dirs):
+    async def run():
+        session = await uploads.create_session("notes.txt", 4)
+        with pytest.raises(HTTPException) as error:
+            await uploads.append_to_session(session["upload_id"], 0, _chunks(b"12", b"345"))
+        return error.value, await uploads.get_session(session["upload_id"])
+
+    error, session = asyncio.run(run())
+    assert error.status_code == 413
+    assert (session["status"], session["offset"]) == ("open", 0)
+
+def test_session_is_reopened_when_storing_fails(mock_db, upload_dirs, monkeypatch):
+    store = uploads._store
+    failures = [OSError("disk full")]
+
+    async def flaky_store(temp_path, *args):
+        if failures:
+            # _store() had already moved the partial file away.
+            os.remove(temp_path)
+            raise failures.pop()
+        return await store(temp_path, *args)
+
+    monkeypatch.setattr(uploads, "_store", flaky_store)
+
+    async def run():
+        session = await uploads.create_session("notes.txt", 4)
+        with pytest.raises(OSError):
+            await uploads.append_to_session(session["upload_id"], 0, _chunks(b"1234"))
+        reopened = await uploads.get_session(session["upload_id"])
+        return reopened, await uploads.append_to_session(session["upload_id"], 0, _chunks(b"1234"))
+
+    reopened, completed = asyncio.run(run())
+    assert (reopened["status"], reopened["offset"]) == ("open", 0)
+    assert completed["status"] == "complete"
+
+def test_orphaned_partials_are_removed_after_the_grace_period(mock_db, upload_dirs, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_PARTIAL_GRACE_HOURS", 1)
+    partials = upload_dirs / "partials"
+    hour_ago = time.time() - 3600 - 60
+
+    async def run():
+        now = datetime.utcnow()
+        live = await upload_sessions_db.create({"expires_at": now + timedelta(hours=1)})
+        expired = await upload_sessions_db.create({"expires_at": now - timedelta(minutes=1)})
+        names = {"live": live, "expired": expired, "missing": str(ObjectId()), "recent": str(ObjectId())}
+        for label, name in names.items():
+            (partials / name).write_bytes(b"partial")
+            if label != "recent":
+                os.utime(partials / name, (hour_ago, hour_ago))
+        (partials / f"{uploads.WORK_PREFIX}upload").write_bytes(b"another worker's upload")
+        os.utime(partials / f"{uploads.WORK_PREFIX}upload", (hour_ago, hour_ago))
+        await uploads.remove_orphaned_partials()
+        return names
+
+    names = asyncio.run(run())
+    assert sorted(os.listdir(partials)) == sorted([names["live"], names["recent"], f"{uploads.WORK_PREFIX}upload"])